@@ -1,5 +1,12 @@
-import pandas as pd
 import os
+import sys
+
+# Os módulos do projeto ficam em sources/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "sources"))
+
+import pandas as pd
+
+from scenarios_dataset import PASTA_DATASET, exportar_csv, gravar_cenario
 
 # Caminho da pasta com os cenários
 base_path = r"C:\Users\wpcal\Dropbox\Arquivos Pacheco 02_05_2022\Programacao\Ambiente_VirtualCS\Marcella\cenarios"
@@ -7,21 +14,19 @@ base_path = r"C:\Users\wpcal\Dropbox\Arquivos Pacheco 02_05_2022\Programacao\Amb
 # Lista de cenários (01 até 11, com zero à esquerda até o 09)
 cenarios = [f"{i:02d}" for i in range(1, 12)]
 
-# Lista para armazenar os DataFrames
-lista_df = []
+# Pasta do dataset particionado (uma partição CENARIO=XX por cenário)
+pasta_dataset = os.path.join(base_path, PASTA_DATASET)
 
-# Loop pelos arquivos
+# Grava a partição de cada cenário a partir do Parquet já gerado pelo extrator
 for c in cenarios:
-    arquivo = os.path.join(base_path, f"cenario_{c}.csv")
-    df = pd.read_csv(arquivo)
-    df["CENARIO"] = c   # adiciona coluna identificando o cenário (como string "01", "02", ...)
-    lista_df.append(df)
+    arquivo = os.path.join(base_path, f"cenario_{c}.parquet")
+    df = pd.read_parquet(arquivo)
+    gravar_cenario(df, c, pasta_dataset)   # tipos explícitos; 'VAZIO' vira NaN
 
-# Concatena todos os DataFrames
-dataset = pd.concat(lista_df, ignore_index=True)
+print(f"Dataset particionado criado com sucesso: {pasta_dataset}")
 
 # Exporta para CSV final (opcional)
 saida = os.path.join(base_path, "cenarios_unificados.csv")
-dataset.to_csv(saida, index=False)
+exportar_csv(pasta_dataset, saida)
 
 print("Dataset unificado criado com sucesso!")
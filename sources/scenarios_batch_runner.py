@@ -0,0 +1,228 @@
+import argparse
+import os
+import sys
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import pandas as pd
+
+import scenarios_data_extractor as extrator
+from scenarios_cache import ManifestoCache
+from scenarios_dataset import PASTA_DATASET, cenarios_no_dataset, codigo_cenario, gravar_cenario
+from scenarios_input_audit import ARQUIVO_AUDITORIA, auditar_dataset, gravar_auditoria
+from scenarios_job_ledger import ARQUIVO_TAREFAS, INTEGRADO, RegistroTarefas
+from swmm_instrumentation import ARQUIVO_LOG, LogExecucao, etapa, imprimir_resumo, medir_cenario
+
+## Execução em lote da extração de cenários com um pool de processos
+#
+# Cada cenário é independente: processar_cenario é enviado a um processo do
+# pool, que grava o CSV/Parquet do cenário. Resultados e erros são coletados
+# por cenário sem interromper o lote, e o dataset particionado (um Parquet por
+# cenário) é atualizado no final; o CSV unificado é opcional.
+# Cenários cujas entradas (.inp/.rpt/.out) e versão do esquema não mudaram desde
+# a última extração são lidos do Parquet em cache, sem reprocessamento.
+# Tempos, memória e descartes de cada etapa de cada cenário vão para o log de
+# execução em JSON-lines (execucao_log.jsonl). Ao final o dataset inteiro é
+# auditado em uma passada (auditoria_dados.csv).
+# O estado de cada cenário (pendente, em processamento, extraído, integrado ao
+# dataset ou com falha e o seu traceback) fica no registro de tarefas
+# tarefas.sqlite: após uma queda ou um Ctrl-C, repetir o comando processa
+# apenas os cenários que faltam.
+
+# Número padrão de processos (um por núcleo disponível)
+N_PROCESSOS = os.cpu_count() or 1
+
+ARQUIVO_UNIFICADO = "cenarios_unificados.csv"
+
+
+def _processar_no_pool(cenario, base_path):
+    """Executa processar_cenario em um processo do pool e devolve (cenário, df, erro, medições)"""
+    extrator.base_path = base_path
+    df = erro = None
+    try:
+        with medir_cenario(cenario) as medicao:
+            df = extrator.processar_cenario(cenario, levantar_erros=True)
+    except Exception:
+        erro = traceback.format_exc()
+    return cenario, df, erro, medicao.registros()
+
+
+def unificar_cenarios(resultados, cenarios):
+    """Concatena os DataFrames na ordem dos cenários, identificando-os pela coluna CENARIO"""
+    lista_df = []
+    for cenario in cenarios:
+        df = resultados.get(cenario)
+        if df is None:
+            continue
+        df = df.copy()
+        df["CENARIO"] = cenario.replace("cenario_", "")  # "01", "02", ...
+        lista_df.append(df)
+    if not lista_df:
+        return None
+    return pd.concat(lista_df, ignore_index=True)
+
+
+def executar_lote(cenarios, n_processos=N_PROCESSOS, base_path=None, pasta_dataset=PASTA_DATASET,
+                  arquivo_unificado=None, usar_cache=True, arquivo_log=ARQUIVO_LOG, resumo=False):
+    """Processa os cenários em paralelo e grava o dataset unificado; retorna (resultados, erros)"""
+    base_path = base_path or extrator.base_path
+    resultados = {}
+    erros = {}
+    log = LogExecucao(os.path.join(base_path, arquivo_log), n_processos=n_processos, cenarios=len(cenarios)) \
+        if arquivo_log else None
+
+    # Registro de tarefas: cenários interrompidos em uma execução anterior voltam a pendentes
+    registro = RegistroTarefas(os.path.join(base_path, ARQUIVO_TAREFAS))
+    registro.registrar((cenario, None) for cenario in cenarios)
+    registro.retomar()
+
+    # 1. Separar os cenários inalterados (lidos do cache) dos que precisam de extração
+    manifesto = ManifestoCache(base_path, extrator.VERSAO_ESQUEMA)
+    impressoes = {}
+    pendentes = []
+    for cenario in cenarios:
+        impressoes[cenario] = manifesto.impressoes(cenario)
+        if usar_cache and manifesto.cenario_atualizado(cenario, impressoes[cenario]):
+            try:
+                resultados[cenario] = pd.read_parquet(manifesto.caminho_parquet(cenario))
+                continue
+            except Exception as e:
+                print(f"Aviso: cache de {cenario} ilegível ({str(e)}), reprocessando")
+        pendentes.append(cenario)
+
+    n_processos = max(1, min(n_processos, len(pendentes)))
+    print(f"\n{'=' * 50}")
+    print(f"Processando {len(pendentes)} cenários com {n_processos} processo(s) "
+          f"({len(cenarios) - len(pendentes)} em cache)")
+    print(f"{'=' * 50}")
+
+    # 2. Distribuir os cenários pendentes (execução direta quando há um único processo), um por
+    # processo livre: um Ctrl-C (que também interrompe os processos do pool) não deixa cenários por começar
+    def concluidos():
+        if n_processos == 1:
+            for cenario in pendentes:
+                registro.iniciar([cenario])
+                yield _processar_no_pool(cenario, base_path)
+            return
+        fila = deque(pendentes)
+        em_execucao = set()
+        while fila or em_execucao:
+            while fila and len(em_execucao) < n_processos:
+                cenario = fila.popleft()
+                registro.iniciar([cenario])
+                em_execucao.add(pool.submit(_processar_no_pool, cenario, base_path))
+            prontos, em_execucao = wait(em_execucao, return_when=FIRST_COMPLETED)
+            for futuro in prontos:
+                yield futuro.result()
+
+    # 3. Coletar resultados e erros por cenário; cada extração fica registrada no manifesto e no
+    # registro de tarefas assim que termina, de modo que um lote interrompido continua de onde parou
+    pool = ProcessPoolExecutor(max_workers=n_processos) if n_processos > 1 else None
+    try:
+        for cenario, df, erro, medicoes in concluidos():
+            if log:
+                log.gravar(medicoes)
+            if erro is None:
+                resultados[cenario] = df
+                parquet = os.path.join(base_path, f"{cenario}.parquet")
+                manifesto.registrar(cenario, impressoes[cenario], parquet)
+                manifesto.salvar()
+                registro.extraido(cenario, {'parquet': os.path.relpath(parquet, base_path)})
+            else:
+                erros[cenario] = erro
+                registro.falhou(cenario, erro)
+                print(f"❌ Falha no cenário {cenario}:\n{erro}")
+    except KeyboardInterrupt:
+        # Os cenários já extraídos entram no dataset na próxima execução (lidos do cache)
+        registro.retomar()
+        registro.fechar()
+        if log:
+            log.fechar(processados=sum(cenario in resultados for cenario in pendentes), com_erro=len(erros),
+                       interrompido=True)
+        print(f"\n⏸️ Lote interrompido: execute de novo para continuar ({registro.caminho})")
+        raise
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    # 4. Dataset particionado: grava só as partições dos cenários reextraídos, ausentes ou
+    # extraídos em uma execução interrompida antes desta etapa
+    if pasta_dataset:
+        pasta = os.path.join(base_path, pasta_dataset)
+        existentes = set(cenarios_no_dataset(pasta))
+        estados = registro.estados()
+        gravados = 0
+        with medir_cenario('lote') as medicao:
+            with etapa('gravacao_dataset') as medida:
+                for cenario in cenarios:
+                    if cenario in resultados and (cenario in pendentes or codigo_cenario(cenario) not in existentes
+                                                  or estados.get(cenario) != INTEGRADO):
+                        arquivo = gravar_cenario(resultados[cenario], cenario, pasta)
+                        registro.integrado(cenario, {'particao': os.path.relpath(arquivo, base_path)})
+                        gravados += 1
+                medida.linhas = gravados
+            print(f"📦 Dataset particionado: {pasta} ({gravados} partição(ões) gravada(s))")
+
+            # Auditoria consolidada de todas as partições
+            if gravados or not os.path.exists(os.path.join(base_path, ARQUIVO_AUDITORIA)):
+                with etapa('auditoria') as medida:
+                    relatorio = auditar_dataset(pasta)
+                    gravar_auditoria(relatorio, os.path.join(base_path, ARQUIVO_AUDITORIA))
+                    medida.linhas = len(relatorio)
+        if log:
+            log.gravar(medicao.registros())
+    registro.fechar()
+
+    # 5. CSV unificado opcional com os cenários bem-sucedidos (refeito só se algo mudou)
+    if arquivo_unificado:
+        sucesso = [cenario for cenario in cenarios if cenario in resultados]
+        alterados = [cenario for cenario in pendentes if cenario in resultados]
+        saida = os.path.join(base_path, arquivo_unificado)
+        if not alterados and manifesto.unificado_atualizado(arquivo_unificado, sucesso):
+            print(f"📦 Dataset unificado sem alterações: {saida}")
+        else:
+            dataset = unificar_cenarios(resultados, cenarios)
+            if dataset is not None:
+                dataset.to_csv(saida, index=False)
+                manifesto.registrar_unificado(arquivo_unificado, sucesso)
+                print(f"📦 Dataset unificado criado: {saida} ({len(dataset)} registros)")
+    manifesto.salvar()
+    if log:
+        log.fechar(processados=len(pendentes) - len(erros), em_cache=len(cenarios) - len(pendentes),
+                   com_erro=len(erros))
+        print(f"🧾 Log de execução: {log.caminho}")
+        if resumo:
+            imprimir_resumo(log.caminho, log.execucao)
+
+    print(f"\nResumo: {len(pendentes) - len(erros)} cenário(s) processado(s), "
+          f"{len(cenarios) - len(pendentes)} reaproveitado(s) do cache, {len(erros)} com erro")
+    for cenario in erros:
+        print(f"  ❌ {cenario}")
+    return resultados, erros
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extração paralela dos cenários SWMM")
+    parser.add_argument("--processos", type=int, default=N_PROCESSOS,
+                        help="número de processos do pool (padrão: núcleos disponíveis)")
+    parser.add_argument("--base-path", default=extrator.base_path,
+                        help="pasta com os arquivos .inp/.rpt dos cenários")
+    parser.add_argument("--csv", action="store_true",
+                        help=f"também grava o CSV unificado {ARQUIVO_UNIFICADO}")
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="reprocessa todos os cenários, ignorando o cache de extração")
+    parser.add_argument("--log", default=ARQUIVO_LOG,
+                        help="log de execução JSON-lines (relativo à pasta dos cenários)")
+    parser.add_argument("--resumo", action="store_true",
+                        help="imprime a tabela de tempos por etapa e os cenários mais lentos ao final")
+    parser.add_argument("cenarios", nargs="*", default=extrator.cenarios,
+                        help="cenários a processar (padrão: cenario_01 … cenario_11)")
+    args = parser.parse_args()
+
+    try:
+        executar_lote(args.cenarios, n_processos=args.processos, base_path=args.base_path,
+                      arquivo_unificado=ARQUIVO_UNIFICADO if args.csv else None, usar_cache=not args.sem_cache,
+                      arquivo_log=args.log, resumo=args.resumo)
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,200 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+import scenarios_data_extractor as extrator
+from scenarios_dataset import PASTA_DATASET, exportar_csv, gravar_cenario
+from swmm_geometry import figura_mapa_inundacao, geometria_modelo, limpar_cache_geometrias
+from swmm_inp_model import ler_modelo_inp, limpar_cache_modelos
+from swmm_report_index import ler_relatorio, limpar_cache_relatorios
+from swmm_synthetic_network import gerar_rede_sintetica
+from swmm_topology import limpar_cache_topologias
+
+## Medição de desempenho do extrator em redes sintéticas
+#
+# Para cada tamanho de rede (nº de sub-bacias) é gerado um .inp/.rpt sintético
+# e cada etapa do pipeline é medida duas vezes: uma para o tempo (sem
+# instrumentação) e outra para o pico de memória alocada (tracemalloc). Os
+# resultados podem ser gravados como referência e comparados em execuções
+# seguintes, indicando as etapas que ficaram mais lentas que a tolerância.
+
+TAMANHOS = [1000, 10000, 100000]
+ARQUIVO_REFERENCIA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "outputs",
+                                  "benchmark_referencia.json")
+
+# Cópias do cenário gravadas como partições na etapa de concatenação
+N_CENARIOS_CONCATENACAO = 4
+
+# Tempo acima de tolerância × referência é considerado regressão
+TOLERANCIA = 1.5
+
+
+def _silencioso(funcao, *args, **kwargs):
+    """Executa suprimindo os prints de progresso do extrator"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return funcao(*args, **kwargs)
+
+
+def etapas_pipeline(caminho_inp, caminho_rpt, pasta):
+    """Lista (nome, função) das etapas medidas; cada função é independente das demais"""
+    modelo = ler_modelo_inp(caminho_inp)
+    b_para_g, g_para_diam, b_para_p, p_para_b = _silencioso(extrator.construir_mapeamento_b_p_g, modelo)
+    junctions = extrator.ler_secao_arquivo_com_ordem(modelo, 'JUNCTIONS')
+    node_depth = extrator.ler_rpt_ordenado(caminho_rpt, 'Node Depth Summary', 3)
+    df = _silencioso(extrator.extrair_cenario, "benchmark", caminho_inp, caminho_rpt)
+    pasta_dataset = os.path.join(pasta, PASTA_DATASET)
+
+    def leitura_inp():
+        limpar_cache_modelos()
+        ler_modelo_inp(caminho_inp)
+
+    def leitura_rpt():
+        limpar_cache_relatorios()
+        ler_relatorio(caminho_rpt)
+
+    def mapeamento_b_p_g():
+        limpar_cache_topologias()
+        extrator.construir_mapeamento_b_p_g(modelo)
+
+    def raza_clbo():
+        extrator.calcular_raza_clbo_para_df(df.copy(), b_para_p, node_depth, junctions)
+
+    def extracao_completa():
+        limpar_cache_modelos()
+        limpar_cache_relatorios()
+        limpar_cache_topologias()
+        extrator.extrair_cenario("benchmark", caminho_inp, caminho_rpt)
+
+    def escrita_csv():
+        df.to_csv(os.path.join(pasta, "benchmark.csv"), index=False, encoding='utf-8')
+
+    def escrita_parquet():
+        df.to_parquet(os.path.join(pasta, "benchmark.parquet"), index=False)
+
+    def geometria():
+        limpar_cache_geometrias()
+        geometria_modelo(modelo).atributos()
+
+    def mapa_inundacao():
+        classes = dict(zip(df['NOME'], df['CLBO']))
+        figura_mapa_inundacao(os.path.join(pasta, "benchmark_mapa.png"), geometria_modelo(modelo), classes)
+
+    def concatenacao():
+        for i in range(1, N_CENARIOS_CONCATENACAO + 1):
+            gravar_cenario(df, f"cenario_{i:02d}", pasta_dataset)
+        exportar_csv(pasta_dataset, os.path.join(pasta, "benchmark_unificado.csv"))
+
+    return [
+        ('leitura_inp', leitura_inp),
+        ('leitura_rpt', leitura_rpt),
+        ('mapeamento_b_p_g', mapeamento_b_p_g),
+        ('raza_clbo', raza_clbo),
+        ('geometria', geometria),
+        ('mapa_inundacao', mapa_inundacao),
+        ('extracao_completa', extracao_completa),
+        ('escrita_csv', escrita_csv),
+        ('escrita_parquet', escrita_parquet),
+        ('concatenacao', concatenacao),
+    ]
+
+
+def medir(funcao, repeticoes=3):
+    """Menor tempo de parede (s) em `repeticoes` execuções e pico de memória (MB) de uma execução"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        _silencioso(funcao)
+        tempos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    try:
+        _silencioso(funcao)
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(tempos), pico / 2 ** 20
+
+
+def executar_benchmark(tamanhos=TAMANHOS, repeticoes=3, semente=0):
+    """Mede todas as etapas para cada tamanho; retorna {tamanho: {etapa: {tempo_s, memoria_mb}}}"""
+    resultados = {}
+    for tamanho in tamanhos:
+        pasta = tempfile.mkdtemp(prefix=f"benchmark_{tamanho}_")
+        try:
+            inicio = time.perf_counter()
+            caminho_inp, caminho_rpt = gerar_rede_sintetica(tamanho, pasta, semente=semente)
+            print(f"\n📐 Rede sintética com {tamanho} sub-bacias gerada em {time.perf_counter() - inicio:.2f} s")
+
+            resultados[str(tamanho)] = {}
+            for nome, funcao in etapas_pipeline(caminho_inp, caminho_rpt, pasta):
+                tempo, memoria = medir(funcao, repeticoes)
+                resultados[str(tamanho)][nome] = {'tempo_s': round(tempo, 5), 'memoria_mb': round(memoria, 2)}
+                print(f"  {nome:<20} {tempo:10.4f} s {memoria:10.1f} MB")
+        finally:
+            limpar_cache_modelos()
+            limpar_cache_relatorios()
+            shutil.rmtree(pasta, ignore_errors=True)
+    return resultados
+
+
+def comparar_com_referencia(resultados, referencia, tolerancia=TOLERANCIA):
+    """
+    Lista (tamanho, etapa, tempo, tempo de referência, razão) das etapas acima da tolerância.
+    Etapas ausentes da referência são listadas como "sem referência".
+    """
+    regressoes = []
+    print(f"\n{'Tamanho':>8} {'Etapa':<20} {'Atual (s)':>10} {'Ref. (s)':>10} {'Razão':>7}")
+    for tamanho, etapas in resultados.items():
+        for etapa, medida in etapas.items():
+            base = referencia.get('resultados', {}).get(tamanho, {}).get(etapa)
+            if not base or base['tempo_s'] <= 0:
+                print(f"{tamanho:>8} {etapa:<20} {medida['tempo_s']:10.4f} {'sem referência':>18}")
+                continue
+            razao = medida['tempo_s'] / base['tempo_s']
+            marca = " ⚠️" if razao > tolerancia else ""
+            print(f"{tamanho:>8} {etapa:<20} {medida['tempo_s']:10.4f} {base['tempo_s']:10.4f} {razao:7.2f}{marca}")
+            if razao > tolerancia:
+                regressoes.append((tamanho, etapa, medida['tempo_s'], base['tempo_s'], razao))
+    return regressoes
+
+
+def gravar_referencia(resultados, caminho=ARQUIVO_REFERENCIA):
+    """Grava os resultados como referência, com a identificação da máquina"""
+    os.makedirs(os.path.dirname(caminho), exist_ok=True)
+    conteudo = {
+        'maquina': {'python': platform.python_version(), 'sistema': platform.platform(),
+                    'processador': platform.processor() or platform.machine(), 'nucleos': os.cpu_count()},
+        'resultados': resultados,
+    }
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(conteudo, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Referência gravada: {caminho}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark do extrator em redes SWMM sintéticas")
+    parser.add_argument("--tamanhos", nargs="+", type=int, default=TAMANHOS, help="números de sub-bacias")
+    parser.add_argument("--repeticoes", type=int, default=3, help="execuções por etapa (vale o menor tempo)")
+    parser.add_argument("--referencia", default=ARQUIVO_REFERENCIA, help="arquivo JSON de referência")
+    parser.add_argument("--gravar-referencia", action="store_true", help="grava os resultados como nova referência")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA,
+                        help="razão tempo/referência a partir da qual a etapa é apontada como regressão")
+    args = parser.parse_args()
+
+    resultados = executar_benchmark(args.tamanhos, args.repeticoes)
+
+    if args.gravar_referencia:
+        gravar_referencia(resultados, args.referencia)
+    elif os.path.exists(args.referencia):
+        with open(args.referencia, 'r', encoding='utf-8') as f:
+            regressoes = comparar_com_referencia(resultados, json.load(f), args.tolerancia)
+        print(f"\n{len(regressoes)} etapa(s) acima de {args.tolerancia}× a referência")
+        if regressoes:
+            raise SystemExit(1)
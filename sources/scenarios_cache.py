@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+
+## Manifesto de cache da extração de cenários
+#
+# Para cada cenário o manifesto guarda a impressão digital (sha256, tamanho e
+# mtime) do .inp, .rpt e .out usados na extração, a versão do esquema do
+# extrator e o Parquet gerado. Um cenário só é reprocessado quando alguma
+# dessas informações muda; caso contrário o Parquet em cache é reaproveitado.
+
+ARQUIVO_MANIFESTO = ".cache_extracao.json"
+EXTENSOES_ENTRADA = ('inp', 'rpt', 'out')
+
+# Tamanho dos blocos lidos no cálculo do hash
+_BLOCO_HASH = 1 << 20
+
+
+def calcular_sha256(caminho):
+    """Calcula o sha256 de um arquivo lendo-o em blocos"""
+    h = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(_BLOCO_HASH), b''):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def impressao_digital(caminho, anterior=None):
+    """
+    Retorna {'sha256', 'tamanho', 'mtime_ns'} do arquivo (None se não existir).
+    Se tamanho e mtime coincidirem com a impressão anterior, o hash não é recalculado.
+    """
+    if not os.path.exists(caminho):
+        return None
+    info = os.stat(caminho)
+    if anterior and anterior.get('tamanho') == info.st_size and anterior.get('mtime_ns') == info.st_mtime_ns:
+        return dict(anterior)
+    return {'sha256': calcular_sha256(caminho), 'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns}
+
+
+def arquivos_cenario(base_path, cenario):
+    """Caminhos de entrada (.inp, .rpt, .out) de um cenário"""
+    return {ext: os.path.join(base_path, f"{cenario}.{ext}") for ext in EXTENSOES_ENTRADA}
+
+
+class ManifestoCache:
+    """Manifesto persistente (JSON) com as impressões digitais de cada cenário extraído"""
+
+    def __init__(self, base_path, versao_esquema, nome_arquivo=ARQUIVO_MANIFESTO):
+        self.base_path = base_path
+        self.versao_esquema = versao_esquema
+        self.caminho = os.path.join(base_path, nome_arquivo)
+        self.dados = {'cenarios': {}, 'unificado': {}}
+
+        if os.path.exists(self.caminho):
+            try:
+                with open(self.caminho, 'r', encoding='utf-8') as f:
+                    self.dados = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Aviso: manifesto de cache ignorado ({str(e)})")
+        self.dados.setdefault('cenarios', {})
+        self.dados.setdefault('unificado', {})
+
+    def impressoes(self, cenario):
+        """Impressões digitais atuais das entradas do cenário"""
+        anteriores = self.dados['cenarios'].get(cenario, {}).get('arquivos', {})
+        return {
+            ext: impressao_digital(caminho, anteriores.get(ext))
+            for ext, caminho in arquivos_cenario(self.base_path, cenario).items()
+        }
+
+    def _iguais(self, atual, registrada):
+        """Compara impressões pelo conteúdo (sha256), ignorando apenas mudanças de mtime"""
+        if atual is None or registrada is None:
+            return atual is registrada
+        return atual['sha256'] == registrada.get('sha256') and atual['tamanho'] == registrada.get('tamanho')
+
+    def cenario_atualizado(self, cenario, impressoes=None):
+        """Indica se o cenário pode ser reaproveitado do cache"""
+        registro = self.dados['cenarios'].get(cenario)
+        if not registro or registro.get('versao_esquema') != self.versao_esquema:
+            return False
+        parquet = registro.get('parquet')
+        if not parquet or not os.path.exists(os.path.join(self.base_path, parquet)):
+            return False
+
+        impressoes = impressoes or self.impressoes(cenario)
+        registradas = registro.get('arquivos', {})
+        return all(self._iguais(impressoes.get(ext), registradas.get(ext)) for ext in EXTENSOES_ENTRADA)
+
+    def caminho_parquet(self, cenario):
+        """Caminho do Parquet em cache de um cenário"""
+        return os.path.join(self.base_path, self.dados['cenarios'][cenario]['parquet'])
+
+    def registrar(self, cenario, impressoes, parquet):
+        """Registra a extração bem-sucedida de um cenário"""
+        self.dados['cenarios'][cenario] = {
+            'arquivos': impressoes,
+            'versao_esquema': self.versao_esquema,
+            'parquet': os.path.relpath(parquet, self.base_path),
+        }
+
+    def unificado_atualizado(self, arquivo, cenarios):
+        """Indica se o dataset unificado já contém exatamente estes cenários, sem alterações"""
+        registro = self.dados['unificado']
+        return (
+            os.path.exists(os.path.join(self.base_path, arquivo))
+            and registro.get('arquivo') == arquivo
+            and registro.get('versao_esquema') == self.versao_esquema
+            and registro.get('cenarios') == list(cenarios)
+        )
+
+    def registrar_unificado(self, arquivo, cenarios):
+        """Registra os cenários que compõem o dataset unificado"""
+        self.dados['unificado'] = {
+            'arquivo': arquivo,
+            'versao_esquema': self.versao_esquema,
+            'cenarios': list(cenarios),
+        }
+
+    def salvar(self):
+        """Grava o manifesto de forma atômica"""
+        temporario = self.caminho + ".tmp"
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump(self.dados, f, indent=2, ensure_ascii=False)
+        os.replace(temporario, self.caminho)
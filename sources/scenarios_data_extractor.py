@@ -1,46 +1,28 @@
 import pandas as pd
+import numpy as np
 import os
-import re
-import networkx as nx
 from collections import OrderedDict
+from datetime import datetime
 import traceback
-import time
+
+from swmm_event_stats import COLUNAS_EVENTO, FATOR_VAZAO_M3S, UNIDADES_EVENTO
+from swmm_geometry import COLUNAS_GEOMETRIA, UNIDADES_GEOMETRIA, atributos_geometria
+from swmm_inp_model import ler_modelo_inp
+from swmm_instrumentation import contar_descarte, etapa
+from swmm_rainfall import resumir_pluviometros
+from swmm_report_index import (COLUNAS_CONTINUIDADE, COLUNAS_TRECHO, UNIDADES_CONTINUIDADE, UNIDADES_TRECHO,
+                               ler_relatorio)
+from swmm_topology import COLUNAS_REDE, atributos_rede, topologia_modelo
 
 base_path = r"C:\Users\wpcal\Dropbox\Arquivos Pacheco 02_05_2022\Programacao\Ambiente_VirtualCS\Marcella\cenarios"
 cenarios = [f"cenario_{i:02d}" for i in range(1, 12)]
 
-# Dicionário com os totais de precipitação por série temporal (mm)
-PRECIPITACOES = {
-    'TS1': 13.9,  # cenario_01 (5 min)
-    'TS2': 31.9,  # cenario_02 (20 min)
-    'TS3': 48.8,  # cenario_03,09 (50 min)
-    'TS4': 48.6,  # cenario_04 (60 min)
-    'TS5': 57.9,  # cenario_05,10 (90 min)
-    'TS6': 54.3,  # cenario_06,11 (90 min)
-    'TS7': 65.5  # cenario_07,08 (180 min)
-}
-
-# Mapeamento de cenários para séries temporais
-CENARIO_TS_MAP = {
-    'cenario_01': 'TS1',
-    'cenario_02': 'TS2',
-    'cenario_03': 'TS3',
-    'cenario_04': 'TS4',
-    'cenario_05': 'TS5',
-    'cenario_06': 'TS6',
-    'cenario_07': 'TS7',
-    'cenario_08': 'TS7',
-    'cenario_09': 'TS3',
-    'cenario_10': 'TS5',
-    'cenario_11': 'TS6'
-}
-
 # Dicionário de unidades (atualizado com NOME em maiúsculo)
 unidades = {
     'NOME': '-',
     'AREA': 'm²',
     'DECL': '%',
-    'DURC': 'min',
+    'DURC': 'min',     # duração simulada (START → END), não a duração da chuva
     'VCHU': 'mm',
     'IMPV': '%',
     'TIPO': '-',
@@ -62,64 +44,67 @@ unidades = {
     'VEVA': 'mm',
     'VRET': 'mm',
     'VSTO': 'mm',
-    'ERRO': '%',
+    'ERRO': '10^6 L',  # Total Runoff da sub-bacia (nome histórico; não é erro de continuidade)
+    'AMON': 'ha',
+    'AIMP': 'ha',
+    'NENT': '-',
+    'CEXU': 'm',
+    'DEXU': 'm',
+    **UNIDADES_TRECHO,
+    **UNIDADES_CONTINUIDADE,
+    **UNIDADES_EVENTO,
+    **UNIDADES_GEOMETRIA,
 }
 
 
-def parse_duration(conteudo):
-    """Extrai END_TIME do conteúdo do .inp e converte para minutos"""
-    if not isinstance(conteudo, str):
-        return 0
+# Variáveis vindas do resumo de escoamento por sub-bacia do .rpt
+COLUNAS_RESUMO = ['VSUP', 'VINF', 'VGER', 'PSUP', 'PINF', 'VINI', 'VEVA', 'VRET', 'VSTO', 'ERRO']
 
-    match = re.search(r'END_TIME\s+(\d{1,2}:\d{2}:\d{2})', conteudo, re.IGNORECASE)
-    if match:
-        time_str = match.group(1)
-        try:
-            h, m, s = map(int, time_str.split(':'))
-            return h * 60 + m + (1 if s >= 30 else 0)
-        except:
-            return 0
-    return 0
+# Versão do esquema dos registros extraídos (invalida o cache de extração quando muda)
+VERSAO_ESQUEMA = 8
 
 
-def ler_secao_arquivo_com_ordem(caminho, secao):
-    """Lê uma seção mantendo a ordem original dos IDs"""
-    dados = OrderedDict()
+def converter_hora_minutos(valor):
+    """Converte um horário hh:mm:ss em minutos (segundos arredondados)"""
     try:
-        with open(caminho, 'r', encoding='utf-8', errors='ignore') as f:
-            leitura = False
-            for linha in f:
-                linha = linha.strip()
-
-                # Início da seção
-                if f"[{secao.upper()}]" in linha.upper():
-                    leitura = True
-                    continue
-
-                # Fim da seção
-                if leitura and (linha.startswith("[") or not linha):
-                    break
-
-                # Linha de dados
-                if leitura and not linha.startswith(";"):
-                    partes = linha.split()
-                    if partes:
-                        id = partes[0]
-                        dados[id] = partes  # Armazena todos os campos
-    except Exception as e:
-        print(f"Erro ao ler {secao}: {str(e)}")
-    return dados
+        h, m, s = (list(map(int, valor.split(':'))) + [0, 0])[:3]
+        return h * 60 + m + (1 if s >= 30 else 0)
+    except (AttributeError, ValueError):
+        return 0
 
 
-def ler_duracao_chuva(caminho_inp):
-    """Lê o arquivo .inp e extrai a duração total"""
-    try:
-        with open(caminho_inp, 'r', encoding='utf-8') as f:
-            conteudo = f.read()
-            return parse_duration(conteudo)
-    except Exception as e:
-        print(f"Erro ao ler duração: {str(e)}")
+def ler_secao_arquivo_com_ordem(modelo, secao):
+    """Retorna uma seção do modelo já lido mantendo a ordem original dos IDs"""
+    return modelo.tabela(secao).como_dict()
+
+
+def ler_duracao_chuva(modelo):
+    """
+    Duração da simulação em minutos (START_DATE/START_TIME até END_DATE/END_TIME).
+    DURC guarda a duração simulada, não a da chuva: é a janela em que a lâmina VCHU é contada.
+    """
+    end_time = modelo.opcao('END_TIME')
+    if not end_time:
+        print("Erro ao ler duração: END_TIME ausente em [OPTIONS]")
         return 0
+    minutos = converter_hora_minutos(end_time) - converter_hora_minutos(modelo.opcao('START_TIME', '00:00:00'))
+    try:
+        inicio = datetime.strptime(modelo.opcao('START_DATE'), '%m/%d/%Y')
+        fim = datetime.strptime(modelo.opcao('END_DATE'), '%m/%d/%Y')
+        minutos += (fim - inicio).days * 24 * 60
+    except (TypeError, ValueError):
+        pass
+    return minutos
+
+
+def ler_laminas_chuva(modelo, durc):
+    """Lâmina (mm) de cada pluviômetro que cai nos durc minutos simulados, de [RAINGAGES] e [TIMESERIES]"""
+    laminas = OrderedDict()
+    for pluviometro, resumo in resumir_pluviometros(modelo, (0.0, durc)).items():
+        laminas[pluviometro] = round(resumo.lamina_mm, 2)
+        print(f"  Chuva {pluviometro} ({resumo.serie}): {resumo.lamina_mm:.2f} mm em {resumo.duracao_min:.0f} min, "
+              f"pico {resumo.intensidade_pico_mmh:.1f} mm/h")
+    return laminas
 
 def determinar_tipo_sub_bacia(nome):
     """Determina o tipo de sub-bacia com base no código"""
@@ -129,7 +114,7 @@ def determinar_tipo_sub_bacia(nome):
     return 'lote' if codigo in ['B', 'P', 'E', 'G', 'S', 'BL', 'TS'] else 'rua'
 
 
-def construir_mapeamento_b_p_g(caminho_inp):
+def construir_mapeamento_b_p_g(modelo):
     """Constrói o mapeamento completo entre B, P e G mantendo a ordem"""
     # Dicionários ordenados para armazenar relações
     b_para_p = OrderedDict()
@@ -138,41 +123,28 @@ def construir_mapeamento_b_p_g(caminho_inp):
     g_para_diam = OrderedDict()
 
     # 1. Ler seção [SUBCATCHMENTS] mantendo ordem
-    subcatchments = ler_secao_arquivo_com_ordem(caminho_inp, 'SUBCATCHMENTS')
-    for b_id, valores in subcatchments.items():
-        if len(valores) >= 3:
-            p_outlet = valores[2]
+    subcatchments = modelo.tabela('SUBCATCHMENTS')
+    for b_id, p_outlet in zip(subcatchments.ids, subcatchments.coluna('Outlet')):
+        if p_outlet is not None:
             b_para_p[b_id] = p_outlet
             # Criar mapeamento reverso (um P pode ter várias bacias)
             if p_outlet not in p_para_b:
                 p_para_b[p_outlet] = []
             p_para_b[p_outlet].append(b_id)
 
-    # 2. Ler seção [CONDUITS] mantendo ordem
-    conduits = ler_secao_arquivo_com_ordem(caminho_inp, 'CONDUITS')
-    grafo = nx.DiGraph()
-    for g_id, valores in conduits.items():
-        if len(valores) >= 3:
-            p_from = valores[1]
-            p_to = valores[2]
-            grafo.add_edge(p_from, p_to, conduit=g_id)
+    # 2. Topologia da rede ([CONDUITS]), reaproveitada entre cenários
+    topologia = topologia_modelo(modelo)
 
     # 3. Ler seção [XSECTIONS] mantendo ordem
-    xsections = ler_secao_arquivo_com_ordem(caminho_inp, 'XSECTIONS')
-    for g_id, valores in xsections.items():
-        if len(valores) >= 3:
-            diam = valores[2]
-            try:
-                g_para_diam[g_id] = float(diam)
-            except ValueError:
-                g_para_diam[g_id] = None
-
-    # 4. Construir mapeamento P->G
-    for p_node in grafo.nodes:
-        successors = list(grafo.successors(p_node))
-        if successors:
-            next_node = successors[0]
-            p_para_g[p_node] = grafo.edges[(p_node, next_node)]['conduit']
+    xsections = modelo.tabela('XSECTIONS')
+    for g_id, diam in zip(xsections.ids, xsections.coluna('Geom1')):
+        g_para_diam[g_id] = None if np.isnan(diam) else float(diam)
+
+    # 4. Construir mapeamento P->G (primeiro trecho que sai de cada nó)
+    for p_node in topologia.ids:
+        g_id = topologia.trecho_jusante(p_node)
+        if g_id is not None:
+            p_para_g[p_node] = g_id
 
     # 5. Construir mapeamento final B->G
     b_para_g = OrderedDict()
@@ -183,73 +155,38 @@ def construir_mapeamento_b_p_g(caminho_inp):
 
     return b_para_g, g_para_diam, b_para_p, p_para_b
 
-def ler_altura_caixa_junctions(caminho_inp):
+def ler_altura_caixa_junctions(modelo):
     """Lê a altura da caixa de inspeção (3ª coluna) da seção JUNCTIONS"""
-    alturas = {}
-    try:
-        with open(caminho_inp, 'r', encoding='utf-8', errors='ignore') as f:
-            leitura = False
-            for linha in f:
-                linha = linha.strip()
-
-                if len(partes) >= 3:
-                    node_id = partes[0]
-                    altura = float(partes[2])  # certo!
-
-                if "[JUNCTIONS]" in linha.upper():
-                    leitura = True
-                    continue
-
-                if leitura:
-                    if linha.startswith("[") or not linha or linha.startswith(";"):
-                        break
-
-                    partes = linha.split()
-                    if len(partes) >= 3:
-                        node_id = partes[0]
-                        try:
-                            altura = float(partes[2])
-                            alturas[node_id] = altura
-                        except ValueError:
-                            pass
-    except Exception as e:
-        print(f"Erro ao ler altura da caixa: {str(e)}")
-    return alturas
+    junctions = modelo.tabela('JUNCTIONS')
+    return {
+        node_id: float(altura)
+        for node_id, altura in zip(junctions.ids, junctions.coluna('MaxDepth'))
+        if not np.isnan(altura)
+    }
 
-def ler_storage_volumes(caminho_rpt):
-    vsup_dict = OrderedDict()
-    vinf_dict = OrderedDict()
-    try:
-        with open(caminho_rpt, 'r', encoding='utf-8', errors='ignore') as f:
-            leitura = False
-            for linha in f:
-                linha = linha.strip()
-
-                if "Storage Volume Summary" in linha:
-                    leitura = True
-                    continue
-                if leitura and linha.startswith('['):
-                    break
-                if leitura and (not linha or '-' in linha or linha.startswith(';')):
-                    continue
-
-                partes = linha.split()
-                if len(partes) >= 6:
-                    node = partes[0]
-                    vsup = partes[3].replace('*', '')
-                    vinf = partes[4].replace('*', '')
-                    vsup_dict[node] = float(vsup)
-                    vinf_dict[node] = float(vinf)
-    except Exception as e:
-        print(f"Erro ao ler Storage Volume Summary: {str(e)}")
-    return vsup_dict, vinf_dict
+def ler_resumo_escoamento_df(caminho_rpt):
+    """
+    Lê a seção [Subcatchment Runoff Summary] do .rpt como DataFrame indexado pela
+    sub-bacia, com VSUP, VINF, VGER, PSUP, PINF, VINI, VEVA, VRET, VSTO e ERRO.
+    """
+    tabela = ler_relatorio(caminho_rpt).tabela("Subcatchment Runoff Summary")
+    if tabela is None:
+        return pd.DataFrame(columns=COLUNAS_RESUMO, dtype=float)
+
+    resumo = pd.DataFrame(
+        {var: tabela.coluna_float(j) for j, var in enumerate(
+            ['VINI', 'VEVA', 'VRET', 'VINF', 'VSUP', 'VSTO', 'VGER', 'ERRO'], start=1)},
+        index=tabela.ids
+    )
+    completas = resumo.notna().all(axis=1)
+    contar_descarte("Subcatchment Runoff Summary: linha não numérica", int((~completas).sum()))
+    resumo = resumo[completas]
+
+    vger = resumo['VGER'].where(resumo['VGER'] > 0)
+    resumo['PSUP'] = (resumo['VSUP'] / vger * 100).fillna(0.0)
+    resumo['PINF'] = (resumo['VINF'] / vger * 100).fillna(0.0)
+    return resumo[COLUNAS_RESUMO]
 
-def calcular_variaveis_volume_simples(vsup_dict, vinf_dict):
-    dados = []
-    for node in vsup_dict:
-        vsup = vsup_dict.get(node, 0.0)
-        vinf = vinf_dict.get(node, 0.0)
-        vger = vsup
 
 def ler_storage_volume_summary(caminho_rpt):
     """
@@ -258,118 +195,30 @@ def ler_storage_volume_summary(caminho_rpt):
     """
     dados = OrderedDict()
     try:
-        with open(caminho_rpt, 'r', encoding='utf-8', errors='ignore') as f:
-            leitura = False
-            for linha in f:
-                linha = linha.strip()
-
-                if "Subcatchment Runoff Summary" in linha:
-                    leitura = True
-                    continue
-                if leitura and linha.startswith('['):
-                    break
-                if leitura and (not linha or '-' in linha or linha.startswith(";")):
-                    continue
-
-                partes = linha.split()
-                if len(partes) >= 9:
-                    try:
-                        id_ = partes[0]
-                        vini = float(partes[1])  # Volume inicial
-                        veva = float(partes[2])  # Evaporação
-                        vret = float(partes[3])  # Retenção
-                        vinf = float(partes[4])  # Infiltração
-                        vsup = float(partes[5])  # Escoamento
-                        vsto = float(partes[6])  # Volume final
-                        vger = float(partes[7])  # Total gerado
-                        erro = float(partes[8])  # % de erro
-                        psup = vsup / vger * 100 if vger > 0 else 0
-                        pinf = vinf / vger * 100 if vger > 0 else 0
-
-                        dados[id_] = {
-                            'VINI': vini,
-                            'VEVA': veva,
-                            'VRET': vret,
-                            'VINF': vinf,
-                            'VSUP': vsup,
-                            'VSTO': vsto,
-                            'VGER': vger,
-                            'ERRO': erro,
-                            'PSUP': psup,
-                            'PINF': pinf
-                        }
-                    except ValueError:
-                        continue
+        resumo = ler_resumo_escoamento_df(caminho_rpt)
+        dados.update(resumo.to_dict('index'))
     except Exception as e:
         print(f"Erro ao ler Subcatchment Runoff Summary: {str(e)}")
     return dados
 
 
 def ler_rpt_ordenado(caminho_rpt, secao, coluna):
-    """Lê seções de relatório mantendo a ordem e tratando espaçamentos e cabeçalhos irregulares"""
-    dados = OrderedDict()
+    """Lê seções de relatório mantendo a ordem, a partir do índice único do .rpt"""
     try:
-        with open(caminho_rpt, 'r', encoding='utf-8', errors='ignore') as f:
-            leitura = False
-            cabecalho_processado = False
-            for linha in f:
-                linha = linha.strip()
-
-                # Iniciar leitura ao encontrar a seção
-                if secao.upper() in linha.upper():
-                    leitura = True
-                    cabecalho_processado = False
-                    continue
-
-                # Parar ao encontrar próxima seção
-                if leitura and linha.startswith('['):
-                    break
-
-                if leitura and not cabecalho_processado:
-                    if "Node" in linha and "Type" in linha:
-                        cabecalho_processado = True
-                    continue
-
-                if leitura and cabecalho_processado:
-                    if not linha or '-' in linha or linha.startswith(';'):
-                        continue
-
-                    partes = linha.split()
-                    if len(partes) > coluna:
-                        id_ = partes[0]
-                        valor = partes[coluna].replace('*', '')
-                        dados[id_] = valor
+        tabela = ler_relatorio(caminho_rpt).tabela(secao)
+        if tabela is not None:
+            return tabela.como_dict(coluna)
     except Exception as e:
         print(f"Erro ao ler {secao}: {str(e)}")
-    return dados
+        contar_descarte(f"{secao}: erro de leitura")
+    return OrderedDict()
 
 def ler_valor_rpt(caminho_rpt, secao, coluna_desejada, id_alvo):
+    """Consulta um único valor do relatório pelo ID (sem reler o arquivo)"""
     try:
-        with open(caminho_rpt, 'r', encoding='utf-8', errors='ignore') as f:
-            leitura = False
-            cabecalho_processado = False
-            for linha in f:
-                linha = linha.strip()
-
-                if secao.upper() in linha.upper():
-                    leitura = True
-                    cabecalho_processado = False
-                    continue
-
-                if leitura and linha.startswith('['):
-                    break
-
-                if leitura and not cabecalho_processado:
-                    if "Node" in linha and "Type" in linha:
-                        cabecalho_processado = True
-                    continue
-
-                if leitura and cabecalho_processado:
-                    if not linha or '-' in linha or linha.startswith(';'):
-                        continue
-                    partes = linha.split()
-                    if len(partes) > coluna_desejada and partes[0] == id_alvo:
-                        return partes[coluna_desejada].replace('*', '')
+        tabela = ler_relatorio(caminho_rpt).tabela(secao)
+        if tabela is not None:
+            return tabela.valor(id_alvo, coluna_desejada)
     except Exception as e:
         print(f"Erro ao ler {secao} para {id_alvo}: {str(e)}")
     return None
@@ -397,21 +246,21 @@ def criar_registro(id, valores, b_para_g, g_para_diam, junctions, infiltration,
             lesc = float(valores[5])  # 6ª coluna (Width - LESC)
             decl = float(valores[6])  # 7ª coluna (%Slope)
         except (ValueError, IndexError):
-            pass
+            contar_descarte("SUBCATCHMENTS: campo numérico inválido")
 
     # Altura da caixa (ALTC) vem da 3ª coluna da seção [JUNCTIONS]
     if id in junctions and len(junctions[id]) >= 3:
         try:
             altc = float(junctions[id][2])  # 3ª coluna: altura da caixa
         except (ValueError, IndexError):
-            pass
+            contar_descarte("JUNCTIONS: altura da caixa inválida")
 
     # KSAT vem da infiltração
     if id in infiltration and len(infiltration[id]) >= 2:
         try:
             ksat = float(infiltration[id][1])  # KSAT é o 2º parâmetro
         except (ValueError, IndexError):
-            pass
+            contar_descarte("INFILTRATION: KSAT inválido")
 
     return {
         'NOME': id,
@@ -439,119 +288,138 @@ def criar_registro(id, valores, b_para_g, g_para_diam, junctions, infiltration,
 
 
 def calcular_raza_clbo_para_df(df, b_para_p, node_depth, junctions):
-    """Preenche as colunas ALTC, RAZA e CLBO no DataFrame"""
-    for index, row in df.iterrows():
-        b_id = row['NOME']
-        p_node = b_para_p.get(b_id.upper())
-
-        if not p_node:
-            continue
-
-        try:
-            # 1. ALTC diretamente da seção JUNCTIONS
-            altc = None
-            if p_node in junctions:
-                partes = junctions[p_node]
-                if len(partes) >= 3:
-                    altc = float(partes[2])
-
-            # 2. PMAX já carregado do RPT
-            pmax_str = node_depth.get(p_node)
-            pmax = float(pmax_str) if pmax_str else None
-
-            # 3. Cálculo da razão
-            raza = clbo = None
-            if altc and altc > 0 and pmax is not None:
-                raza = pmax / altc
-                clbo = (
-                    "Normal" if raza < 0.7 else
-                    "Sobrecarga" if raza < 1.0 else
-                    "Transbordamento"
-                )
-
-            df.at[index, 'ALTC'] = altc
-            df.at[index, 'RAZA'] = raza
-            df.at[index, 'CLBO'] = clbo
-        except:
-            pass  # Silencia erro para não travar todo o loop
-
-    # Preencher VSUP, VINF, VGER, PSUP, PINF
-    for index, row in df.iterrows():
-        try:
-            vsup = row.get('VTOT')
-            vger = row.get('VCHU')
-            if vsup is not None and pd.notna(vsup):
-                vsup_m3 = float(vsup) * 1000  # VTOT está em 10⁶ L → m³
-                vger_m3 = float(vger) * float(row.get('AREA', 0)) / 1000  # mm·m² → L → m³
-                vinf = vger_m3 - vsup_m3
-
-                psup = vsup_m3 / vger_m3 if vger_m3 > 0 else None
-                pinf = vinf / vger_m3 if vger_m3 > 0 else None
-
-                df.at[index, 'VSUP'] = vsup_m3
-                df.at[index, 'VINF'] = vinf
-                df.at[index, 'VGER'] = vger_m3
-                df.at[index, 'PSUP'] = psup
-                df.at[index, 'PINF'] = pinf
-        except Exception:
-            continue
-    return df  # ← Fora do for e do try
-
-
-
-def processar_cenario(cenario):
-    try:
-        print(f"\nIniciando processamento: {cenario}")
-        caminho_inp = os.path.join(base_path, f"{cenario}.inp")
-        caminho_rpt = os.path.join(base_path, f"{cenario}.rpt")
-
-        # 1. Obter valores globais
-        ts_id = CENARIO_TS_MAP.get(cenario)
-        vchu = round(PRECIPITACOES.get(ts_id, 0.0), 2)
-        durc = ler_duracao_chuva(caminho_inp)
-        alturas_caixa = ler_altura_caixa_junctions(caminho_inp)
-
-        # 2. Construir mapeamento B->G->DIAM mantendo ordem
-        b_para_g, g_para_diam, b_para_p, p_para_b = construir_mapeamento_b_p_g(caminho_inp)
-        print(f"  Mapeamento construído: {len(b_para_p)} bacias para nós P")
-
-        # 3. Processar seções principais mantendo ordem
-        subcatchments = ler_secao_arquivo_com_ordem(caminho_inp, 'SUBCATCHMENTS')
-        junctions = ler_secao_arquivo_com_ordem(caminho_inp, 'JUNCTIONS')
-        infiltration = ler_secao_arquivo_com_ordem(caminho_inp, 'INFILTRATION')
-        print(f"  Seções lidas: {len(subcatchments)} subcatchments, {len(junctions)} junctions")
-
-        # 4. Processar relatórios (.rpt) se existirem
-        node_depth = OrderedDict()
-        node_inflow = OrderedDict()
-        node_volume = OrderedDict()
-
-        if os.path.exists(caminho_rpt):
-            print(f"  Processando relatório: {caminho_rpt}")
+    """Preenche ALTC, RAZA, CLBO e o balanço de volumes operando sobre colunas inteiras"""
+    # 1. Junções B → P, ALTC (3ª coluna de JUNCTIONS) e PMAX (Node Depth Summary)
+    p_node = df['NOME'].astype(str).str.upper().map(b_para_p)
+    com_outlet = p_node.notna()
+
+    altc_por_no = pd.Series({p: partes[2] for p, partes in junctions.items() if len(partes) >= 3}, dtype=object)
+    altc = pd.to_numeric(p_node.map(altc_por_no), errors='coerce')
+    pmax = pd.to_numeric(p_node.map(node_depth), errors='coerce')
+
+    # 2. Cálculo da razão e classificação por limiares (0.7 / 1.0)
+    raza = (pmax / altc).where(com_outlet & (altc > 0) & pmax.notna())
+    contar_descarte("RAZA: nó sem ALTC > 0 ou sem PMAX", int((com_outlet & raza.isna()).sum()))
+    clbo = np.select(
+        [raza < 0.7, raza < 1.0, raza >= 1.0],
+        np.array(["Normal", "Sobrecarga", "Transbordamento"], dtype=object),
+        default=None
+    )
+
+    df.loc[com_outlet, 'ALTC'] = altc[com_outlet]
+    df.loc[com_outlet, 'RAZA'] = raza[com_outlet]
+    df.loc[com_outlet, 'CLBO'] = clbo[com_outlet.to_numpy()]
+
+    # 3. VSUP, VINF, VGER, PSUP, PINF a partir de VTOT (10⁶ L → m³) e VCHU·AREA (mm·m² → m³)
+    vtot = pd.to_numeric(df['VTOT'], errors='coerce')
+    vchu = pd.to_numeric(df['VCHU'], errors='coerce')
+    area = pd.to_numeric(df['AREA'], errors='coerce')
+    com_volume = vtot.notna()
+    contar_descarte("Volumes: nó de saída sem VTOT", int((com_outlet & ~com_volume).sum()))
+
+    vsup_m3 = vtot * 1000
+    vger_m3 = vchu * area / 1000
+    vinf = vger_m3 - vsup_m3
+    positivo = vger_m3 > 0
+    volumes = pd.DataFrame({
+        'VSUP': vsup_m3,
+        'VINF': vinf,
+        'VGER': vger_m3,
+        'PSUP': (vsup_m3 / vger_m3.where(positivo)),
+        'PINF': (vinf / vger_m3.where(positivo)),
+    })
+    df.loc[com_volume, volumes.columns] = volumes.loc[com_volume]
+    return df
+
+
+def inserir_resumo_escoamento(df, resumo):
+    """Sobrescreve as variáveis de volume das linhas presentes no resumo por sub-bacia"""
+    no_resumo = df['NOME'].isin(resumo.index)
+    if no_resumo.any():
+        df.loc[no_resumo, COLUNAS_RESUMO] = resumo.loc[df.loc[no_resumo, 'NOME'], COLUNAS_RESUMO].to_numpy()
+    return df
+
+
+def extrair_cenario(cenario, caminho_inp, caminho_rpt, eventos=None, estatisticas=None):
+    """
+    Monta o DataFrame de registros de um cenário a partir do .inp e do .rpt, sem gravar arquivos.
+    eventos: tabela por nó de EstatisticasEvento (TPIC, TSOB, ...) acumulada durante a simulação
+    estatisticas: EstatisticasSimulacao lidas do motor; substituem o .rpt (caminho_rpt pode ser None)
+    """
+    # 1. Ler o modelo uma única vez e obter valores globais
+    with etapa('leitura_inp') as medida:
+        modelo = ler_modelo_inp(caminho_inp)
+        durc = ler_duracao_chuva(modelo)
+        laminas = ler_laminas_chuva(modelo, durc)
+        alturas_caixa = ler_altura_caixa_junctions(modelo)
+        medida.linhas = sum(len(linhas) for linhas in modelo.secoes.values())
+
+    # 2. Construir mapeamento B->G->DIAM mantendo ordem
+    with etapa('mapeamento_b_p_g') as medida:
+        b_para_g, g_para_diam, b_para_p, p_para_b = construir_mapeamento_b_p_g(modelo)
+        medida.linhas = len(b_para_p)
+        contar_descarte("SUBCATCHMENTS: bacia sem trecho a jusante", len(b_para_p) - len(b_para_g))
+    print(f"  Mapeamento construído: {len(b_para_p)} bacias para nós P")
+
+    # 3. Processar seções principais mantendo ordem
+    with etapa('secoes_inp') as medida:
+        subcatchments = ler_secao_arquivo_com_ordem(modelo, 'SUBCATCHMENTS')
+        junctions = ler_secao_arquivo_com_ordem(modelo, 'JUNCTIONS')
+        infiltration = ler_secao_arquivo_com_ordem(modelo, 'INFILTRATION')
+        medida.linhas = len(subcatchments) + len(junctions) + len(infiltration)
+    print(f"  Seções lidas: {len(subcatchments)} subcatchments, {len(junctions)} junctions")
+
+    # Lâmina das junções: a do pluviômetro da primeira sub-bacia
+    pluviometros = [valores[1] for valores in subcatchments.values() if len(valores) > 1]
+    vchu = laminas.get(pluviometros[0]) if pluviometros else next(iter(laminas.values()), 0.0)
+
+    # 4. Processar relatórios (.rpt) se existirem
+    node_depth = OrderedDict()
+    node_inflow = OrderedDict()
+    node_volume = OrderedDict()
+    trechos = pd.DataFrame(columns=COLUNAS_TRECHO, dtype=float)
+    continuidade = dict.fromkeys(COLUNAS_CONTINUIDADE, np.nan)
+
+    if estatisticas is not None:
+        with etapa('estatisticas_motor') as medida:
+            node_depth = estatisticas.profundidade_maxima
+            node_inflow = estatisticas.vazao_maxima
+            node_volume = estatisticas.volume_afluente
+            trechos = estatisticas.resumo_trechos
+            continuidade = {'ECES': estatisticas.erro_escoamento, 'ECRO': estatisticas.erro_roteamento}
+            medida.linhas = len(node_depth) + len(trechos)
+        print(f"  Estatísticas do motor: {len(node_depth)} nós, {len(trechos)} condutos")
+    elif caminho_rpt and os.path.exists(caminho_rpt):
+        print(f"  Processando relatório: {caminho_rpt}")
+        with etapa('leitura_rpt') as medida:
             # CORREÇÃO: Colunas ajustadas conforme especificado
             node_depth = ler_rpt_ordenado(caminho_rpt, 'Node Depth Summary', 3)  # 4ª coluna: Maximum Depth (PMAX)
             node_inflow = ler_rpt_ordenado(caminho_rpt, 'Node Inflow Summary', 3)  # 4ª coluna: Maximum Total Inflow (VAZT)
             node_volume = ler_rpt_ordenado(caminho_rpt, 'Node Inflow Summary', 6)  # 7ª coluna: Total Inflow Volume (VTOT)
-            print(f"  Dados extraídos: {len(node_depth)} nós de profundidade, {len(node_inflow)} nós de vazão")
-        else:
-            print(f"  Aviso: Arquivo .rpt não encontrado para {cenario}")
-
-        # 5. Construir registros na ordem do .inp
+            # Condutos: Link Flow, Conduit Surcharge e Flow Classification do mesmo índice do .rpt
+            fator_vazao = FATOR_VAZAO_M3S.get(modelo.opcao('FLOW_UNITS', 'CMS').upper(), np.nan)
+            relatorio = ler_relatorio(caminho_rpt)
+            trechos = relatorio.resumo_trechos(fator_vazao)
+            continuidade = relatorio.erros_continuidade()
+            medida.linhas = len(node_depth) + len(node_inflow) + len(trechos)
+        print(f"  Dados extraídos: {len(node_depth)} nós de profundidade, {len(node_inflow)} nós de vazão")
+    else:
+        print(f"  Aviso: Arquivo .rpt não encontrado para {cenario}")
+
+    # 5. Construir registros na ordem do .inp
+    with etapa('registros') as medida:
         registros = []
 
         # Processar bacias (SUBCATCHMENTS)
         for b_id, valores in subcatchments.items():
-            registro = criar_registro(b_id, valores, b_para_g, g_para_diam, junctions, infiltration, durc, vchu)
+            vchu_bacia = laminas.get(valores[1], vchu) if len(valores) > 1 else vchu
+            registro = criar_registro(b_id, valores, b_para_g, g_para_diam, junctions, infiltration, durc, vchu_bacia)
 
             p_node = b_para_p.get(b_id)
             if p_node:
-                pmax = ler_valor_rpt(caminho_rpt, "Node Depth Summary", 3, p_node)
-                vzt = ler_valor_rpt(caminho_rpt, "Node Inflow Summary", 3, p_node)
-                vtot = ler_valor_rpt(caminho_rpt, "Node Inflow Summary", 6, p_node)
-
-                registro['PMAX'] = pmax
-                registro['VAZT'] = vzt
-                registro['VTOT'] = vtot
+                registro['PMAX'] = node_depth.get(p_node)
+                registro['VAZT'] = node_inflow.get(p_node)
+                registro['VTOT'] = node_volume.get(p_node)
 
             registros.append(registro)
 
@@ -570,46 +438,87 @@ def processar_cenario(cenario):
 
         # 6. Criar DataFrame
         df = pd.DataFrame(registros)
-        print(f"  DataFrame criado com {len(df)} registros")
-        calcular_raza_clbo_para_df(df, b_para_p, node_depth, junctions)
-
-        # 7. Inserir variáveis de volume de armazenamento (VSUP, VINF, VGER, PSUP, PINF)
-        storage_data = ler_storage_volume_summary(caminho_rpt)
-        for index, row in df.iterrows():
-            node_id = row['NOME']
-            if node_id in storage_data:
-                for var in ['VSUP', 'VINF', 'VGER', 'PSUP', 'PINF']:
-                    df.at[index, var] = storage_data[node_id][var]
-
-        # Cálculo de RAZA e CLBO
-        calcular_raza_clbo_para_df(df, b_para_p, node_depth, junctions)
-
-        # Leitura do resumo hidrológico por sub-bacia
-        summary_data = ler_storage_volume_summary(caminho_rpt)
-
-        # Inserção das variáveis adicionais no DataFrame
-        for index, row in df.iterrows():
-            nome = row['NOME']
-            if nome in summary_data:
-                valores = summary_data[nome]
-                for var in ['VSUP', 'VINF', 'VGER', 'PSUP', 'PINF', 'VINI', 'VEVA', 'VRET', 'VSTO', 'ERRO']:
-                    df.at[index, var] = valores.get(var, None)
-
-        # 8. Garantir todas as colunas necessárias
-        colunas_necessarias = [
-            'NOME', 'AREA', 'DECL', 'DURC', 'VCHU', 'IMPV', 'TIPO',
-            'DIAM', 'LESC', 'PMAX', 'VAZT', 'VTOT', 'RAZA', 'KSAT',
-            'ALTC', 'CLBO', 'VSUP', 'VINF', 'VGER', 'PSUP', 'PINF',
-            'VINI', 'VEVA', 'VRET', 'VSTO', 'ERRO'
-        ]
-
-        # Adicionar colunas faltantes
-        for col in colunas_necessarias:
+        for col in COLUNAS_RESUMO:
             if col not in df.columns:
                 df[col] = None
+        medida.linhas = len(df)
+    print(f"  DataFrame criado com {len(df)} registros")
 
-        # Ordenar colunas
-        df = df[colunas_necessarias]
+    # 7. Cálculo de RAZA, CLBO e balanço de volumes (colunas inteiras)
+    with etapa('raza_clbo') as medida:
+        calcular_raza_clbo_para_df(df, b_para_p, node_depth, junctions)
+        medida.linhas = int(df['RAZA'].notna().sum())
+
+    # Inserção do resumo hidrológico por sub-bacia (prevalece sobre o balanço calculado)
+    with etapa('resumo_escoamento') as medida:
+        try:
+            resumo = estatisticas.resumo_escoamento if estatisticas is not None else ler_resumo_escoamento_df(caminho_rpt)
+        except Exception as e:
+            print(f"Erro ao ler Subcatchment Runoff Summary: {str(e)}")
+            contar_descarte("Subcatchment Runoff Summary: erro de leitura")
+            resumo = pd.DataFrame(columns=COLUNAS_RESUMO, dtype=float)
+        inserir_resumo_escoamento(df, resumo)
+        medida.linhas = len(resumo)
+
+    # Atributos de rede do nó de saída (sub-bacias) ou do próprio nó (junções)
+    with etapa('atributos_rede') as medida:
+        rede = atributos_rede(modelo)
+        nos = df['NOME'].map(b_para_p).fillna(df['NOME'])
+        for col in COLUNAS_REDE:
+            df[col] = nos.map(rede[col])
+        medida.linhas = len(rede)
+
+    # Resumo hidráulico do trecho a jusante do mesmo nó (o mesmo trecho que dá o DIAM)
+    with etapa('resumo_trechos') as medida:
+        trecho = nos.map(topologia_modelo(modelo).trecho_jusante)
+        for col in COLUNAS_TRECHO:
+            df[col] = trecho.map(trechos[col])
+        medida.linhas = int(trecho.isin(trechos.index).sum())
+        contar_descarte("Resumo de trechos: trecho a jusante ausente no .rpt",
+                        int((trecho.notna() & ~trecho.isin(trechos.index)).sum()))
+
+    # Centroide, perímetro e área do polígono da sub-bacia ou coordenada da própria junção
+    with etapa('atributos_geometria') as medida:
+        geometria = atributos_geometria(modelo)
+        for col in COLUNAS_GEOMETRIA:
+            df[col] = df['NOME'].map(geometria[col])
+        medida.linhas = len(geometria)
+        contar_descarte("Polygons/COORDINATES: registro sem geometria",
+                        int((~df['NOME'].isin(geometria.index)).sum()))
+
+    # Erros de continuidade do cenário, repetidos em todos os registros
+    for col in COLUNAS_CONTINUIDADE:
+        df[col] = continuidade[col]
+
+    # Estatísticas de evento do mesmo nó (vazias quando o cenário não foi simulado com acumuladores)
+    for col in COLUNAS_EVENTO:
+        df[col] = nos.map(eventos[col]) if eventos is not None else None
+
+    # 8. Garantir todas as colunas necessárias
+    colunas_necessarias = [
+        'NOME', 'AREA', 'DECL', 'DURC', 'VCHU', 'IMPV', 'TIPO',
+        'DIAM', 'LESC', 'PMAX', 'VAZT', 'VTOT', 'RAZA', 'KSAT',
+        'ALTC', 'CLBO', 'VSUP', 'VINF', 'VGER', 'PSUP', 'PINF',
+        'VINI', 'VEVA', 'VRET', 'VSTO', 'ERRO'
+    ] + COLUNAS_REDE + COLUNAS_TRECHO + COLUNAS_EVENTO + COLUNAS_GEOMETRIA + COLUNAS_CONTINUIDADE
+
+    # Adicionar colunas faltantes
+    for col in colunas_necessarias:
+        if col not in df.columns:
+            df[col] = None
+
+    # Ordenar colunas
+    df = df[colunas_necessarias]
+    return df
+
+
+def processar_cenario(cenario, levantar_erros=False):
+    """Extrai e salva um cenário; com levantar_erros=True a exceção é propagada"""
+    try:
+        print(f"\nIniciando processamento: {cenario}")
+        caminho_inp = os.path.join(base_path, f"{cenario}.inp")
+        caminho_rpt = os.path.join(base_path, f"{cenario}.rpt")
+        df = extrair_cenario(cenario, caminho_inp, caminho_rpt)
 
         # 9. Salvar resultados
         csv_path = os.path.join(base_path, f"{cenario}.csv")
@@ -618,61 +527,24 @@ def processar_cenario(cenario):
         # Garantir que o diretório existe
         os.makedirs(os.path.dirname(csv_path), exist_ok=True)
 
-        df.to_csv(csv_path, index=False, encoding='utf-8')
-        df.to_parquet(parquet_path, index=False)
-
-        # 10. Gerar relatório de conferência
-        relatorio = f"Relatório de Conferência - {cenario}\n"
-        relatorio += "-" * 70 + "\n"
-        relatorio += "| Código Variável | 1º valor          | Quantidade de valores | Unidade   | Nº colunas vazias |\n"
-        relatorio += "-" * 70 + "\n"
-
-        for coluna in df.columns:
-            
-            valor_bruto = df[coluna].iloc[0]
-            if pd.isna(valor_bruto):
-                primeiro_valor = "VAZIO"
-            elif isinstance(valor_bruto, float):
-                primeiro_valor = f"{valor_bruto:.4f}"
-            else:
-                primeiro_valor = str(valor_bruto)
-
-            qtd_valores = df[coluna].count()
-            qtd_vazias = len(df) - qtd_valores
-            unidade = unidades.get(coluna, 'desconhecida')
-
-            linha = f"| {coluna:<15} | {primeiro_valor:<18} | {qtd_valores:<21} | {unidade:<8} | {qtd_vazias:<17} |\n"
-            relatorio += linha
-
-        relatorio_path = os.path.join(base_path, f"{cenario}_relatorio_conferencia.txt")
-        with open(relatorio_path, 'w', encoding='utf-8') as f:
-            f.write(relatorio)
-        print(f"📄 Relatório gerado: {relatorio_path}")
+        with etapa('escrita_csv_parquet') as medida:
+            df.to_csv(csv_path, index=False, encoding='utf-8')
+            df.to_parquet(parquet_path, index=False)
+            medida.linhas = len(df)
 
         print(f"✅ {cenario} processado com sucesso!")
         return df
 
     except Exception as e:
         print(f"❌ Erro em {cenario}: {str(e)}")
+        if levantar_erros:
+            raise
         traceback.print_exc()
         return None
 
 
-# Execução principal
+# Execução principal (cenários processados em paralelo pelo executor em lote)
 if __name__ == "__main__":
-    for cenario in cenarios:
-        try:
-            print(f"\n{'=' * 50}")
-            print(f"Processando cenário: {cenario}")
-            print(f"{'=' * 50}")
-
-            # Processar cenário
-            df = processar_cenario(cenario)
+    from scenarios_batch_runner import executar_lote
 
-            if df is not None:
-                # Pequena pausa para garantir que o arquivo foi fechado
-                time.sleep(1)
-
-        except Exception as e:
-            print(f"Falha crítica no cenário {cenario}: {str(e)}")
-            continue
\ No newline at end of file
+    executar_lote(cenarios, base_path=base_path)
@@ -0,0 +1,170 @@
+import os
+import shutil
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from swmm_event_stats import COLUNAS_EVENTO
+from swmm_geometry import COLUNAS_GEOMETRIA
+from swmm_report_index import COLUNAS_CONTINUIDADE, COLUNAS_TRECHO
+from swmm_topology import COLUNAS_REDE
+
+## Dataset unificado dos cenários em Parquet particionado
+#
+# Cada cenário é gravado em uma partição própria (CENARIO=01/, CENARIO=02/, ...)
+# com esquema explícito: variáveis numéricas em float64, NOME em texto e as
+# categorias TIPO e CLBO codificadas em dicionário. Acrescentar ou refazer um
+# cenário grava apenas a sua partição; a leitura usa seleção de colunas e
+# filtros aplicados na própria leitura dos arquivos.
+
+PASTA_DATASET = "cenarios_dataset"
+COLUNA_PARTICAO = "CENARIO"
+
+COLUNAS_TEXTO = ['NOME']
+COLUNAS_CATEGORICAS = ['TIPO', 'CLBO']
+COLUNAS_NUMERICAS = [
+    'AREA', 'DECL', 'DURC', 'VCHU', 'IMPV', 'DIAM', 'LESC', 'PMAX', 'VAZT', 'VTOT',
+    'RAZA', 'KSAT', 'ALTC', 'VSUP', 'VINF', 'VGER', 'PSUP', 'PINF',
+    'VINI', 'VEVA', 'VRET', 'VSTO', 'ERRO'
+] + COLUNAS_REDE + COLUNAS_TRECHO + COLUNAS_EVENTO + COLUNAS_GEOMETRIA + COLUNAS_CONTINUIDADE
+
+# Ordem das colunas do registro (a mesma de extrair_cenario); partições gravadas
+# antes de um grupo de colunas existir são lidas com essas colunas nulas
+COLUNAS_REGISTRO = [
+    'NOME', 'AREA', 'DECL', 'DURC', 'VCHU', 'IMPV', 'TIPO',
+    'DIAM', 'LESC', 'PMAX', 'VAZT', 'VTOT', 'RAZA', 'KSAT',
+    'ALTC', 'CLBO', 'VSUP', 'VINF', 'VGER', 'PSUP', 'PINF',
+    'VINI', 'VEVA', 'VRET', 'VSTO', 'ERRO'
+] + COLUNAS_REDE + COLUNAS_TRECHO + COLUNAS_EVENTO + COLUNAS_GEOMETRIA + COLUNAS_CONTINUIDADE
+
+
+def _tipo_coluna(coluna):
+    if coluna in COLUNAS_CATEGORICAS:
+        return pa.dictionary(pa.int8(), pa.string())
+    if coluna in COLUNAS_TEXTO:
+        return pa.string()
+    return pa.float64()
+
+
+# Esquema dos arquivos de cada partição (sem a coluna de partição)
+ESQUEMA_REGISTROS = pa.schema([pa.field(coluna, _tipo_coluna(coluna)) for coluna in COLUNAS_REGISTRO])
+
+# Particionamento estilo Hive com o código do cenário como texto ("01", "02", ...)
+PARTICIONAMENTO = ds.partitioning(pa.schema([pa.field(COLUNA_PARTICAO, pa.string())]), flavor="hive")
+
+
+def codigo_cenario(cenario):
+    """Código da partição de um cenário ("cenario_01" → "01")"""
+    return cenario.replace("cenario_", "")
+
+
+def tipar_registros(df):
+    """
+    Converte um DataFrame de cenário para os tipos do esquema:
+    valores não numéricos (ex.: 'VAZIO') viram NaN e as categorias viram category.
+    """
+    tipado = pd.DataFrame(index=df.index)
+    for coluna in COLUNAS_REGISTRO:
+        valores = df[coluna] if coluna in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if coluna in COLUNAS_NUMERICAS:
+            tipado[coluna] = pd.to_numeric(valores, errors='coerce').astype('float64')
+        elif coluna in COLUNAS_CATEGORICAS:
+            tipado[coluna] = valores.where(valores.notna(), None).astype('category')
+        else:
+            tipado[coluna] = valores.astype('string')
+    return tipado.reset_index(drop=True)
+
+
+def tabela_cenario(df):
+    """Tabela Arrow de um cenário no esquema do dataset"""
+    return pa.Table.from_pandas(tipar_registros(df), schema=ESQUEMA_REGISTROS, preserve_index=False)
+
+
+def caminho_particao(pasta_dataset, cenario):
+    """Pasta da partição de um cenário"""
+    return os.path.join(pasta_dataset, f"{COLUNA_PARTICAO}={codigo_cenario(cenario)}")
+
+
+def gravar_tabela_cenario(tabela, cenario, pasta_dataset):
+    """Grava (ou substitui) a partição de um cenário a partir da tabela Arrow já no esquema"""
+    pasta = caminho_particao(pasta_dataset, cenario)
+    os.makedirs(pasta, exist_ok=True)
+
+    arquivo = os.path.join(pasta, "part-0.parquet")
+    temporario = arquivo + ".tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, arquivo)
+    return arquivo
+
+
+def gravar_cenario(df, cenario, pasta_dataset):
+    """Grava (ou substitui) a partição de um cenário sem tocar nas demais"""
+    return gravar_tabela_cenario(tabela_cenario(df), cenario, pasta_dataset)
+
+
+def serializar_cenario(df):
+    """Bytes Parquet da partição de um cenário (para transmitir a partição pela rede)"""
+    destino = pa.BufferOutputStream()
+    pq.write_table(tabela_cenario(df), destino)
+    return destino.getvalue().to_pybytes()
+
+
+def gravar_cenario_serializado(dados, cenario, pasta_dataset):
+    """Grava a partição recebida como bytes Parquet, conferindo o esquema"""
+    tabela = pq.read_table(pa.BufferReader(dados))
+    if not tabela.schema.equals(ESQUEMA_REGISTROS):
+        raise ValueError(f"Partição de {cenario} fora do esquema do dataset")
+    return gravar_tabela_cenario(tabela, cenario, pasta_dataset)
+
+
+def remover_cenario(pasta_dataset, cenario):
+    """Apaga a partição de um cenário; retorna se ela existia"""
+    pasta = caminho_particao(pasta_dataset, cenario)
+    if not os.path.isdir(pasta):
+        return False
+    shutil.rmtree(pasta)
+    return True
+
+
+def cenarios_no_dataset(pasta_dataset):
+    """Códigos dos cenários com partição gravada"""
+    if not os.path.isdir(pasta_dataset):
+        return []
+    prefixo = f"{COLUNA_PARTICAO}="
+    return sorted(
+        nome[len(prefixo):] for nome in os.listdir(pasta_dataset)
+        if nome.startswith(prefixo) and os.path.exists(os.path.join(pasta_dataset, nome, "part-0.parquet"))
+    )
+
+
+def abrir_dataset(pasta_dataset):
+    """Dataset Arrow com o esquema explícito e a coluna de partição CENARIO"""
+    esquema = ESQUEMA_REGISTROS.append(pa.field(COLUNA_PARTICAO, pa.string()))
+    return ds.dataset(pasta_dataset, format="parquet", schema=esquema, partitioning=PARTICIONAMENTO)
+
+
+def ler_dataset(pasta_dataset, colunas=None, filtros=None, cenarios=None):
+    """
+    Lê o dataset como DataFrame.
+    colunas: lista de colunas (apenas elas são lidas dos arquivos)
+    filtros: expressão pyarrow.dataset ou lista de tuplas (coluna, operador, valor)
+    cenarios: códigos ou nomes dos cenários (seleciona partições sem abrir as demais)
+    """
+    filtro = None
+    if filtros is not None:
+        filtro = filtros if isinstance(filtros, ds.Expression) else pq.filters_to_expression(filtros)
+    if cenarios is not None:
+        selecao = ds.field(COLUNA_PARTICAO).isin([codigo_cenario(c) for c in cenarios])
+        filtro = selecao if filtro is None else filtro & selecao
+
+    tabela = abrir_dataset(pasta_dataset).to_table(columns=colunas, filter=filtro)
+    return tabela.to_pandas()
+
+
+def exportar_csv(pasta_dataset, arquivo_csv):
+    """Exporta o dataset completo para um único CSV (compatível com cenarios_unificados.csv)"""
+    dataset = ler_dataset(pasta_dataset)
+    dataset.to_csv(arquivo_csv, index=False)
+    return dataset
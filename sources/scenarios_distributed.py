@@ -0,0 +1,426 @@
+import argparse
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scenarios_sweep as varredura
+from scenarios_dataset import PASTA_DATASET, gravar_cenario_serializado, serializar_cenario
+from scenarios_input_audit import ARQUIVO_AUDITORIA, auditar_dataset, gravar_auditoria
+from swmm_hotstart import MAX_ARQUIVOS, PASTA_HOTSTART
+from swmm_instrumentation import ARQUIVO_LOG, LogExecucao
+
+## Varredura distribuída: coordenador HTTP e workers em várias máquinas
+#
+# O coordenador registra o delineamento, mantém a fila das variantes pendentes
+# e grava no dataset as partições recebidas. Cada worker baixa o .inp base uma
+# vez, pede tarefas, simula e extrai em um pool de processos locais (as mesmas
+# funções da varredura local) e devolve a partição em Parquet. Enquanto simula,
+# o worker envia batimentos com as variantes em andamento; uma variante sem
+# batimento por mais de tempo_limite segundos volta para a fila, até
+# max_tentativas vezes. O estado de cada variante fica no registro de tarefas
+# (tarefas.sqlite), como na varredura local.
+# Protocolo (JSON sobre HTTP, sem dependências externas):
+#
+#   GET  /configuracao        .inp base e opções de simulação da varredura
+#   POST /tarefa              {"worker"} → {"identificador", "parametros"}, {"aguardar": s} ou {"fim": true}
+#   POST /batimento           {"worker", "identificadores"}
+#   PUT  /particao/<variante> corpo Parquet (cabeçalhos X-Worker e X-Medicoes)
+#   POST /falha               {"worker", "identificador", "erro", "medicoes"}
+#   GET  /estado              contagens da fila
+
+PORTA = 8765
+TEMPO_LIMITE_S = 60.0
+INTERVALO_BATIMENTO_S = 10.0
+MAX_TENTATIVAS = 3
+
+# Espera sugerida a um worker quando não há tarefa livre mas a varredura não terminou
+ESPERA_SEM_TAREFA_S = 2.0
+
+# Tentativas de contato com o coordenador antes de o worker desistir
+TENTATIVAS_CONEXAO = 5
+
+
+class Coordenador:
+    """Fila de variantes com controle de batimentos, novas tentativas e gravação das partições"""
+
+    def __init__(self, pendentes, pasta_saida, tempo_limite=TEMPO_LIMITE_S, max_tentativas=MAX_TENTATIVAS,
+                 log=None, registro=None):
+        self.parametros = dict(pendentes)
+        self.fila = deque(identificador for identificador, _ in pendentes)
+        self.pasta_saida = pasta_saida
+        self.pasta_dataset = os.path.join(pasta_saida, PASTA_DATASET)
+        self.tempo_limite = tempo_limite
+        self.max_tentativas = max_tentativas
+        self.log = log
+        self.registro = registro
+        self.em_execucao = {}   # identificador → (worker, último batimento)
+        self.tentativas = {identificador: 0 for identificador in self.parametros}
+        self.concluidas = set()
+        self.erros = {}
+        self.trava = threading.Lock()
+
+    def terminou(self):
+        return not self.fila and not self.em_execucao
+
+    def proxima_tarefa(self, worker):
+        with self.trava:
+            if not self.fila:
+                return {'fim': True} if self.terminou() else {'aguardar': ESPERA_SEM_TAREFA_S}
+            identificador = self.fila.popleft()
+            self.tentativas[identificador] += 1
+            self.em_execucao[identificador] = (worker, time.monotonic())
+            if self.registro:
+                self.registro.iniciar([identificador])
+            return {'identificador': identificador, 'parametros': self.parametros[identificador],
+                    'tentativa': self.tentativas[identificador]}
+
+    def batimento(self, worker, identificadores):
+        agora = time.monotonic()
+        with self.trava:
+            for identificador in identificadores:
+                if self.em_execucao.get(identificador, (None,))[0] == worker:
+                    self.em_execucao[identificador] = (worker, agora)
+
+    def _registrar_medicoes(self, medicoes):
+        if self.log and medicoes:
+            self.log.gravar(medicoes)
+
+    def concluir(self, worker, identificador, dados, medicoes=None):
+        """
+        Grava a partição recebida; uma entrega atrasada de uma tentativa expirada também é aceita.
+        A extração ocorre no worker: a chegada da partição marca a variante como extraída
+        """
+        if identificador not in self.parametros:
+            raise KeyError(identificador)
+        with self.trava:
+            if identificador in self.concluidas:
+                return False
+            if self.registro:
+                self.registro.extraido(identificador)
+        arquivo = gravar_cenario_serializado(dados, identificador, self.pasta_dataset)
+        with self.trava:
+            self.concluidas.add(identificador)
+            self.erros.pop(identificador, None)
+            self.em_execucao.pop(identificador, None)
+            if identificador in self.fila:
+                self.fila.remove(identificador)
+            self._registrar_medicoes(medicoes)
+            if self.registro:
+                self.registro.integrado(identificador, {'particao': os.path.relpath(arquivo, self.pasta_saida)})
+            n = len(self.concluidas)
+        print(f"✅ [{n}/{len(self.parametros)}] {identificador} ({worker})")
+        return True
+
+    def falhar(self, worker, identificador, erro, medicoes=None):
+        """Erro na simulação ou na extração: nova tentativa até max_tentativas"""
+        with self.trava:
+            if identificador in self.concluidas or self.em_execucao.get(identificador, (None,))[0] != worker:
+                return
+            del self.em_execucao[identificador]
+            self._registrar_medicoes(medicoes)
+            self._repetir_ou_desistir(identificador, erro)
+        print(f"❌ Falha na variante {identificador} ({worker}):\n{erro}")
+
+    def _repetir_ou_desistir(self, identificador, erro):
+        if self.registro:
+            self.registro.falhou(identificador, erro)
+        if self.tentativas[identificador] < self.max_tentativas:
+            self.fila.append(identificador)
+        else:
+            self.erros[identificador] = erro
+
+    def recuperar_expiradas(self):
+        """Devolve à fila as variantes cujos workers deixaram de enviar batimentos"""
+        limite = time.monotonic() - self.tempo_limite
+        with self.trava:
+            expiradas = [(identificador, worker) for identificador, (worker, ultimo) in self.em_execucao.items()
+                         if ultimo < limite]
+            for identificador, worker in expiradas:
+                del self.em_execucao[identificador]
+                self._repetir_ou_desistir(identificador, f"Worker {worker} sem batimento por {self.tempo_limite:.0f} s")
+        for identificador, worker in expiradas:
+            print(f"⚠️ {identificador}: worker {worker} sem batimento, variante devolvida à fila")
+        return expiradas
+
+    def estado(self):
+        with self.trava:
+            return {'total': len(self.parametros), 'na_fila': len(self.fila), 'em_execucao': len(self.em_execucao),
+                    'concluidas': len(self.concluidas), 'com_erro': len(self.erros),
+                    'workers': sorted({worker for worker, _ in self.em_execucao.values()})}
+
+
+class _Requisicoes(BaseHTTPRequestHandler):
+    """Rotas do coordenador (o servidor tem os atributos coordenador e configuracao)"""
+
+    def log_message(self, formato, *args):
+        pass
+
+    def _responder(self, codigo, conteudo=None):
+        corpo = json.dumps(conteudo if conteudo is not None else {}).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def _corpo(self):
+        return self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+    def do_GET(self):
+        if self.path == '/configuracao':
+            self._responder(200, self.server.configuracao)
+        elif self.path == '/estado':
+            self._responder(200, self.server.coordenador.estado())
+        else:
+            self._responder(404)
+
+    def do_POST(self):
+        coordenador = self.server.coordenador
+        try:
+            dados = json.loads(self._corpo() or b'{}')
+            if self.path == '/tarefa':
+                self._responder(200, coordenador.proxima_tarefa(dados['worker']))
+            elif self.path == '/batimento':
+                coordenador.batimento(dados['worker'], dados.get('identificadores', []))
+                self._responder(200)
+            elif self.path == '/falha':
+                coordenador.falhar(dados['worker'], dados['identificador'], dados.get('erro', ''),
+                                   dados.get('medicoes'))
+                self._responder(200)
+            else:
+                self._responder(404)
+        except (KeyError, ValueError) as e:
+            self._responder(400, {'erro': str(e)})
+
+    def do_PUT(self):
+        prefixo = '/particao/'
+        if not self.path.startswith(prefixo):
+            self._responder(404)
+            return
+        identificador = self.path[len(prefixo):]
+        try:
+            medicoes = json.loads(self.headers.get('X-Medicoes') or '[]')
+            gravada = self.server.coordenador.concluir(self.headers.get('X-Worker', '?'), identificador,
+                                                       self._corpo(), medicoes)
+            self._responder(200, {'gravada': gravada})
+        except KeyError:
+            self._responder(404, {'erro': f"Variante desconhecida: {identificador}"})
+        except Exception:
+            self._responder(400, {'erro': traceback.format_exc()})
+
+
+def executar_coordenador(caminho_base, delineamento, pasta_saida, host='0.0.0.0', porta=PORTA,
+                         prefixo=varredura.PREFIXO_VARIANTE, tempo_limite=TEMPO_LIMITE_S,
+                         max_tentativas=MAX_TENTATIVAS, arquivo_log=ARQUIVO_LOG, estatisticas_evento=True,
+                         em_memoria=False, max_hotstarts=MAX_ARQUIVOS):
+    """Atende os workers até todas as variantes terminarem; retorna os erros por variante"""
+    variantes, pendentes = varredura.preparar_varredura(delineamento, pasta_saida, prefixo)
+    pasta_dataset = os.path.join(pasta_saida, PASTA_DATASET)
+    with open(caminho_base, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+        texto_base = f.read()
+
+    log = LogExecucao(os.path.join(pasta_saida, arquivo_log), modo='distribuido',
+                      variantes=len(pendentes)) if arquivo_log else None
+    registro = varredura.abrir_registro(pasta_saida, variantes, pendentes)
+    coordenador = Coordenador(pendentes, pasta_saida, tempo_limite, max_tentativas, log, registro)
+
+    servidor = ThreadingHTTPServer((host, porta), _Requisicoes)
+    servidor.coordenador = coordenador
+    servidor.configuracao = {
+        'nome_base': os.path.basename(caminho_base), 'inp': texto_base,
+        'estatisticas_evento': estatisticas_evento, 'em_memoria': em_memoria,
+        'usa_hotstart': varredura.usa_hotstart(delineamento), 'max_hotstarts': max_hotstarts,
+        'intervalo_batimento': min(INTERVALO_BATIMENTO_S, tempo_limite / 3),
+    }
+    print(f"\n{'=' * 50}")
+    print(f"Coordenador em http://{socket.gethostname()}:{servidor.server_address[1]}: {len(pendentes)} variante(s) "
+          f"na fila ({len(variantes) - len(pendentes)} já no dataset)")
+    print(f"{'=' * 50}")
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+
+    interrompida = False
+    try:
+        while not coordenador.terminou():
+            time.sleep(min(1.0, tempo_limite / 4))
+            coordenador.recuperar_expiradas()
+        # Os workers ainda conectados recebem {"fim": true} no próximo pedido
+        time.sleep(ESPERA_SEM_TAREFA_S)
+    except KeyboardInterrupt:
+        # As variantes em andamento voltam a pendentes; as entregas atrasadas dos workers são recusadas
+        interrompida = True
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        registro.retomar()
+        registro.fechar()
+
+    if os.path.isdir(pasta_dataset) and not interrompida:
+        relatorio = auditar_dataset(pasta_dataset)
+        gravar_auditoria(relatorio, os.path.join(pasta_saida, ARQUIVO_AUDITORIA))
+
+    erros = coordenador.erros
+    print(f"\nResumo: {len(coordenador.concluidas)} variante(s) concluída(s), {len(erros)} com erro")
+    print(f"📦 Dataset: {pasta_dataset}")
+    if log:
+        log.fechar(simuladas=len(coordenador.concluidas), com_erro=len(erros), interrompida=interrompida)
+        print(f"🧾 Log de execução: {log.caminho}")
+    if interrompida:
+        print("⏸️ Coordenador interrompido: execute de novo para continuar com as variantes que faltam")
+        raise KeyboardInterrupt
+    return erros
+
+
+def _requisitar(url, caminho, dados=None, corpo=None, cabecalhos=None, metodo=None):
+    """Requisição ao coordenador com novas tentativas; retorna o JSON da resposta"""
+    if dados is not None:
+        corpo = json.dumps(dados).encode('utf-8')
+        cabecalhos = dict(cabecalhos or {}, **{'Content-Type': 'application/json'})
+    pedido = urllib.request.Request(url.rstrip('/') + caminho, data=corpo, headers=cabecalhos or {},
+                                    method=metodo or ('POST' if corpo is not None else 'GET'))
+    for tentativa in range(TENTATIVAS_CONEXAO):
+        try:
+            with urllib.request.urlopen(pedido, timeout=120) as resposta:
+                return json.loads(resposta.read() or b'{}')
+        except urllib.error.HTTPError:
+            raise
+        except (urllib.error.URLError, ConnectionError, TimeoutError):
+            if tentativa == TENTATIVAS_CONEXAO - 1:
+                raise
+            time.sleep(2 ** tentativa)
+
+
+def _executar_tarefa(identificador, parametros, pasta_temporaria, estatisticas_evento, em_memoria):
+    """Simula e extrai no processo do pool; devolve (partição em Parquet ou None, erro, medições)"""
+    _, df, erro, medicoes = varredura.simular_variante(identificador, parametros, pasta_temporaria,
+                                                       estatisticas_evento, em_memoria)
+    if erro is not None:
+        return None, erro, medicoes
+    return serializar_cenario(df), None, medicoes
+
+
+def executar_worker(url, n_processos=varredura.N_PROCESSOS, nome=None, pasta_temporaria=None):
+    """Pede tarefas ao coordenador e as executa em n_processos processos locais até a varredura terminar"""
+    nome = nome or f"{socket.gethostname()}-{os.getpid()}"
+    pasta = tempfile.mkdtemp(prefix="worker_", dir=pasta_temporaria)
+    configuracao = _requisitar(url, '/configuracao')
+    caminho_base = os.path.join(pasta, configuracao['nome_base'])
+    with open(caminho_base, 'w', encoding='utf-8', newline='') as f:
+        f.write(configuracao['inp'])
+    pasta_hotstart = os.path.join(pasta, PASTA_HOTSTART) if configuracao['usa_hotstart'] else None
+    opcoes = (pasta_temporaria, configuracao['estatisticas_evento'], configuracao['em_memoria'])
+    intervalo = configuracao['intervalo_batimento']
+    print(f"🔌 Worker {nome} conectado a {url} com {n_processos} processo(s)")
+
+    def novo_pool():
+        return ProcessPoolExecutor(max_workers=n_processos, initializer=varredura._iniciar_worker,
+                                   initargs=(caminho_base, pasta_hotstart, configuracao['max_hotstarts']))
+
+    pool = novo_pool()
+    em_execucao = {}  # futuro → identificador
+    fim = False
+    ultimo_batimento = time.monotonic()
+    try:
+        while em_execucao or not fim:
+            # 1. Completar os processos livres com novas tarefas
+            espera = None
+            while not fim and len(em_execucao) < n_processos:
+                tarefa = _requisitar(url, '/tarefa', {'worker': nome})
+                if tarefa.get('fim'):
+                    fim = True
+                elif 'identificador' in tarefa:
+                    futuro = pool.submit(_executar_tarefa, tarefa['identificador'], tarefa['parametros'], *opcoes)
+                    em_execucao[futuro] = tarefa['identificador']
+                else:
+                    espera = tarefa.get('aguardar', ESPERA_SEM_TAREFA_S)
+                    break
+            if not em_execucao:
+                if espera:
+                    time.sleep(espera)
+                continue
+
+            # 2. Aguardar a primeira variante pronta ou o próximo batimento
+            prontos, _ = wait(em_execucao, timeout=espera or intervalo, return_when=FIRST_COMPLETED)
+            pool_quebrado = False
+            for futuro in prontos:
+                identificador = em_execucao.pop(futuro)
+                try:
+                    dados, erro, medicoes = futuro.result()
+                except BrokenProcessPool:
+                    dados, erro, medicoes = None, traceback.format_exc(), []
+                    pool_quebrado = True
+                if erro is None:
+                    _requisitar(url, f"/particao/{identificador}", corpo=dados, metodo='PUT',
+                                cabecalhos={'X-Worker': nome, 'X-Medicoes': json.dumps(medicoes)})
+                    print(f"✅ {identificador}")
+                else:
+                    _requisitar(url, '/falha', {'worker': nome, 'identificador': identificador, 'erro': erro,
+                                                'medicoes': medicoes})
+                    print(f"❌ {identificador}")
+            if pool_quebrado:
+                # Um processo morreu (ex.: falha no motor): as demais variantes do pool também se perderam
+                for futuro, identificador in em_execucao.items():
+                    _requisitar(url, '/falha', {'worker': nome, 'identificador': identificador,
+                                                'erro': "Pool de processos do worker interrompido"})
+                em_execucao = {}
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = novo_pool()
+
+            # 3. Batimento das variantes em andamento
+            if em_execucao and time.monotonic() - ultimo_batimento >= intervalo:
+                _requisitar(url, '/batimento', {'worker': nome, 'identificadores': list(em_execucao.values())})
+                ultimo_batimento = time.monotonic()
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+        shutil.rmtree(pasta, ignore_errors=True)
+    print(f"🏁 Worker {nome}: varredura concluída")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura distribuída: coordenador HTTP e workers")
+    sub = parser.add_subparsers(dest="papel", required=True)
+
+    coordenador = sub.add_parser("coordenador", help="registra o delineamento e distribui as variantes")
+    coordenador.add_argument("base", help=".inp base")
+    coordenador.add_argument("saida", help="pasta de saída (delineamento e dataset particionado)")
+    varredura.argumentos_delineamento(coordenador)
+    coordenador.add_argument("--max-hotstarts", type=int, default=MAX_ARQUIVOS,
+                             help="nº máximo de hotstarts no cache de cada worker")
+    coordenador.add_argument("--host", default="0.0.0.0", help="endereço de escuta")
+    coordenador.add_argument("--porta", type=int, default=PORTA, help="porta HTTP")
+    coordenador.add_argument("--tempo-limite", type=float, default=TEMPO_LIMITE_S,
+                             help="segundos sem batimento até a variante voltar para a fila")
+    coordenador.add_argument("--max-tentativas", type=int, default=MAX_TENTATIVAS,
+                             help="tentativas por variante antes de registrá-la como erro")
+    coordenador.add_argument("--sem-eventos", action="store_true",
+                             help="simula com sim.execute(), sem as estatísticas de evento por nó")
+    coordenador.add_argument("--em-memoria", action="store_true",
+                             help="extrai as estatísticas direto do pyswmm, sem gravar o .rpt nem as séries do .out")
+
+    worker = sub.add_parser("worker", help="executa variantes pedidas ao coordenador")
+    worker.add_argument("url", help=f"endereço do coordenador (ex.: http://servidor:{PORTA})")
+    worker.add_argument("--processos", type=int, default=varredura.N_PROCESSOS, help="processos de simulação")
+    worker.add_argument("--nome", default=None, help="identificação do worker (padrão: máquina-pid)")
+    args = parser.parse_args()
+
+    try:
+        if args.papel == "coordenador":
+            executar_coordenador(args.base, varredura.delineamento_dos_argumentos(args), args.saida, args.host,
+                                 args.porta, tempo_limite=args.tempo_limite, max_tentativas=args.max_tentativas,
+                                 estatisticas_evento=not args.sem_eventos, em_memoria=args.em_memoria,
+                                 max_hotstarts=args.max_hotstarts)
+        else:
+            executar_worker(args.url, args.processos, args.nome)
+    except KeyboardInterrupt:
+        sys.exit(130)
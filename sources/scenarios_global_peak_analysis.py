@@ -1,11 +1,14 @@
 from pyswmm import Simulation, Nodes
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import matplotlib as mpl
 import pandas as pd
 import numpy as np
 import os
 
+from swmm_figures import PONTOS_POR_CURVA, PoolFiguras, decimar, figura_curvas_maximas, figura_nos_cenario
+from swmm_inp_model import ler_modelo_inp
+from swmm_out_reader import ArquivoSaida
+from swmm_report_index import ler_relatorio
+from swmm_series_capture import CapturaSeries, estimar_passos
+
 # Pasta com os arquivos
 base_dir = r"C:\Users\wpcal\Dropbox\Arquivos Pacheco 02_05_2022\Programacao\Ambiente_VirtualCS\Marcella\cenarios"
 
@@ -16,88 +19,95 @@ cenarios = [f"cenario_{i:02d}.inp" for i in range(1, 12)]
 estatisticas_gerais = []
 curvas_maximas = []
 
-# Define tamanho fixo da fonte
-mpl.rcParams.update({'font.size': 20})
-
-# Loop pelos cenários
-for inp_file in cenarios:
-    inp_path = os.path.join(base_dir, inp_file)
-    rpt_path = inp_path.replace(".inp", ".rpt")
-    out_path = inp_path.replace(".inp", ".out")
-
-    tempo = []
-    profundidades = {}
-
-    with Simulation(inp_path, rpt_path, out_path) as sim:
-        todos_nos = list(Nodes(sim))
-        for n in todos_nos:
-            profundidades[n.nodeid] = []
-
-        for step in sim:
-            tempo.append(sim.current_time)
-            for n in todos_nos:
-                profundidades[n.nodeid].append(n.depth)
-
-    picos = {n: max(vals) for n, vals in profundidades.items() if any(vals)}
-    ordenados = sorted(picos.items(), key=lambda x: x[1], reverse=True)
-
-    if len(ordenados) >= 5:
-        selecionados = [ordenados[0][0]] + [n for n, _ in ordenados[1:-1]][:3] + [ordenados[-1][0]]
-    else:
-        selecionados = [n for n, _ in ordenados]
-
-    # Estatísticas
-    valores_pico = list(picos.values())
-    nome_cenario = inp_file.replace(".inp", "")
-    estat = {
-        'Cenário': nome_cenario,
-        'Pico_Máximo_m': np.max(valores_pico),
-        'Pico_Mínimo_m': np.min(valores_pico),
-        'Pico_Médio_m': np.mean(valores_pico),
-        'Desvio_Padrão_m': np.std(valores_pico)
-    }
-    estatisticas_gerais.append(estat)
-
-    # Salva estatísticas individuais
-    df_estat = pd.DataFrame([estat])
-    csv_path = os.path.join(base_dir, f"{nome_cenario}_estatisticas_picos.csv")
-    df_estat.to_csv(csv_path, index=False, float_format="%.4f")
-
-    # Plot gráfico individual
-    # mpl.rcParams.update({'font.size': mpl.rcParams['font.size'] * 1.5})
-    cores = ['red', 'blue', 'green', 'orange', 'purple']
-    plt.figure(figsize=(12, 6))
-    plt.plot([], [], color='none', label=f"Scenario {nome_cenario[-2:]}")
-    for i, n in enumerate(selecionados):
-        plt.plot(tempo, profundidades[n], label=f"Node {n} (Peak: {picos[n]:.2f} m)", color=cores[i])
-    plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-    plt.xlabel("Time [hh:mm]")
-    plt.ylabel("Depth [m]")
-    plt.legend()
-    plt.grid(True)
-    plt.tight_layout()
-    pdf_path = os.path.join(base_dir, f"{nome_cenario}.pdf")
-    plt.savefig(pdf_path)
-    plt.close()
-
-    # Guarda curva máxima
-    curva_maxima = np.max(np.array([profundidades[n] for n in profundidades]), axis=0)
-    curvas_maximas.append((nome_cenario, tempo, curva_maxima))
-
-# Salva todas as estatísticas em um único CSV
-df_todos = pd.DataFrame(estatisticas_gerais)
-df_todos.to_csv(os.path.join(base_dir, "estatisticas_picos_todos_cenarios.csv"), index=False, float_format="%.4f")
-
-# Gráfico combinado das curvas máximas
-plt.figure(figsize=(12, 6))
-for nome_cenario, tempo, curva in curvas_maximas:
-    plt.plot(tempo, curva, label=f"Scenario {nome_cenario[-2:]}")
-plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-plt.xlabel("Time [hh:mm]")
-plt.ylabel("Maximum Depth [m]")
-plt.title("Maximum Depth Curves – All Scenarios")
-plt.legend(title="All Scenarios")
-plt.grid(True)
-plt.tight_layout()
-plt.savefig(os.path.join(base_dir, "curvas_maximas_todos_cenarios.pdf"))
-plt.close()
+# Grava as séries em arquivos mapeados em memória (False mantém a captura em RAM)
+USAR_MMAP = False
+
+# Reaproveita o .out/.rpt existentes em vez de reexecutar a simulação
+USAR_RESULTADOS_EXISTENTES = True
+
+# Figuras desenhadas em processos separados (backend Agg) a partir de séries reduzidas
+# ('lttb' preserva a forma; 'minmax' guarda os extremos de cada intervalo)
+METODO_DECIMACAO = 'lttb'
+
+# Proteção necessária para o pool de figuras (processos iniciados por spawn no Windows)
+if __name__ == "__main__":
+    figuras = PoolFiguras()
+
+    # Loop pelos cenários
+    for inp_file in cenarios:
+        inp_path = os.path.join(base_dir, inp_file)
+        rpt_path = inp_path.replace(".inp", ".rpt")
+        out_path = inp_path.replace(".inp", ".out")
+
+        captura = None
+        if USAR_RESULTADOS_EXISTENTES and os.path.exists(out_path) and os.path.exists(rpt_path):
+            # Séries no passo de relatório lidas do .out; picos exatos da Node Depth Summary do .rpt
+            with ArquivoSaida(out_path) as saida:
+                ids_nos = saida.ids_nos
+                tempo = saida.tempos()
+                profundidades = saida.serie_nos('depth')
+            node_depth = ler_relatorio(rpt_path).tabela('Node Depth Summary')
+            pico_por_no = dict(zip(node_depth.ids, node_depth.coluna_float(3)))
+        else:
+            passo_roteamento = float(ler_modelo_inp(inp_path).opcao('ROUTING_STEP', '0.6'))
+            arquivo_mmap = inp_path.replace(".inp", "_captura") if USAR_MMAP else None
+
+            with Simulation(inp_path, rpt_path, out_path) as sim:
+                todos_nos = list(Nodes(sim))
+                captura = CapturaSeries([n.nodeid for n in todos_nos],
+                                        passos_estimados=estimar_passos(sim, passo_roteamento),
+                                        arquivo_mmap=arquivo_mmap)
+
+                for step in sim:
+                    captura.registrar(sim.current_time, todos_nos)
+            captura.finalizar()
+            ids_nos = captura.ids
+            tempo = captura.tempos_registrados()
+            profundidades = captura.serie()
+            pico_por_no = captura.picos_por_no()
+
+        coluna_no = {n: j for j, n in enumerate(ids_nos)}
+        picos = {n: pico_por_no[n] for n in ids_nos if pico_por_no.get(n, 0) > 0}
+        ordenados = sorted(picos.items(), key=lambda x: x[1], reverse=True)
+
+        if len(ordenados) >= 5:
+            selecionados = [ordenados[0][0]] + [n for n, _ in ordenados[1:-1]][:3] + [ordenados[-1][0]]
+        else:
+            selecionados = [n for n, _ in ordenados]
+
+        # Estatísticas
+        valores_pico = list(picos.values())
+        nome_cenario = inp_file.replace(".inp", "")
+        estat = {
+            'Cenário': nome_cenario,
+            'Pico_Máximo_m': np.max(valores_pico),
+            'Pico_Mínimo_m': np.min(valores_pico),
+            'Pico_Médio_m': np.mean(valores_pico),
+            'Desvio_Padrão_m': np.std(valores_pico)
+        }
+        estatisticas_gerais.append(estat)
+
+        # Salva estatísticas individuais
+        df_estat = pd.DataFrame([estat])
+        csv_path = os.path.join(base_dir, f"{nome_cenario}_estatisticas_picos.csv")
+        df_estat.to_csv(csv_path, index=False, float_format="%.4f")
+
+        # Gráfico individual (agendado; a simulação seguinte não espera o desenho)
+        curvas_nos = [(n, picos[n]) + decimar(tempo, profundidades[:, coluna_no[n]],
+                                              PONTOS_POR_CURVA, METODO_DECIMACAO)
+                      for n in selecionados]
+        figuras.enviar(figura_nos_cenario, os.path.join(base_dir, f"{nome_cenario}.pdf"), nome_cenario, curvas_nos)
+
+        # Guarda curva máxima (já reduzida)
+        curva_maxima = profundidades.max(axis=1)
+        curvas_maximas.append((nome_cenario,) + decimar(tempo, curva_maxima, PONTOS_POR_CURVA, METODO_DECIMACAO))
+        if captura is not None:
+            captura.remover_arquivos()
+
+    # Salva todas as estatísticas em um único CSV
+    df_todos = pd.DataFrame(estatisticas_gerais)
+    df_todos.to_csv(os.path.join(base_dir, "estatisticas_picos_todos_cenarios.csv"), index=False, float_format="%.4f")
+
+    # Gráfico combinado das curvas máximas e espera pelas figuras pendentes
+    figuras.enviar(figura_curvas_maximas, os.path.join(base_dir, "curvas_maximas_todos_cenarios.pdf"), curvas_maximas)
+    figuras.fechar()
@@ -1,75 +1,252 @@
-import pandas as pd
+import argparse
 import os
 
-## Sistema de auditoria rápida da qualidade e integridade dos dados de entrada de cenários
+import numpy as np
+import pandas as pd
+
+from scenarios_data_extractor import unidades
+from scenarios_dataset import (COLUNA_PARTICAO, COLUNAS_CATEGORICAS, COLUNAS_NUMERICAS, COLUNAS_REGISTRO,
+                               PASTA_DATASET, abrir_dataset, codigo_cenario)
+
+## Auditoria da qualidade e integridade dos dados dos cenários
+#
+# Uma única passada vetorizada sobre o dataset particionado, o CSV unificado ou
+# os CSVs de cada cenário, lidos em lotes de linhas. Para cada variável e cada
+# cenário são acumulados contagem, nulos, mínimo, máximo, soma e número de
+# valores fora da faixa física (ou do domínio, para as categorias); os lotes
+# são combinados no final, de modo que a memória não cresce com o número de
+# cenários. O resultado é um único relatório tabular (auditoria_dados.csv). Os
+# erros de continuidade do escoamento e do roteamento (ECES e ECRO, os mesmos em
+# todos os registros de um cenário) são conferidos contra o limite abaixo.
 
 base_path = r"C:\Users\wpcal\Dropbox\Arquivos Pacheco 02_05_2022\Programacao\Ambiente_VirtualCS\Marcella\cenarios"
 cenarios = [f"cenario_{i:02d}" for i in range(1, 12)]
 
-# Dicionário de unidades para cada variável (ajuste conforme necessário)
-unidades = {
-    'NOME': '-',
-    'AREA': 'm²',
-    'DECL': '%',
-    'DURC': 'min',
-    'VCHU': 'mm',
-    'IMPV': '%',
-    'TIPO': '-',
-    'DIAM': 'm',
-    'LESC': 'm',
-    'PMAX': 'm',
-    'VAZT': 'm³/s',
-    'VTOT': '10^6 L',
-    'RAZA': '-',
-    'KSAT': 'mm/h',
-    'SUCC': 'mm',
-    'UINI': 'fração',
-    'PROS': 'm',
-    'ALTC': 'm',
-    'CLBO': '-'
+ARQUIVO_AUDITORIA = "auditoria_dados.csv"
+LINHAS_POR_LOTE = 250_000
+
+# Erro de continuidade (%) acima do qual o resultado do SWMM é considerado duvidoso
+LIMITE_ERRO_CONTINUIDADE = 10.0
+
+# Faixas físicas (mínimo, máximo) das variáveis numéricas; None = sem limite
+FAIXAS_FISICAS = {
+    'AREA': (0.0, None),
+    'DECL': (0.0, 100.0),
+    'DURC': (0.0, None),
+    'VCHU': (0.0, None),
+    'IMPV': (0.0, 100.0),
+    'DIAM': (0.0, None),
+    'LESC': (0.0, None),
+    'PMAX': (0.0, None),
+    'VAZT': (0.0, None),
+    'VTOT': (0.0, None),
+    'RAZA': (0.0, None),
+    'KSAT': (0.0, None),
+    'ALTC': (0.0, None),
+    'VSUP': (0.0, None),
+    'VGER': (0.0, None),
+    'PSUP': (0.0, 100.0),
+    'PINF': (0.0, 100.0),
+    'VINI': (0.0, None),
+    'VEVA': (0.0, None),
+    'VRET': (0.0, None),
+    'VSTO': (0.0, None),
+    'ERRO': (0.0, None),             # Total Runoff da sub-bacia (10^6 L)
+    'AMON': (0.0, None),
+    'AIMP': (0.0, None),
+    'NENT': (0.0, None),
+    'CEXU': (0.0, None),
+    'QMAX': (0.0, None),
+    'VMAX': (0.0, None),
+    'QREL': (0.0, None),
+    'YREL': (0.0, 1.0),
+    'HSOB': (0.0, None),
+    'HCAP': (0.0, None),
+    'FSUP': (0.0, 1.0),
+    'TSOB': (0.0, None),
+    'TTRA': (0.0, None),
+    'VINU': (0.0, None),
+    'IPRO': (0.0, None),
+    'PERI': (0.0, None),
+    'APOL': (0.0, None),
+    'ECES': (-LIMITE_ERRO_CONTINUIDADE, LIMITE_ERRO_CONTINUIDADE),
+    'ECRO': (-LIMITE_ERRO_CONTINUIDADE, LIMITE_ERRO_CONTINUIDADE),
 }
 
+# Valores admitidos nas colunas categóricas
+DOMINIOS = {
+    'TIPO': {'lote', 'rua'},
+    'CLBO': {'Normal', 'Sobrecarga', 'Transbordamento'},
+}
 
-def gerar_relatorio_conferencia(cenario):
-    try:
-        caminho_csv = os.path.join(base_path, f"{cenario}.csv")
-
+# Linha do relatório com os totais de todos os cenários
+TODOS = "TODOS"
+
+_COLUNAS_RELATORIO = ['CENARIO', 'VARIAVEL', 'UNIDADE', 'FAIXA', 'N', 'NULOS', 'MIN', 'MAX', 'MEDIA',
+                      'FORA_FAIXA', 'FRACAO_FORA_FAIXA']
+
+
+def _limites():
+    minimos = pd.Series({c: FAIXAS_FISICAS.get(c, (None, None))[0] for c in COLUNAS_NUMERICAS}, dtype=float)
+    maximos = pd.Series({c: FAIXAS_FISICAS.get(c, (None, None))[1] for c in COLUNAS_NUMERICAS}, dtype=float)
+    return minimos.fillna(-np.inf), maximos.fillna(np.inf)
+
+
+def _texto_faixa(coluna):
+    if coluna in DOMINIOS:
+        return '|'.join(sorted(DOMINIOS[coluna]))
+    minimo, maximo = FAIXAS_FISICAS.get(coluna, (None, None))
+    if minimo is None and maximo is None:
+        return ''
+    return f"[{'' if minimo is None else f'{minimo:g}'}, {'' if maximo is None else f'{maximo:g}'}]"
+
+
+class AcumuladorAuditoria:
+    """Estatísticas por cenário e variável acumuladas lote a lote"""
+
+    def __init__(self):
+        self._minimos, self._maximos = _limites()
+        self._parciais = []
+
+    def atualizar(self, lote):
+        """Acrescenta um DataFrame com a coluna CENARIO e as colunas do registro"""
+        if lote.empty:
+            return self
+        cenario = lote[COLUNA_PARTICAO].astype(str).to_numpy()
+        numericas = lote.reindex(columns=COLUNAS_NUMERICAS).apply(pd.to_numeric, errors='coerce')
+        numericas = numericas.astype('float64')
+
+        # Valores fora da faixa (NaN nunca conta como fora)
+        fora = numericas.lt(self._minimos, axis=1) | numericas.gt(self._maximos, axis=1)
+
+        # Categorias: nulos e valores fora do domínio
+        categoricas = lote.reindex(columns=COLUNAS_CATEGORICAS).astype(object)
+        presentes = categoricas.notna()
+        fora_dominio = pd.DataFrame({
+            c: presentes[c] & ~categoricas[c].isin(DOMINIOS.get(c, ())) for c in COLUNAS_CATEGORICAS
+        })
+        texto = lote.reindex(columns=[c for c in COLUNAS_REGISTRO if c not in COLUNAS_NUMERICAS
+                                      and c not in COLUNAS_CATEGORICAS]).notna()
+
+        grupos = numericas.groupby(cenario, sort=False)
+        contagem = pd.concat([grupos.count(), presentes.groupby(cenario, sort=False).sum(),
+                              texto.groupby(cenario, sort=False).sum()], axis=1)
+        self._parciais.append({
+            'linhas': pd.Series(cenario).value_counts(sort=False),
+            'contagem': contagem,
+            'soma': grupos.sum(),
+            'minimo': grupos.min(),
+            'maximo': grupos.max(),
+            'fora': pd.concat([fora.groupby(cenario, sort=False).sum(),
+                               fora_dominio.groupby(cenario, sort=False).sum()], axis=1),
+        })
+        return self
+
+    def resultado(self):
+        """Relatório longo: uma linha por (cenário, variável) e as linhas TODOS por variável"""
+        if not self._parciais:
+            return pd.DataFrame(columns=_COLUNAS_RELATORIO)
+
+        def combinar(chave, funcao):
+            return pd.concat([p[chave] for p in self._parciais]).groupby(level=0, sort=False).agg(funcao)
+
+        linhas = combinar('linhas', 'sum')
+        contagem, soma, fora = combinar('contagem', 'sum'), combinar('soma', 'sum'), combinar('fora', 'sum')
+        minimo, maximo = combinar('minimo', 'min'), combinar('maximo', 'max')
+
+        # Totais de todos os cenários
+        linhas.loc[TODOS] = linhas.sum()
+        for tabela, funcao in ((contagem, 'sum'), (soma, 'sum'), (fora, 'sum'), (minimo, 'min'), (maximo, 'max')):
+            tabela.loc[TODOS] = tabela.agg(funcao)
+
+        variaveis = [c for c in COLUNAS_REGISTRO if c in contagem.columns]
+        longo = lambda tabela: tabela.reindex(columns=variaveis).stack(future_stack=True)
+        relatorio = pd.DataFrame({'N': longo(contagem)})
+        relatorio.index.names = ['CENARIO', 'VARIAVEL']
+        relatorio['NULOS'] = linhas.reindex(relatorio.index.get_level_values(0)).to_numpy() - relatorio['N']
+        relatorio['MIN'] = longo(minimo)
+        relatorio['MAX'] = longo(maximo)
+        relatorio['MEDIA'] = longo(soma) / relatorio['N'].where(relatorio['N'] > 0)
+        relatorio['FORA_FAIXA'] = longo(fora).fillna(0)
+        relatorio['FRACAO_FORA_FAIXA'] = relatorio['FORA_FAIXA'] / relatorio['N'].where(relatorio['N'] > 0)
+
+        relatorio = relatorio.reset_index()
+        relatorio['UNIDADE'] = relatorio['VARIAVEL'].map(unidades).fillna('desconhecida')
+        relatorio['FAIXA'] = relatorio['VARIAVEL'].map({c: _texto_faixa(c) for c in variaveis})
+        for coluna in ('N', 'NULOS', 'FORA_FAIXA'):
+            relatorio[coluna] = relatorio[coluna].astype('int64')
+        return relatorio[_COLUNAS_RELATORIO]
+
+
+def lotes_dataset(pasta_dataset, linhas_por_lote=LINHAS_POR_LOTE):
+    """Lotes do dataset particionado (só as colunas do registro e CENARIO)"""
+    for lote in abrir_dataset(pasta_dataset).to_batches(batch_size=linhas_por_lote):
+        yield lote.to_pandas()
+
+
+def lotes_csv(arquivo_csv, linhas_por_lote=LINHAS_POR_LOTE):
+    """Lotes do CSV unificado (coluna CENARIO obrigatória)"""
+    yield from pd.read_csv(arquivo_csv, chunksize=linhas_por_lote, dtype={COLUNA_PARTICAO: str})
+
+
+def lotes_cenarios_csv(pasta, cenarios, linhas_por_lote=LINHAS_POR_LOTE):
+    """Lotes dos CSVs de cada cenário (<pasta>/<cenario>.csv), identificados pela coluna CENARIO"""
+    for cenario in cenarios:
+        caminho_csv = os.path.join(pasta, f"{cenario}.csv")
         if not os.path.exists(caminho_csv):
-            return f"Arquivo CSV não encontrado para {cenario}"
-
-        df = pd.read_csv(caminho_csv)
-
-        relatorio = f"Relatório de Conferência - {cenario}\n"
-        relatorio += "-" * 70 + "\n"
-        relatorio += "| Código Variável | 1º valor          | Quantidade de valores | Unidade   | Nº colunas vazias |\n"
-        relatorio += "-" * 70 + "\n"
-
-        for coluna in df.columns:
-            if coluna == 'ID':
-                continue
-
-            # Obter informações da coluna
-            primeiro_valor = str(df[coluna].iloc[0]) if not pd.isna(df[coluna].iloc[0]) else "VAZIO"
-            qtd_valores = df[coluna].count()
-            qtd_vazias = len(df) - qtd_valores
-            unidade = unidades.get(coluna, 'desconhecida')
-
-            # Formatar linha do relatório
-            linha = f"| {coluna:<15} | {primeiro_valor:<18} | {qtd_valores:<21} | {unidade:<8} | {qtd_vazias:<17} |\n"
-            relatorio += linha
-
-        # Salvar relatório em arquivo txt
-        relatorio_path = os.path.join(base_path, f"{cenario}_relatorio_conferencia.txt")
-        with open(relatorio_path, 'w', encoding='utf-8') as f:
-            f.write(relatorio)
-
-        return f"Relatório gerado com sucesso: {relatorio_path}"
-
-    except Exception as e:
-        return f"Erro ao gerar relatório para {cenario}: {str(e)}"
-
-
-# Gerar relatórios para todos os cenários
-for cenario in cenarios:
-    resultado = gerar_relatorio_conferencia(cenario)
-    print(resultado)
\ No newline at end of file
+            print(f"Arquivo CSV não encontrado para {cenario}")
+            continue
+        for lote in pd.read_csv(caminho_csv, chunksize=linhas_por_lote):
+            lote[COLUNA_PARTICAO] = codigo_cenario(cenario)
+            yield lote
+
+
+def auditar(lotes):
+    """Relatório de auditoria de uma sequência de lotes (ou de um único DataFrame)"""
+    if isinstance(lotes, pd.DataFrame):
+        lotes = [lotes]
+    acumulador = AcumuladorAuditoria()
+    for lote in lotes:
+        acumulador.atualizar(lote)
+    return acumulador.resultado()
+
+
+def auditar_dataset(pasta_dataset, linhas_por_lote=LINHAS_POR_LOTE):
+    """Relatório de auditoria do dataset particionado"""
+    return auditar(lotes_dataset(pasta_dataset, linhas_por_lote))
+
+
+def gravar_auditoria(relatorio, caminho):
+    """Grava o relatório consolidado e imprime as variáveis com valores fora da faixa"""
+    relatorio.to_csv(caminho, index=False, encoding='utf-8')
+    problemas = relatorio[(relatorio['CENARIO'] != TODOS) & (relatorio['FORA_FAIXA'] > 0)]
+    n_cenarios = relatorio.loc[relatorio['CENARIO'] != TODOS, 'CENARIO'].nunique()
+    print(f"📄 Auditoria: {caminho} ({n_cenarios} cenário(s), "
+          f"{len(problemas)} par(es) cenário × variável com valores fora da faixa)")
+    for variavel, grupo in problemas.groupby('VARIAVEL', sort=False):
+        pior = grupo.loc[grupo['FRACAO_FORA_FAIXA'].idxmax()]
+        print(f"  ⚠️ {variavel:<5} {_texto_faixa(variavel):<16} fora da faixa em {len(grupo)} cenário(s); "
+              f"pior: {pior['CENARIO']} ({pior['FRACAO_FORA_FAIXA']:.1%})")
+    return caminho
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Auditoria vetorizada dos dados dos cenários")
+    parser.add_argument("--base-path", default=base_path, help="pasta dos cenários")
+    origem = parser.add_mutually_exclusive_group()
+    origem.add_argument("--dataset", help=f"pasta do dataset particionado (padrão: <base-path>/{PASTA_DATASET})")
+    origem.add_argument("--csv", help="CSV unificado com a coluna CENARIO")
+    origem.add_argument("--cenarios", nargs="+", help="audita os CSVs individuais destes cenários")
+    parser.add_argument("--saida", default=None, help=f"relatório (padrão: <base-path>/{ARQUIVO_AUDITORIA})")
+    parser.add_argument("--linhas-por-lote", type=int, default=LINHAS_POR_LOTE, help="linhas lidas por lote")
+    args = parser.parse_args()
+
+    pasta_dataset = args.dataset or os.path.join(args.base_path, PASTA_DATASET)
+    if args.csv:
+        lotes = lotes_csv(args.csv, args.linhas_por_lote)
+    elif args.cenarios or not os.path.isdir(pasta_dataset):
+        lotes = lotes_cenarios_csv(args.base_path, args.cenarios or cenarios, args.linhas_por_lote)
+    else:
+        lotes = lotes_dataset(pasta_dataset, args.linhas_por_lote)
+
+    gravar_auditoria(auditar(lotes), args.saida or os.path.join(args.base_path, ARQUIVO_AUDITORIA))
@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+## Registro durável das tarefas de um lote (SQLite ao lado das saídas)
+#
+# Cada cenário ou variante de um lote tem uma linha com o seu estado, o número
+# de tentativas, os artefatos gerados (caminhos por tipo) e o traceback da
+# última falha. Cada transição é gravada em uma transação própria, de modo que
+# o registro sobrevive a uma queda do processo ou a um Ctrl-C. Ao reabrir o
+# lote, as tarefas que estavam em execução voltam a pendentes e apenas as não
+# integradas são executadas de novo.
+#
+#   pendente → simulando → extraido → integrado
+#                  ↘ falha (volta a ser executada na próxima execução do lote)
+
+ARQUIVO_TAREFAS = "tarefas.sqlite"
+
+PENDENTE = 'pendente'
+SIMULANDO = 'simulando'    # enviada ao pool (simulação e/ou extração em andamento)
+EXTRAIDO = 'extraido'      # registros extraídos, ainda fora do dataset
+INTEGRADO = 'integrado'    # partição gravada no dataset
+FALHA = 'falha'
+ESTADOS = (PENDENTE, SIMULANDO, EXTRAIDO, INTEGRADO, FALHA)
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS tarefas (
+    tarefa     TEXT PRIMARY KEY,
+    estado     TEXT NOT NULL,
+    parametros TEXT,
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    artefatos  TEXT NOT NULL DEFAULT '{}',
+    erro       TEXT,
+    atualizado TEXT NOT NULL
+)
+"""
+
+
+def _agora():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _json_parametros(parametros):
+    return None if parametros is None else json.dumps(parametros, sort_keys=True, default=str)
+
+
+class RegistroTarefas:
+    """Estados, artefatos e falhas das tarefas de um lote em um banco SQLite"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+        # O coordenador distribuído usa o registro a partir das threads do servidor HTTP
+        self._conexao = sqlite3.connect(caminho, timeout=30, check_same_thread=False)
+        self._trava = threading.Lock()
+        with self._trava, self._conexao:
+            self._conexao.execute("PRAGMA journal_mode=WAL")
+            self._conexao.execute(_ESQUEMA)
+
+    def _executar(self, sql, linhas):
+        with self._trava, self._conexao:
+            self._conexao.executemany(sql, linhas)
+
+    def registrar(self, tarefas):
+        """
+        Inclui as tarefas [(identificador, parâmetros)] ainda não registradas como pendentes.
+        Uma tarefa já registrada com outros parâmetros volta a pendente, sem artefatos nem erro.
+        """
+        tarefas = [(identificador, _json_parametros(parametros)) for identificador, parametros in tarefas]
+        agora = _agora()
+        self._executar(
+            "INSERT INTO tarefas (tarefa, estado, parametros, atualizado) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(tarefa) DO UPDATE SET estado = excluded.estado, parametros = excluded.parametros, "
+            "tentativas = 0, artefatos = '{}', erro = NULL, atualizado = excluded.atualizado "
+            "WHERE tarefas.parametros IS NOT excluded.parametros",
+            [(identificador, PENDENTE, parametros, agora) for identificador, parametros in tarefas])
+
+    def retomar(self):
+        """Devolve a pendentes as tarefas interrompidas em execução; retorna quantas eram"""
+        with self._trava, self._conexao:
+            cursor = self._conexao.execute("UPDATE tarefas SET estado = ?, atualizado = ? WHERE estado = ?",
+                                           (PENDENTE, _agora(), SIMULANDO))
+            return cursor.rowcount
+
+    def iniciar(self, identificadores):
+        """Marca as tarefas como em execução e conta mais uma tentativa"""
+        agora = _agora()
+        self._executar("UPDATE tarefas SET estado = ?, tentativas = tentativas + 1, atualizado = ? WHERE tarefa = ?",
+                       [(SIMULANDO, agora, identificador) for identificador in identificadores])
+
+    def _concluir_etapa(self, identificador, estado, artefatos):
+        with self._trava, self._conexao:
+            linha = self._conexao.execute("SELECT artefatos FROM tarefas WHERE tarefa = ?",
+                                          (identificador,)).fetchone()
+            todos = dict(json.loads(linha[0]) if linha else {}, **(artefatos or {}))
+            self._conexao.execute(
+                "UPDATE tarefas SET estado = ?, artefatos = ?, erro = NULL, atualizado = ? WHERE tarefa = ?",
+                (estado, json.dumps(todos), _agora(), identificador))
+
+    def extraido(self, identificador, artefatos=None):
+        """Registros extraídos (artefatos: {tipo: caminho} acrescentados aos já registrados)"""
+        self._concluir_etapa(identificador, EXTRAIDO, artefatos)
+
+    def integrado(self, identificador, artefatos=None):
+        """Partição da tarefa gravada no dataset"""
+        self._concluir_etapa(identificador, INTEGRADO, artefatos)
+
+    def falhou(self, identificador, erro):
+        """Falha da tarefa com o traceback"""
+        self._executar("UPDATE tarefas SET estado = ?, erro = ?, atualizado = ? WHERE tarefa = ?",
+                       [(FALHA, erro, _agora(), identificador)])
+
+    def remover(self, identificadores):
+        """Apaga do registro as tarefas indicadas"""
+        self._executar("DELETE FROM tarefas WHERE tarefa = ?", [(identificador,) for identificador in identificadores])
+
+    def estados(self):
+        """{identificador: estado} de todas as tarefas"""
+        with self._trava:
+            return dict(self._conexao.execute("SELECT tarefa, estado FROM tarefas").fetchall())
+
+    def tabela(self):
+        """DataFrame com todas as tarefas (parâmetros e artefatos decodificados)"""
+        with self._trava:
+            tabela = pd.read_sql_query("SELECT * FROM tarefas ORDER BY tarefa", self._conexao)
+        tabela['parametros'] = tabela['parametros'].map(lambda p: json.loads(p) if p else None)
+        tabela['artefatos'] = tabela['artefatos'].map(json.loads)
+        return tabela
+
+    def contagens(self):
+        """Número de tarefas em cada estado"""
+        with self._trava:
+            contagens = dict(self._conexao.execute("SELECT estado, COUNT(*) FROM tarefas GROUP BY estado").fetchall())
+        return {estado: contagens.get(estado, 0) for estado in ESTADOS}
+
+    def fechar(self):
+        with self._trava:
+            self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+def imprimir_registro(caminho, n_falhas=10):
+    """Imprime as contagens por estado e a última linha do traceback das tarefas com falha"""
+    with RegistroTarefas(caminho) as registro:
+        contagens = registro.contagens()
+        tabela = registro.tabela()
+    print(f"🗂️ {caminho}: " + ", ".join(f"{estado} {n}" for estado, n in contagens.items()))
+    falhas = tabela[tabela['estado'] == FALHA]
+    for linha in falhas.head(n_falhas).itertuples():
+        ultima = (linha.erro or '').strip().splitlines()[-1:] or ['']
+        print(f"  ❌ {linha.tarefa} ({linha.tentativas} tentativa(s)): {ultima[0]}")
+    if len(falhas) > n_falhas:
+        print(f"  … mais {len(falhas) - n_falhas} tarefa(s) com falha")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Estados das tarefas de um lote")
+    parser.add_argument("registro", nargs="?", default=ARQUIVO_TAREFAS, help="arquivo SQLite do registro")
+    parser.add_argument("--falhas", type=int, default=10, help="nº de tarefas com falha listadas")
+    args = parser.parse_args()
+
+    imprimir_registro(args.registro, args.falhas)
@@ -6,29 +6,54 @@ import pandas as pd
 import numpy as np
 import os
 
+from swmm_inp_model import ler_modelo_inp
+from swmm_out_reader import ArquivoSaida
+from swmm_report_index import ler_relatorio
+from swmm_series_capture import CapturaSeries, estimar_passos
+
 # Caminho do arquivo
 base_dir = r"C:\Users\wpcal\Dropbox\Arquivos Pacheco 02_05_2022\Programacao\Ambiente_VirtualCS\Marcella\cenarios"
 inp_path = os.path.join(base_dir, "cenario_11.inp")
 rpt_path = inp_path.replace(".inp", ".rpt")
 out_path = inp_path.replace(".inp", ".out")
 
-# Inicialização
-tempo = []
-profundidades = {}  # chave = node_id, valor = lista de profundidades
-
-# Executa simulação
-with Simulation(inp_path, rpt_path, out_path) as sim:
-    todos_nos = list(Nodes(sim))
-    for n in todos_nos:
-        profundidades[n.nodeid] = []
-
-    for step in sim:
-        tempo.append(sim.current_time)
-        for n in todos_nos:
-            profundidades[n.nodeid].append(n.depth)
-
-# Calcula pico por nó
-picos = {n: max(vals) for n, vals in profundidades.items() if any(vals)}
+# Reaproveita o .out/.rpt existentes em vez de reexecutar a simulação
+USAR_RESULTADOS_EXISTENTES = True
+
+# Captura das séries: matriz float32 (passos × nós) pré-alocada pelo passo de roteamento
+# (use um caminho em ARQUIVO_MMAP para gravar a matriz em disco em eventos longos)
+ARQUIVO_MMAP = None
+
+if USAR_RESULTADOS_EXISTENTES and os.path.exists(out_path) and os.path.exists(rpt_path):
+    # Séries no passo de relatório lidas do .out; picos exatos da Node Depth Summary do .rpt
+    with ArquivoSaida(out_path) as saida:
+        ids_nos = saida.ids_nos
+        tempo = saida.tempos()
+        profundidades = saida.serie_nos('depth')
+    node_depth = ler_relatorio(rpt_path).tabela('Node Depth Summary')
+    pico_por_no = dict(zip(node_depth.ids, node_depth.coluna_float(3)))
+else:
+    passo_roteamento = float(ler_modelo_inp(inp_path).opcao('ROUTING_STEP', '0.6'))
+
+    # Executa simulação
+    with Simulation(inp_path, rpt_path, out_path) as sim:
+        todos_nos = list(Nodes(sim))
+        captura = CapturaSeries([n.nodeid for n in todos_nos],
+                                passos_estimados=estimar_passos(sim, passo_roteamento),
+                                arquivo_mmap=ARQUIVO_MMAP)
+
+        for step in sim:
+            captura.registrar(sim.current_time, todos_nos)
+    captura.finalizar()
+    ids_nos = captura.ids
+    tempo = captura.tempos_registrados()
+    profundidades = captura.serie()
+    pico_por_no = captura.picos_por_no()  # atualizado durante a simulação
+
+coluna_no = {n: j for j, n in enumerate(ids_nos)}
+
+# Pico por nó (nós sempre secos são ignorados)
+picos = {n: pico_por_no[n] for n in ids_nos if pico_por_no.get(n, 0) > 0}
 ordenados = sorted(picos.items(), key=lambda x: x[1], reverse=True)
 
 # Seleciona 5: maior, menor, 3 intermediários
@@ -71,7 +96,7 @@ plt.plot([], [], color='none', label=f"Scenario {cenario_num}")
 
 # Curvas dos nós selecionados
 for i, n in enumerate(selecionados):
-    plt.plot(tempo, profundidades[n], label=f"Node {n} (Peak: {picos[n]:.2f} m)", color=cores[i])
+    plt.plot(tempo, profundidades[:, coluna_no[n]], label=f"Node {n} (Peak: {picos[n]:.2f} m)", color=cores[i])
 
 # Eixos e formatação
 plt.gca().xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
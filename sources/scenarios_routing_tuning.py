@@ -0,0 +1,176 @@
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pyswmm import Simulation
+
+from swmm_inp_patch import ModeloBase, formatar_numero
+from swmm_report_index import ler_relatorio, limpar_cache_relatorios
+
+## Ajuste do passo de roteamento e das threads do SWMM
+#
+# Um cenário é simulado em uma grade de ROUTING_STEP × VARIABLE_STEP × THREADS.
+# Para cada combinação são medidos o tempo de parede (menor de algumas
+# repetições), os erros de continuidade do escoamento e do roteamento (blocos
+# de continuidade do .rpt) e o maior desvio de profundidade máxima nos nós em
+# relação à combinação mais fina (menor passo, passo fixo). É recomendada a combinação mais rápida dentro das tolerâncias.
+# Em seguida, com o passo escolhido, compara-se o rendimento (simulações por
+# segundo) de cada divisão dos núcleos entre processos paralelos e threads do
+# motor, medindo de fato a execução simultânea dos processos.
+
+PASSOS_ROTEAMENTO = [0.3, 0.6, 1.0, 2.0, 5.0]
+FATORES_PASSO_VARIAVEL = [0.0, 0.5, 0.75]
+N_NUCLEOS = os.cpu_count() or 1
+
+# Erros de continuidade (%) admitidos
+TOLERANCIA_ROTEAMENTO = 1.0
+TOLERANCIA_ESCOAMENTO = 2.0
+
+# Desvio de profundidade máxima (m) admitido em relação à combinação mais fina (None: sem limite)
+TOLERANCIA_PMAX = 0.01
+
+ARQUIVO_AJUSTE = "ajuste_roteamento.csv"
+
+
+def _threads_candidatas(n_nucleos):
+    """1, 2, 4, ... até o número de núcleos (incluído)"""
+    candidatas = [2 ** k for k in range(int(np.log2(n_nucleos)) + 1)]
+    return sorted(set(candidatas + [n_nucleos]))
+
+
+def simular_configuracao(caminho_base, opcoes, repeticoes=1, pasta_temporaria=None):
+    """Simula o cenário com as opções dadas; retorna tempo mínimo, erros de continuidade e picos por nó"""
+    modelo = ModeloBase(caminho_base)
+    pasta = tempfile.mkdtemp(prefix="ajuste_", dir=pasta_temporaria)
+    try:
+        caminho_inp = modelo.gravar_variante(os.path.join(pasta, "ajuste.inp"), opcoes=opcoes)
+        caminho_rpt = os.path.join(pasta, "ajuste.rpt")
+        tempos = []
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            with Simulation(caminho_inp, caminho_rpt, os.path.join(pasta, "ajuste.out")) as sim:
+                sim.execute()
+            tempos.append(time.perf_counter() - inicio)
+
+        relatorio = ler_relatorio(caminho_rpt)
+        profundidades = relatorio.tabela('Node Depth Summary')
+        resultado = {
+            'tempo_s': min(tempos),
+            'erro_escoamento': relatorio.erro_continuidade('Runoff Quantity Continuity'),
+            'erro_roteamento': relatorio.erro_continuidade('Flow Routing Continuity'),
+        }
+        picos = pd.Series(profundidades.coluna_float(3), index=profundidades.ids) \
+            if profundidades is not None else pd.Series(dtype=float)
+        return resultado, picos
+    finally:
+        limpar_cache_relatorios()
+        shutil.rmtree(pasta, ignore_errors=True)
+
+
+def ajustar_passos(caminho_base, passos=PASSOS_ROTEAMENTO, fatores=FATORES_PASSO_VARIAVEL, threads=None,
+                   repeticoes=2, pasta_temporaria=None):
+    """Tabela com tempo, erros e desvio de PMAX para cada combinação da grade"""
+    threads = threads or _threads_candidatas(N_NUCLEOS)
+    referencia = None
+    linhas = []
+    # A combinação mais fina (menor passo, passo fixo, 1 thread) vem primeiro e serve de referência
+    for passo, fator, n_threads in itertools.product(sorted(passos), sorted(fatores), sorted(threads)):
+        opcoes = {'ROUTING_STEP': passo, 'VARIABLE_STEP': fator, 'THREADS': n_threads}
+        resultado, picos = simular_configuracao(caminho_base, opcoes, repeticoes, pasta_temporaria)
+        if referencia is None:
+            referencia = picos
+        desvio = (picos - referencia).abs().max() if len(referencia) else np.nan
+        linhas.append({'ROUTING_STEP': passo, 'VARIABLE_STEP': fator, 'THREADS': n_threads, **resultado,
+                       'desvio_pmax_m': float(desvio)})
+        print(f"  passo {passo:>5} s, variável {fator:<4}, {n_threads} thread(s): {resultado['tempo_s']:7.3f} s, "
+              f"erros {resultado['erro_escoamento']:+.3f}% / {resultado['erro_roteamento']:+.3f}%, "
+              f"desvio PMAX {desvio:.4f} m")
+    return pd.DataFrame(linhas)
+
+
+def recomendar(tabela, tolerancia_roteamento=TOLERANCIA_ROTEAMENTO, tolerancia_escoamento=TOLERANCIA_ESCOAMENTO,
+               tolerancia_pmax=TOLERANCIA_PMAX):
+    """Linha mais rápida cujos erros de continuidade e desvio de PMAX estão dentro das tolerâncias (None se nenhuma)"""
+    aceitas = tabela[(tabela['erro_roteamento'].abs() <= tolerancia_roteamento)
+                     & (tabela['erro_escoamento'].abs() <= tolerancia_escoamento)]
+    if tolerancia_pmax is not None:
+        aceitas = aceitas[aceitas['desvio_pmax_m'] <= tolerancia_pmax]
+    if aceitas.empty:
+        return None
+    return aceitas.loc[aceitas['tempo_s'].idxmin()]
+
+
+def _simular_opcoes(caminho_base, opcoes, pasta_temporaria):
+    return simular_configuracao(caminho_base, opcoes, 1, pasta_temporaria)[0]['tempo_s']
+
+
+def comparar_processos_threads(caminho_base, passo, fator, n_nucleos=N_NUCLEOS, pasta_temporaria=None):
+    """
+    Rendimento (simulações/s) de cada divisão processos × threads com processos × threads = núcleos,
+    medido executando os processos simultaneamente
+    """
+    linhas = []
+    for n_threads in _threads_candidatas(n_nucleos):
+        n_processos = max(1, n_nucleos // n_threads)
+        opcoes = {'ROUTING_STEP': passo, 'VARIABLE_STEP': fator, 'THREADS': n_threads}
+        inicio = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=n_processos) as pool:
+            list(pool.map(_simular_opcoes, [caminho_base] * n_processos, [opcoes] * n_processos,
+                          [pasta_temporaria] * n_processos))
+        duracao = time.perf_counter() - inicio
+        linhas.append({'PROCESSOS': n_processos, 'THREADS': n_threads, 'tempo_lote_s': duracao,
+                       'simulacoes_por_s': n_processos / duracao})
+        print(f"  {n_processos} processo(s) × {n_threads} thread(s): {n_processos / duracao:.3f} simulações/s")
+    return pd.DataFrame(linhas)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ajuste de ROUTING_STEP, VARIABLE_STEP e THREADS de um cenário")
+    parser.add_argument("inp", help=".inp do cenário")
+    parser.add_argument("--passos", nargs="+", type=float, default=PASSOS_ROTEAMENTO, help="ROUTING_STEP (s)")
+    parser.add_argument("--fatores", nargs="+", type=float, default=FATORES_PASSO_VARIAVEL, help="VARIABLE_STEP")
+    parser.add_argument("--threads", nargs="+", type=int, default=None, help="THREADS (padrão: 1, 2, 4, … núcleos)")
+    parser.add_argument("--repeticoes", type=int, default=2, help="execuções por combinação (vale o menor tempo)")
+    parser.add_argument("--tolerancia-roteamento", type=float, default=TOLERANCIA_ROTEAMENTO,
+                        help="erro de continuidade do roteamento admitido (%%)")
+    parser.add_argument("--tolerancia-escoamento", type=float, default=TOLERANCIA_ESCOAMENTO,
+                        help="erro de continuidade do escoamento admitido (%%)")
+    parser.add_argument("--tolerancia-pmax", type=float, default=TOLERANCIA_PMAX,
+                        help="desvio de profundidade máxima admitido (m) em relação à combinação mais fina "
+                             "(padrão: %(default)s)")
+    parser.add_argument("--saida", default=None, help=f"tabela de resultados (padrão: {ARQUIVO_AJUSTE} ao lado do .inp)")
+    parser.add_argument("--aplicar", default=None, help="grava um .inp com as opções recomendadas")
+    args = parser.parse_args()
+
+    print(f"\n🔧 Grade de passos para {args.inp}")
+    tabela = ajustar_passos(args.inp, args.passos, args.fatores, args.threads, args.repeticoes)
+    saida = args.saida or os.path.join(os.path.dirname(os.path.abspath(args.inp)), ARQUIVO_AJUSTE)
+    tabela.to_csv(saida, index=False)
+    print(f"📄 Resultados: {saida}")
+
+    melhor = recomendar(tabela, args.tolerancia_roteamento, args.tolerancia_escoamento, args.tolerancia_pmax)
+    if melhor is None:
+        print("Nenhuma combinação dentro das tolerâncias; mantenha as opções atuais ou relaxe as tolerâncias")
+        raise SystemExit(1)
+    print(f"\n✅ Recomendado: ROUTING_STEP {formatar_numero(melhor['ROUTING_STEP'])}, "
+          f"VARIABLE_STEP {formatar_numero(melhor['VARIABLE_STEP'])} "
+          f"({melhor['tempo_s']:.3f} s, erros {melhor['erro_escoamento']:+.3f}% / {melhor['erro_roteamento']:+.3f}%, "
+          f"desvio PMAX {melhor['desvio_pmax_m']:.4f} m)")
+
+    print(f"\n⚙️ Uso dos {N_NUCLEOS} núcleo(s) em uma varredura:")
+    divisoes = comparar_processos_threads(args.inp, melhor['ROUTING_STEP'], melhor['VARIABLE_STEP'])
+    melhor_divisao = divisoes.loc[divisoes['simulacoes_por_s'].idxmax()]
+    print(f"✅ Recomendado: {int(melhor_divisao['PROCESSOS'])} processo(s) com THREADS "
+          f"{int(melhor_divisao['THREADS'])} ({melhor_divisao['simulacoes_por_s']:.3f} simulações/s)")
+
+    if args.aplicar:
+        opcoes = {'ROUTING_STEP': melhor['ROUTING_STEP'], 'VARIABLE_STEP': melhor['VARIABLE_STEP'],
+                  'THREADS': int(melhor_divisao['THREADS'])}
+        ModeloBase(args.inp).gravar_variante(args.aplicar, opcoes=opcoes)
+        print(f"💾 .inp ajustado: {args.aplicar}")
@@ -0,0 +1,455 @@
+import argparse
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+import scenarios_sweep as varredura
+from scenarios_dataset import COLUNA_PARTICAO, PASTA_DATASET, cenarios_no_dataset, ler_dataset
+from swmm_inp_patch import MARGEM_SIMULACAO_MIN, ModeloBase
+
+try:
+    from sklearn.exceptions import ConvergenceWarning
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    from sklearn.gaussian_process.kernels import RBF, ConstantKernel, WhiteKernel
+except ImportError:  # dependência opcional
+    GaussianProcessRegressor = None
+
+## Análise de sensibilidade adaptativa (Sobol e Morris) com poucas simulações
+#
+# Cada simulação (partição do dataset) é um ponto: os fatores VCHU, DURC, IMPV,
+# KSAT e DECL e as saídas PMAX (média na rede) e as frações de registros em
+# cada classe CLBO. Os pontos já simulados são reaproveitados de quaisquer
+# datasets. Um conjunto de processos gaussianos por saída (um ajustado a todos
+# os pontos e os demais a reamostragens bootstrap) substitui o SWMM no cálculo
+# dos índices de Sobol (primeira ordem e total, estimadores de Saltelli e
+# Jansen) e dos efeitos elementares de Morris; a dispersão entre os substitutos
+# dá os intervalos de confiança. Enquanto algum intervalo for mais largo que a
+# tolerância, novas variantes são simuladas apenas onde os substitutos
+# discordam sobre as frações das classes, isto é, onde as classes mudam.
+#
+# Correspondência com os parâmetros das variantes: VCHU → fator aplicado aos
+# valores da série de chuva (cópia escalada da série, ver swmm_inp_patch; a
+# lâmina simulada de cada variante nova é conferida com a pedida), DURC → série de chuva com a duração de simulação mais próxima, IMPV →
+# %Imperv, KSAT → CN (no dataset, KSAT é o 1º parâmetro de [INFILTRATION], o CN
+# do método CURVE_NUMBER) e DECL → fator de declividade das sub-bacias.
+# Variantes de versões em que o fator de chuva ia para o SCF do pluviômetro
+# (sem efeito sobre a chuva) devem ser simuladas de novo em outra pasta.
+# Requer scikit-learn (pip install scikit-learn).
+
+FATORES = ['VCHU', 'DURC', 'IMPV', 'KSAT', 'DECL']
+CLASSES_CLBO = ['Normal', 'Sobrecarga', 'Transbordamento']
+SAIDAS = ['PMAX', 'FNOR', 'FSOB', 'FTRA']   # PMAX médio e fração de registros de cada classe CLBO
+
+UNIDADES_SAIDA = {
+    'PMAX': 'm',
+    'FNOR': '-',   # fração dos registros classificados como Normal
+    'FSOB': '-',   # ... como Sobrecarga
+    'FTRA': '-',   # ... como Transbordamento
+}
+
+ARQUIVO_INDICES = "sensibilidade_indices.csv"
+ARQUIVO_PONTOS = "sensibilidade_pontos.csv"
+
+N_INICIAIS = 8            # pontos antes da primeira estimativa (completados por hipercubo latino)
+N_LOTE = 4                # variantes simuladas por rodada adaptativa
+MAX_SIMULACOES = 40       # simulações novas no máximo
+TOLERANCIA = 0.10         # largura máxima dos intervalos de S1 e ST
+N_BOOTSTRAP = 30          # substitutos ajustados a reamostragens
+N_AMOSTRAS_SOBOL = 1024   # amostras base de Saltelli (avaliadas nos substitutos)
+N_TRAJETORIAS = 50        # trajetórias de Morris
+NIVEIS_MORRIS = 4
+N_CANDIDATOS = 2000       # candidatos avaliados a cada rodada adaptativa
+DISTANCIA_MINIMA = 0.10   # distância mínima (espaço normalizado) entre pontos simulados
+NIVEL_CONFIANCA = 0.95
+ALGARISMOS = 4            # algarismos significativos dos parâmetros das variantes
+TOLERANCIA_VCHU = 0.01    # diferença relativa aceita entre a lâmina pedida e a simulada
+
+
+def _exigir_sklearn():
+    if GaussianProcessRegressor is None:
+        raise ImportError("A análise de sensibilidade requer scikit-learn: pip install scikit-learn")
+
+
+def _media_ponderada(valores, pesos):
+    validos = valores.notna() & pesos.notna() & (pesos > 0)
+    return float(np.average(valores[validos], weights=pesos[validos])) if validos.any() else np.nan
+
+
+def pontos_do_dataset(pasta_dataset):
+    """Um ponto por partição: fatores e saídas agregados na rede (DataFrame indexado pelo cenário)"""
+    if not cenarios_no_dataset(pasta_dataset):
+        return pd.DataFrame(columns=FATORES + SAIDAS, dtype=float)
+    df = ler_dataset(pasta_dataset, colunas=['AREA', 'PMAX', 'CLBO', COLUNA_PARTICAO] + FATORES)
+    linhas = {}
+    for cenario, grupo in df.groupby(COLUNA_PARTICAO, sort=True):
+        # IMPV e DECL variam entre as sub-bacias: média ponderada pela área
+        area = grupo['AREA']
+        classes = grupo['CLBO'].dropna().astype(str)
+        linhas[cenario] = {
+            'VCHU': grupo['VCHU'].mean(),
+            'DURC': grupo['DURC'].mean(),
+            'IMPV': _media_ponderada(grupo['IMPV'], area),
+            'KSAT': grupo['KSAT'].mean(),
+            'DECL': _media_ponderada(grupo['DECL'], area),
+            'PMAX': grupo['PMAX'].mean(),
+            **{saida: (classes == classe).mean() if len(classes) else np.nan
+               for saida, classe in zip(SAIDAS[1:], CLASSES_CLBO)},
+        }
+    return pd.DataFrame.from_dict(linhas, orient='index', columns=FATORES + SAIDAS)
+
+
+class EspacoFatores:
+    """Faixas dos fatores analisados e conversão entre pontos normalizados e parâmetros de variante"""
+
+    def __init__(self, limites, modelo_base, series=None):
+        self.fatores = [f for f in FATORES if f in limites and limites[f][1] > limites[f][0]]
+        self.minimos = np.array([limites[f][0] for f in self.fatores], dtype=np.float64)
+        self.amplitudes = np.array([limites[f][1] - limites[f][0] for f in self.fatores], dtype=np.float64)
+        self.modelo_base = modelo_base
+
+        # Séries candidatas: duração da simulação (a mesma regra de ModeloBase.variante) e lâmina sem fator
+        modelo = modelo_base.modelo
+        self.serie_base = modelo.tabela('RAINGAGES').linhas[0][5]
+        self.series = {}
+        for serie in series or modelo.series:
+            resumo = modelo_base.resumo_chuva(serie)
+            if resumo.lamina_mm > 0:
+                self.series[serie] = (resumo.fim_min + MARGEM_SIMULACAO_MIN, resumo.lamina_mm)
+        if 'DURC' in self.fatores and not self.series:
+            raise ValueError("Nenhuma série de chuva disponível para variar DURC")
+
+        sub_bacias = modelo.tabela('SUBCATCHMENTS')
+        self.declividade_base = float(np.average(sub_bacias.coluna('Slope'), weights=sub_bacias.coluna('Area')))
+
+    def normalizar(self, pontos):
+        """Pontos (DataFrame com as colunas dos fatores) no cubo unitário"""
+        return (pontos[self.fatores].to_numpy(np.float64) - self.minimos) / self.amplitudes
+
+    def _serie_mais_proxima(self, durc):
+        return min(self.series, key=lambda serie: abs(self.series[serie][0] - durc))
+
+    def realizavel(self, u):
+        """Projeta pontos normalizados no que as variantes conseguem reproduzir (DURC só nas séries disponíveis)"""
+        u = np.array(u, dtype=np.float64, ndmin=2)
+        if 'DURC' in self.fatores:
+            j = self.fatores.index('DURC')
+            duracoes = np.array(sorted({duracao for duracao, _ in self.series.values()}))
+            alvo = self.minimos[j] + u[:, j] * self.amplitudes[j]
+            proxima = duracoes[np.abs(alvo[:, None] - duracoes[None, :]).argmin(axis=1)]
+            u[:, j] = (proxima - self.minimos[j]) / self.amplitudes[j]
+        return u
+
+    def lamina(self, serie):
+        """Lâmina (mm) da série sem fator"""
+        return self.series[serie][1] if serie in self.series else self.modelo_base.resumo_chuva(serie).lamina_mm
+
+    def vchu(self, parametros):
+        """Lâmina (mm) que a variante simula: a da sua série multiplicada pelo fator de chuva"""
+        return self.lamina(parametros.get('serie', self.serie_base)) * parametros.get('fator_chuva', 1.0)
+
+    def parametros(self, u):
+        """Parâmetros de variante (ModeloBase.variante) de um ponto normalizado"""
+        valores = dict(zip(self.fatores, self.minimos + np.asarray(u) * self.amplitudes))
+        arredondar = lambda valor: float(f"{valor:.{ALGARISMOS}g}")
+        parametros = {}
+        serie = self.serie_base
+        if 'DURC' in valores:
+            serie = self._serie_mais_proxima(valores['DURC'])
+            parametros['serie'] = serie
+        if 'VCHU' in valores:
+            parametros['fator_chuva'] = arredondar(valores['VCHU'] / self.lamina(serie))
+        if 'IMPV' in valores:
+            parametros['imperv'] = arredondar(valores['IMPV'])
+        if 'KSAT' in valores:
+            parametros['cn'] = arredondar(valores['KSAT'])
+        if 'DECL' in valores:
+            parametros['fator_declividade'] = arredondar(valores['DECL'] / self.declividade_base)
+        return parametros
+
+
+def _novo_substituto(n_fatores, semente):
+    nucleo = ConstantKernel(1.0, (1e-3, 1e3)) * RBF(np.full(n_fatores, 0.5), (1e-2, 1e2)) + \
+        WhiteKernel(1e-3, (1e-8, 1e-1))
+    return GaussianProcessRegressor(nucleo, alpha=1e-6, normalize_y=True, n_restarts_optimizer=2,
+                                    random_state=semente)
+
+
+class SubstitutoSaidas:
+    """Um processo gaussiano por saída, cada um com as suas escalas de comprimento por fator"""
+
+    def __init__(self, modelos):
+        self.modelos = modelos
+
+    def predict(self, u):
+        return np.column_stack([modelo.predict(u) for modelo in self.modelos])
+
+
+def ajustar_substitutos(u, y, n_bootstrap=N_BOOTSTRAP, gerador=None):
+    """Substituto ajustado a todos os pontos seguido de n_bootstrap ajustados a reamostragens"""
+    gerador = gerador or np.random.default_rng()
+    n = len(u)
+    amostras = [np.arange(n)] + [gerador.integers(0, n, n) for _ in range(n_bootstrap)]
+    substitutos = []
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', ConvergenceWarning)
+        for indices in amostras:
+            substitutos.append(SubstitutoSaidas([
+                _novo_substituto(u.shape[1], int(gerador.integers(2 ** 31))).fit(u[indices], coluna[indices])
+                for coluna in y.T
+            ]))
+    return substitutos
+
+
+def indices_sobol(prever, n_fatores, n_amostras=N_AMOSTRAS_SOBOL, gerador=None):
+    """Índices de primeira ordem (Saltelli 2010) e totais (Jansen): arrays (saídas × fatores)"""
+    gerador = gerador or np.random.default_rng()
+    a = gerador.random((n_amostras, n_fatores))
+    b = gerador.random((n_amostras, n_fatores))
+    ab = np.repeat(a[None], n_fatores, axis=0)
+    for i in range(n_fatores):
+        ab[i, :, i] = b[:, i]
+    f_a, f_b = prever(a), prever(b)
+    f_ab = prever(ab.reshape(-1, n_fatores)).reshape(n_fatores, n_amostras, -1)
+    variancia = np.var(np.concatenate([f_a, f_b]), axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        primeira = np.mean(f_b[None] * (f_ab - f_a[None]), axis=1) / variancia
+        total = 0.5 * np.mean((f_a[None] - f_ab) ** 2, axis=1) / variancia
+    return primeira.T, total.T
+
+
+def efeitos_morris(prever, n_fatores, n_trajetorias=N_TRAJETORIAS, niveis=NIVEIS_MORRIS, gerador=None):
+    """μ* e σ dos efeitos elementares (passo Δ na faixa normalizada): arrays (saídas × fatores)"""
+    gerador = gerador or np.random.default_rng()
+    delta = niveis / (2 * (niveis - 1))
+    # Níveis de partida que ainda admitem o passo +Δ
+    partida = np.arange(niveis // 2) / (niveis - 1)
+    ordens = np.array([gerador.permutation(n_fatores) for _ in range(n_trajetorias)])
+    trajetorias = np.empty((n_trajetorias, n_fatores + 1, n_fatores))
+    trajetorias[:, 0] = gerador.choice(partida, size=(n_trajetorias, n_fatores))
+    for passo in range(n_fatores):
+        trajetorias[:, passo + 1] = trajetorias[:, passo]
+        trajetorias[np.arange(n_trajetorias), passo + 1, ordens[:, passo]] += delta
+    f = prever(trajetorias.reshape(-1, n_fatores)).reshape(n_trajetorias, n_fatores + 1, -1)
+    efeitos = np.empty((n_trajetorias, n_fatores, f.shape[2]))
+    efeitos[np.arange(n_trajetorias)[:, None], ordens] = np.diff(f, axis=1) / delta
+    return np.abs(efeitos).mean(axis=0).T, efeitos.std(axis=0, ddof=1).T
+
+
+def estimar_indices(modelos, fatores, constantes=(), n_amostras=N_AMOSTRAS_SOBOL, n_trajetorias=N_TRAJETORIAS,
+                    gerador=None):
+    """
+    DataFrame (SAIDA, FATOR) com S1, ST e μ*, a estimativa do substituto ajustado a todos os pontos e
+    o intervalo entre os substitutos bootstrap; constantes: saídas sem variação (índices vazios)
+    """
+    gerador = gerador or np.random.default_rng()
+    estimativas = []
+    for modelo in modelos:
+        primeira, total = indices_sobol(modelo.predict, len(fatores), n_amostras, gerador)
+        mu_estrela, sigma = efeitos_morris(modelo.predict, len(fatores), n_trajetorias, gerador=gerador)
+        estimativas.append(np.stack([primeira, total, mu_estrela, sigma]))
+    estimativas = np.array(estimativas)   # modelos × índice × saída × fator
+    cauda = (1 - NIVEL_CONFIANCA) / 2 * 100
+    inferior, superior = np.nanpercentile(estimativas[1:], [cauda, 100 - cauda], axis=0) if len(modelos) > 1 \
+        else (np.full(estimativas.shape[1:], np.nan),) * 2
+
+    linhas = []
+    for s, saida in enumerate(SAIDAS):
+        for j, fator in enumerate(fatores):
+            valores = [estimativas[0, k, s, j] for k in range(4)]
+            limites = [(inferior[k, s, j], superior[k, s, j]) for k in range(3)]
+            if saida in constantes:
+                valores, limites = [np.nan] * 4, [(np.nan, np.nan)] * 3
+            linhas.append({
+                'SAIDA': saida, 'FATOR': fator,
+                'S1': valores[0], 'S1_INF': limites[0][0], 'S1_SUP': limites[0][1],
+                'ST': valores[1], 'ST_INF': limites[1][0], 'ST_SUP': limites[1][1],
+                'MU_ESTRELA': valores[2], 'MU_INF': limites[2][0], 'MU_SUP': limites[2][1],
+                'SIGMA': valores[3],
+            })
+    return pd.DataFrame(linhas)
+
+
+def largura_intervalos(indices):
+    """Maior largura dos intervalos de S1 e ST (critério de parada)"""
+    larguras = pd.concat([indices['S1_SUP'] - indices['S1_INF'], indices['ST_SUP'] - indices['ST_INF']])
+    return float(larguras.max()) if larguras.notna().any() else np.inf
+
+
+def escolher_pontos(modelos, espaco, u_simulados, n_novos, gerador=None, n_candidatos=N_CANDIDATOS,
+                    distancia_minima=DISTANCIA_MINIMA):
+    """
+    Pontos normalizados a simular: onde os substitutos mais discordam sobre as frações das classes
+    CLBO, afastados entre si e dos pontos já simulados
+    """
+    gerador = gerador or np.random.default_rng()
+    candidatos = espaco.realizavel(gerador.random((n_candidatos, len(espaco.fatores))))
+    previsoes = np.stack([modelo.predict(candidatos) for modelo in modelos])
+    escore = previsoes[:, :, 1:].std(axis=0).sum(axis=1)
+
+    ocupados = [p for p in np.asarray(u_simulados)]
+    escolhidos = []
+    for indice in np.argsort(-escore):
+        if len(escolhidos) == n_novos:
+            break
+        candidato = candidatos[indice]
+        if ocupados and np.min(np.linalg.norm(np.asarray(ocupados) - candidato, axis=1)) < distancia_minima:
+            continue
+        escolhidos.append(candidato)
+        ocupados.append(candidato)
+    return np.array(escolhidos)
+
+
+def ler_delineamento(pasta_saida):
+    """Delineamento já registrado em <pasta_saida> (lista de parâmetros por variante, na ordem)"""
+    caminho = os.path.join(pasta_saida, varredura.ARQUIVO_DELINEAMENTO)
+    if not os.path.exists(caminho):
+        return []
+    # round_trip: os valores reescritos pela varredura precisam ser idênticos para não refazer variantes
+    tabela = pd.read_csv(caminho, float_precision='round_trip').drop(columns='VARIANTE')
+    return [{nome: valor for nome, valor in linha.items() if pd.notna(valor)}
+            for linha in tabela.to_dict('records')]
+
+
+def coletar_pontos(pastas_dataset):
+    """Pontos de todos os datasets, identificados por <pasta>/<cenário>; descarta os sem saídas"""
+    partes = []
+    for pasta in pastas_dataset:
+        pontos = pontos_do_dataset(pasta)
+        pontos.index = [f"{pasta}/{cenario}" for cenario in pontos.index]
+        partes.append(pontos)
+    pontos = pd.concat(partes) if partes else pd.DataFrame(columns=FATORES + SAIDAS)
+    return pontos.dropna(subset=SAIDAS)
+
+
+def conferir_vchu(pontos, espaco, variantes):
+    """Compara a VCHU extraída de cada variante nova com a lâmina pedida; retorna as divergentes"""
+    divergentes = []
+    for ponto, parametros in variantes.items():
+        if ponto not in pontos.index:
+            continue
+        esperado, obtido = espaco.vchu(parametros), pontos.at[ponto, 'VCHU']
+        if abs(obtido - esperado) > TOLERANCIA_VCHU * max(abs(esperado), 1.0):
+            divergentes.append(ponto)
+            print(f"⚠️ {ponto}: VCHU simulada {obtido:.2f} mm, pedida {esperado:.2f} mm")
+    return divergentes
+
+
+def imprimir_indices(indices):
+    """Tabela S1 e ST com os intervalos, uma linha por fator e uma coluna por saída"""
+    formatar = lambda v, i, s: "—" if pd.isna(v) else f"{v:5.2f} [{i:5.2f}, {s:5.2f}]"
+    for nome in ('S1', 'ST'):
+        tabela = indices.assign(VALOR=[formatar(v, i, s) for v, i, s in
+                                       zip(indices[nome], indices[f"{nome}_INF"], indices[f"{nome}_SUP"])])
+        print(f"\n{nome} ({NIVEL_CONFIANCA:.0%}):")
+        print(tabela.pivot(index='FATOR', columns='SAIDA', values='VALOR')
+              .reindex(index=indices['FATOR'].unique(), columns=SAIDAS).to_string())
+
+
+def analisar_sensibilidade(caminho_base, pasta_saida, limites=None, reutilizar=(), series=None,
+                           n_iniciais=N_INICIAIS, lote=N_LOTE, max_simulacoes=MAX_SIMULACOES, tolerancia=TOLERANCIA,
+                           n_bootstrap=N_BOOTSTRAP, n_amostras=N_AMOSTRAS_SOBOL, semente=None,
+                           n_processos=varredura.N_PROCESSOS, em_memoria=False):
+    """
+    Estima os índices com os pontos já simulados e acrescenta variantes até os intervalos ficarem
+    mais estreitos que a tolerância ou até max_simulacoes simulações novas; retorna os índices.
+    limites: {fator: (mínimo, máximo)} (padrão: a faixa dos pontos reaproveitados)
+    reutilizar: pastas de datasets com pontos já simulados
+    series: séries de chuva candidatas para DURC (padrão: todas as do modelo base)
+    """
+    _exigir_sklearn()
+    gerador = np.random.default_rng(semente)
+    pastas = [os.path.join(pasta_saida, PASTA_DATASET)] + list(reutilizar)
+    delineamento = ler_delineamento(pasta_saida)
+    pontos = coletar_pontos(pastas)
+
+    limites = dict(limites or {})
+    for fator in FATORES:
+        if fator not in limites and len(pontos):
+            limites[fator] = (float(pontos[fator].min()), float(pontos[fator].max()))
+    espaco = EspacoFatores(limites, ModeloBase(caminho_base), series)
+    if len(espaco.fatores) < 2:
+        raise ValueError("A análise exige ao menos dois fatores com faixa de variação (ex.: --vchu 10 60)")
+    faixas = zip(espaco.fatores, espaco.minimos, espaco.minimos + espaco.amplitudes)
+    print(f"🎯 Fatores: {', '.join(f'{fator} [{minimo:g}, {maximo:g}]' for fator, minimo, maximo in faixas)}")
+    print(f"♻️ {len(pontos)} ponto(s) já simulado(s) reaproveitado(s)")
+
+    def simular(novos):
+        inicio = len(delineamento)
+        delineamento.extend(espaco.parametros(u) for u in novos)
+        varredura.executar_varredura(caminho_base, delineamento, pasta_saida, n_processos=n_processos,
+                                     em_memoria=em_memoria)
+        pontos = coletar_pontos(pastas)
+        if 'VCHU' in espaco.fatores:
+            conferir_vchu(pontos, espaco, {f"{pastas[0]}/{varredura.nome_variante(i + 1)}": delineamento[i]
+                                           for i in range(inicio, len(delineamento))})
+        return pontos
+
+    # 1. Pontos iniciais por hipercubo latino no espaço normalizado
+    faltam = min(n_iniciais - len(pontos), max_simulacoes - len(delineamento))
+    if faltam > 0:
+        amostras = varredura.hipercubo_latino({fator: (0.0, 1.0) for fator in espaco.fatores}, faltam,
+                                              int(gerador.integers(2 ** 31)))
+        pontos = simular(espaco.realizavel([[amostra[f] for f in espaco.fatores] for amostra in amostras]))
+
+    # 2. Rodadas adaptativas
+    rodada = 0
+    while True:
+        rodada += 1
+        u = espaco.normalizar(pontos)
+        y = pontos[SAIDAS].to_numpy(np.float64)
+        constantes = [saida for saida, coluna in zip(SAIDAS, y.T) if np.ptp(coluna) == 0]
+        modelos = ajustar_substitutos(u, y, n_bootstrap, gerador)
+        indices = estimar_indices(modelos, espaco.fatores, constantes, n_amostras, gerador=gerador)
+        largura = largura_intervalos(indices)
+        print(f"\n🔁 Rodada {rodada}: {len(pontos)} ponto(s), {len(delineamento)} simulação(ões) nova(s), "
+              f"maior intervalo {largura:.3f}")
+
+        if largura <= tolerancia:
+            print(f"✅ Intervalos abaixo da tolerância ({tolerancia:g})")
+            break
+        restantes = max_simulacoes - len(delineamento)
+        if restantes <= 0:
+            print(f"⚠️ Limite de {max_simulacoes} simulações atingido antes da tolerância ({tolerancia:g})")
+            break
+        novos = escolher_pontos(modelos, espaco, u, min(lote, restantes), gerador)
+        if not len(novos):
+            print("⚠️ Nenhum ponto novo afastado dos já simulados: refine DISTANCIA_MINIMA ou amplie as faixas")
+            break
+        pontos = simular(novos)
+
+    imprimir_indices(indices)
+    os.makedirs(pasta_saida, exist_ok=True)
+    indices.to_csv(os.path.join(pasta_saida, ARQUIVO_INDICES), index=False)
+    pontos.rename_axis('PONTO').to_csv(os.path.join(pasta_saida, ARQUIVO_PONTOS))
+    print(f"\n📄 Índices: {os.path.join(pasta_saida, ARQUIVO_INDICES)}")
+    return indices
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sensibilidade de PMAX e das classes CLBO (Sobol e Morris) com "
+                                                 "amostragem adaptativa")
+    parser.add_argument("base", help=".inp base das variantes")
+    parser.add_argument("saida", help="pasta de saída (delineamento, dataset das variantes e índices)")
+    parser.add_argument("--reutilizar", nargs="+", default=[],
+                        help="pastas de datasets com pontos já simulados (ex.: ../simulation_files/cenarios_dataset)")
+    for fator in FATORES:
+        parser.add_argument(f"--{fator.lower()}", nargs=2, type=float, metavar=("MIN", "MAX"),
+                            help=f"faixa de {fator} (padrão: a dos pontos reaproveitados)")
+    parser.add_argument("--series", nargs="+", help="séries de chuva candidatas para DURC")
+    parser.add_argument("--iniciais", type=int, default=N_INICIAIS, help="pontos antes da primeira estimativa")
+    parser.add_argument("--lote", type=int, default=N_LOTE, help="variantes por rodada adaptativa")
+    parser.add_argument("--max-simulacoes", type=int, default=MAX_SIMULACOES, help="simulações novas no máximo")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="largura máxima dos intervalos")
+    parser.add_argument("--bootstrap", type=int, default=N_BOOTSTRAP, help="substitutos bootstrap")
+    parser.add_argument("--semente", type=int, default=None, help="semente da amostragem")
+    parser.add_argument("--processos", type=int, default=varredura.N_PROCESSOS, help="processos de simulação")
+    parser.add_argument("--em-memoria", action="store_true",
+                        help="extrai as estatísticas direto do pyswmm, sem gravar o .rpt nem as séries do .out")
+    args = parser.parse_args()
+
+    faixas = {fator: tuple(getattr(args, fator.lower())) for fator in FATORES if getattr(args, fator.lower())}
+    analisar_sensibilidade(args.base, args.saida, faixas, args.reutilizar, args.series, args.iniciais, args.lote,
+                           args.max_simulacoes, args.tolerancia, args.bootstrap, semente=args.semente,
+                           n_processos=args.processos, em_memoria=args.em_memoria)
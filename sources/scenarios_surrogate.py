@@ -0,0 +1,282 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from scenarios_dataset import COLUNA_PARTICAO, PASTA_DATASET, ler_dataset
+
+try:
+    import joblib
+    from sklearn.calibration import CalibratedClassifierCV
+    from sklearn.ensemble import HistGradientBoostingClassifier
+    from sklearn.model_selection import GroupKFold, GroupShuffleSplit
+except ImportError:  # dependência opcional
+    joblib = None
+
+## Modelo substituto (surrogate) da classe CLBO
+#
+# Um classificador de gradient boosting por histogramas é treinado com as
+# variáveis explicativas do dataset unificado e calibrado (isotônico) com
+# validação cruzada agrupada por cenário, de modo que as probabilidades valem
+# para cenários que o modelo não viu. A inferência é vetorizada em lotes. Cada
+# caso recebe a probabilidade de cada classe e uma incerteza (1 − maior
+# probabilidade); os casos com incerteza acima do limiar (ou previstos numa
+# classe que funde classes raras) são indicados para simulação no SWMM.
+# Requer scikit-learn (pip install scikit-learn).
+
+ARQUIVO_MODELO = "surrogate_clbo.joblib"
+
+# Variáveis explicativas (as colunas ausentes no dataset são ignoradas)
+VARIAVEIS_X = ['AREA', 'DECL', 'DURC', 'VCHU', 'IMPV', 'DIAM', 'LESC', 'KSAT', 'ALTC']
+ALVO = 'CLBO'
+
+# Classes com menos exemplos que isto não têm como ser calibradas sozinhas: são
+# fundidas à classe mais frequente diferente de CLASSE_SEGURA (ex.: Sobrecarga
+# com Transbordamento, rótulo 'Sobrecarga/Transbordamento'), e os casos previstos
+# nessa classe fundida são sempre enviados ao SWMM para definir a classe exata
+MIN_EXEMPLOS_CLASSE = 10
+CLASSE_SEGURA = 'Normal'
+
+# Casos com incerteza acima deste valor são enviados ao SWMM
+LIMIAR_INCERTEZA = 0.10
+
+# Fração dos cenários reservada para avaliar o modelo calibrado
+FRACAO_TESTE = 0.2
+
+# Número de faixas de probabilidade no erro esperado de calibração (ECE)
+N_FAIXAS_CALIBRACAO = 10
+
+
+def _exigir_sklearn():
+    if joblib is None:
+        raise ImportError("O modelo substituto requer scikit-learn: pip install scikit-learn")
+
+
+def carregar_dados(origem):
+    """Lê o dataset particionado (pasta) ou o CSV unificado"""
+    if os.path.isdir(origem):
+        return ler_dataset(origem)
+    return pd.read_csv(origem, dtype={COLUNA_PARTICAO: str})
+
+
+def preparar_treino(df, variaveis=VARIAVEIS_X):
+    """
+    (X, y, grupos, variáveis, raras) com todas as linhas classificadas;
+    raras = {classe: nº de exemplos} das classes com menos de MIN_EXEMPLOS_CLASSE exemplos
+    """
+    variaveis = [v for v in variaveis if v in df.columns]
+    if not variaveis:
+        raise ValueError("Nenhuma variável explicativa presente no dataset")
+    rotulados = df[df[ALVO].notna()]
+    contagem = rotulados[ALVO].astype(str).value_counts()
+    raras = {classe: int(n) for classe, n in contagem[contagem < MIN_EXEMPLOS_CLASSE].items()}
+    if raras:
+        print(f"Aviso: classe(s) com poucos exemplos: {', '.join(f'{c} ({n})' for c, n in raras.items())}")
+
+    x = rotulados[variaveis].apply(pd.to_numeric, errors='coerce').to_numpy(np.float64)
+    y = rotulados[ALVO].astype(str).to_numpy()
+    grupos = rotulados[COLUNA_PARTICAO].astype(str).to_numpy() if COLUNA_PARTICAO in rotulados else \
+        np.zeros(len(rotulados), dtype=object)
+    return x, y, grupos, variaveis, raras
+
+
+def fundir_raras(y, raras):
+    """
+    (y com as classes raras fundidas, rótulo da classe fundida ou None);
+    o destino é a classe comum mais frequente diferente de CLASSE_SEGURA
+    """
+    if not raras:
+        return y, None
+    classes, contagem = np.unique(y[~np.isin(y, list(raras))], return_counts=True)
+    candidatas = [(n, c) for c, n in zip(classes, contagem) if c != CLASSE_SEGURA] or \
+        list(zip(contagem, classes))
+    if not candidatas:
+        raise ValueError(f"Só há classes com menos de {MIN_EXEMPLOS_CLASSE} exemplos: {raras}")
+    destino = max(candidatas)[1]
+    fundida = '/'.join(sorted([*raras, destino]))
+    return np.where(np.isin(y, [*raras, destino]), fundida, y), fundida
+
+
+def erro_calibracao(probabilidades, y, classes, n_faixas=N_FAIXAS_CALIBRACAO):
+    """Erro esperado de calibração (ECE) da classe mais provável"""
+    confianca = probabilidades.max(axis=1)
+    acertos = classes[probabilidades.argmax(axis=1)] == y
+    faixas = np.minimum((confianca * n_faixas).astype(int), n_faixas - 1)
+    n = np.bincount(faixas, minlength=n_faixas)
+    soma_confianca = np.bincount(faixas, weights=confianca, minlength=n_faixas)
+    soma_acertos = np.bincount(faixas, weights=acertos, minlength=n_faixas)
+    ocupadas = n > 0
+    return float(np.sum(np.abs(soma_confianca[ocupadas] - soma_acertos[ocupadas])) / len(y))
+
+
+def avaliar(probabilidades, y, classes, limiar=LIMIAR_INCERTEZA, aceitos=None):
+    """
+    Acurácia, log-loss, Brier, ECE e a cobertura/acurácia dos casos aceitos sem simulação
+    (aceitos: padrão, incerteza até o limiar)
+    """
+    indice = {c: i for i, c in enumerate(classes)}
+    verdade = np.zeros_like(probabilidades)
+    verdade[np.arange(len(y)), [indice[c] for c in y]] = 1.0
+    previsto = classes[probabilidades.argmax(axis=1)]
+    if aceitos is None:
+        aceitos = 1.0 - probabilidades.max(axis=1) <= limiar
+    return {
+        'n': int(len(y)),
+        'acuracia': float(np.mean(previsto == y)),
+        'log_loss': float(-np.mean(np.log(np.clip((probabilidades * verdade).sum(axis=1), 1e-15, 1.0)))),
+        'brier': float(np.mean(np.sum((probabilidades - verdade) ** 2, axis=1))),
+        'ece': erro_calibracao(probabilidades, y, classes),
+        'fracao_aceita': float(np.mean(aceitos)),
+        'acuracia_aceitos': float(np.mean(previsto[aceitos] == y[aceitos])) if aceitos.any() else None,
+    }
+
+
+class SurrogateCLBO:
+    """Classificador calibrado de CLBO com inferência em lote e indicação dos casos incertos"""
+
+    def __init__(self, variaveis=VARIAVEIS_X, limiar_incerteza=LIMIAR_INCERTEZA, semente=0):
+        _exigir_sklearn()
+        self.variaveis = list(variaveis)
+        self.limiar_incerteza = limiar_incerteza
+        self.semente = semente
+        self.modelo = None
+        self.classes = None
+        self.classes_raras = {}
+        self.classe_fundida = None
+        self.metricas = {}
+
+    def _classificador(self):
+        return HistGradientBoostingClassifier(max_iter=300, learning_rate=0.05, early_stopping=False,
+                                              random_state=self.semente)
+
+    def _calibrado(self, x, y, grupos):
+        n_grupos = len(np.unique(grupos))
+        if n_grupos >= 2:
+            divisoes = list(GroupKFold(n_splits=min(5, n_grupos)).split(x, y, grupos))
+        else:
+            divisoes = 5
+        return CalibratedClassifierCV(self._classificador(), method='isotonic', cv=divisoes).fit(x, y)
+
+    def _simular(self, probabilidades, classes):
+        """Casos a confirmar no SWMM: incerteza acima do limiar ou previsão na classe fundida"""
+        simular = 1.0 - probabilidades.max(axis=1) > self.limiar_incerteza
+        fundida = getattr(self, 'classe_fundida', None)
+        if fundida is not None and len(probabilidades):
+            simular |= classes[probabilidades.argmax(axis=1)] == fundida
+        return simular
+
+    def treinar(self, df):
+        """Avalia em cenários reservados e treina o modelo final com todos os cenários"""
+        x, y_original, grupos, self.variaveis, self.classes_raras = preparar_treino(df, self.variaveis)
+        y, self.classe_fundida = fundir_raras(y_original, self.classes_raras)
+        raros = np.isin(y_original, list(self.classes_raras))
+
+        # 1. Avaliação honesta: cenários de teste fora do treino e da calibração
+        if len(np.unique(grupos)) >= 4:
+            divisor = GroupShuffleSplit(n_splits=1, test_size=FRACAO_TESTE, random_state=self.semente)
+            treino, teste = next(divisor.split(x, y, grupos))
+            modelo = self._calibrado(x[treino], y[treino], grupos[treino])
+            probabilidades = modelo.predict_proba(x[teste])
+            simular = self._simular(probabilidades, modelo.classes_)
+            self.metricas['teste'] = avaliar(probabilidades, y[teste], modelo.classes_, aceitos=~simular)
+            self.metricas['teste']['cenarios'] = sorted(np.unique(grupos[teste]).tolist())
+            # Casos das classes raras no teste e a fração deles enviada ao SWMM
+            raros_teste = raros[teste]
+            self.metricas['teste']['n_raros'] = int(raros_teste.sum())
+            self.metricas['teste']['raros_simulados'] = \
+                float(simular[raros_teste].mean()) if raros_teste.any() else None
+
+        # 2. Modelo final
+        inicio = time.perf_counter()
+        self.modelo = self._calibrado(x, y, grupos)
+        self.classes = self.modelo.classes_
+        self.metricas['treino'] = {'n': int(len(y)), 'tempo_s': round(time.perf_counter() - inicio, 3),
+                                   'classes': self.classes.tolist(), 'variaveis': self.variaveis,
+                                   'classes_raras': self.classes_raras, 'classe_fundida': self.classe_fundida}
+        return self
+
+    def probabilidades(self, df):
+        """Matriz (casos × classes) de probabilidades calibradas"""
+        x = df.reindex(columns=self.variaveis).apply(pd.to_numeric, errors='coerce').to_numpy(np.float64)
+        return self.modelo.predict_proba(x)
+
+    def prever(self, df, tamanho_lote=100_000):
+        """
+        DataFrame com P_<classe>, CLBO_PREVISTO, INCERTEZA (1 − maior probabilidade)
+        e SIMULAR (caso a confirmar no SWMM: incerteza acima do limiar ou previsão na classe
+        que funde as classes com poucos exemplos)
+        """
+        partes = [self.probabilidades(df.iloc[i:i + tamanho_lote]) for i in range(0, len(df), tamanho_lote)]
+        probabilidades = np.vstack(partes) if partes else np.empty((0, len(self.classes)))
+        resultado = pd.DataFrame(probabilidades, columns=[f"P_{c}" for c in self.classes], index=df.index)
+        resultado['CLBO_PREVISTO'] = self.classes[probabilidades.argmax(axis=1)] if len(df) else []
+        resultado['INCERTEZA'] = 1.0 - probabilidades.max(axis=1)
+        resultado['SIMULAR'] = self._simular(probabilidades, self.classes)
+        return resultado
+
+    def gravar(self, caminho=ARQUIVO_MODELO):
+        joblib.dump(self, caminho)
+        print(f"💾 Modelo substituto gravado: {caminho}")
+        return caminho
+
+    @staticmethod
+    def carregar(caminho=ARQUIVO_MODELO):
+        _exigir_sklearn()
+        return joblib.load(caminho)
+
+
+def combinar_chuvas(sub_bacias, chuvas):
+    """Produto cartesiano de atributos de sub-bacias com combinações de chuva (ex.: VCHU, DURC)"""
+    return sub_bacias.drop(columns=[c for c in chuvas.columns if c in sub_bacias.columns]) \
+        .merge(chuvas, how='cross')
+
+
+def imprimir_metricas(metricas):
+    teste = metricas.get('teste')
+    if teste:
+        aceitos = teste['acuracia_aceitos']
+        print(f"\n📊 Cenários de teste {', '.join(teste['cenarios'])} ({teste['n']} casos): "
+              f"acurácia {teste['acuracia']:.3f}, log-loss {teste['log_loss']:.3f}, "
+              f"Brier {teste['brier']:.3f}, ECE {teste['ece']:.3f}")
+        print(f"   {teste['fracao_aceita']:.1%} dos casos dispensam simulação"
+              + (f" (acurácia entre eles {aceitos:.3f})" if aceitos is not None else ""))
+        if teste.get('n_raros'):
+            print(f"   {teste['n_raros']} caso(s) de classes raras no teste, "
+                  f"{teste['raros_simulados']:.0%} enviados ao SWMM")
+    treino = metricas.get('treino', {})
+    if treino.get('classe_fundida'):
+        raras = ', '.join(f"{c} ({n})" for c, n in treino['classes_raras'].items())
+        print(f"⚠️ Classe(s) com poucos exemplos {raras} fundida(s) em {treino['classe_fundida']}; "
+              f"casos previstos nela são sempre simulados")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Modelo substituto da classe CLBO")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    treino = sub.add_parser("treinar", help="treina e calibra o modelo")
+    treino.add_argument("dados", help=f"pasta do dataset particionado ({PASTA_DATASET}) ou CSV unificado")
+    treino.add_argument("--modelo", default=ARQUIVO_MODELO, help="arquivo do modelo")
+    treino.add_argument("--limiar", type=float, default=LIMIAR_INCERTEZA, help="incerteza máxima sem simulação")
+
+    previsao = sub.add_parser("prever", help="classifica casos de um CSV")
+    previsao.add_argument("casos", help="CSV com as variáveis explicativas")
+    previsao.add_argument("saida", help="CSV de saída com probabilidades e a indicação SIMULAR")
+    previsao.add_argument("--modelo", default=ARQUIVO_MODELO, help="arquivo do modelo")
+    args = parser.parse_args()
+
+    if args.comando == "treinar":
+        surrogate = SurrogateCLBO(limiar_incerteza=args.limiar).treinar(carregar_dados(args.dados))
+        imprimir_metricas(surrogate.metricas)
+        surrogate.gravar(args.modelo)
+    else:
+        surrogate = SurrogateCLBO.carregar(args.modelo)
+        casos = pd.read_csv(args.casos)
+        inicio = time.perf_counter()
+        resultado = surrogate.prever(casos)
+        duracao = time.perf_counter() - inicio
+        pd.concat([casos, resultado], axis=1).to_csv(args.saida, index=False)
+        print(f"✅ {len(casos)} casos em {duracao:.2f} s ({len(casos) / max(duracao, 1e-9):,.0f} casos/s); "
+              f"{int(resultado['SIMULAR'].sum())} indicados para simulação no SWMM → {args.saida}")
@@ -0,0 +1,402 @@
+import argparse
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import traceback
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+from pyswmm import Nodes, Simulation
+
+import scenarios_data_extractor as extrator
+from scenarios_dataset import PASTA_DATASET, cenarios_no_dataset, gravar_cenario, remover_cenario
+from scenarios_input_audit import ARQUIVO_AUDITORIA, auditar_dataset, gravar_auditoria
+from scenarios_job_ledger import ARQUIVO_TAREFAS, INTEGRADO, RegistroTarefas
+from swmm_event_stats import EstatisticasEvento
+from swmm_hotstart import MAX_ARQUIVOS, PARAMETROS_HOTSTART, PASTA_HOTSTART, CacheHotstart, chave_hotstart, \
+    gerar_hotstart
+from swmm_inp_model import ler_modelo_inp, limpar_cache_modelos
+from swmm_inp_patch import PARAMETROS_VARIANTE, ModeloBase
+from swmm_instrumentation import ARQUIVO_LOG, LogExecucao, etapa, imprimir_resumo, medir_cenario
+from swmm_live_stats import RELATORIO_NULO, EstatisticasSimulacao
+from swmm_report_index import limpar_cache_relatorios
+
+## Varredura de cenários a partir de um único .inp base
+#
+# O delineamento (grade completa ou hipercubo latino) define, para cada
+# variante, a série de chuva, o fator de escala, %Imperv, CN e o fator de
+# declividade das sub-bacias. Cada processo do pool lê o modelo base uma vez,
+# gera o texto da variante em memória, grava-o em uma pasta temporária só
+# durante a simulação, extrai os registros e apaga .inp/.rpt/.out. Os
+# registros seguem direto para o dataset particionado.
+# As medições de cada etapa (simulação inclusive) vão para o log de execução.
+# Variantes com estado antecedente (serie_antecedente, fator_antecedente,
+# aquecimento_min) partem de um hotstart gerado uma vez por combinação de rede,
+# parâmetros do solo e chuva antecedente e reaproveitado do cache.
+# Durante a simulação, acumuladores por nó (pico, tempo ao pico, tempos de
+# sobrecarga e transbordamento, volume extravasado) seguem para o registro sem
+# guardar as séries temporais. No modo em memória, os resumos de nós,
+# sub-bacias e condutos vêm direto do motor: o .rpt vai para o dispositivo nulo
+# e o .out guarda apenas as variáveis do sistema.
+# O estado de cada variante (pendente, simulando, extraída, integrada ou com
+# falha e o seu traceback) fica no registro de tarefas tarefas.sqlite: repetir
+# o comando após uma queda ou um Ctrl-C executa apenas as variantes que faltam.
+
+N_PROCESSOS = os.cpu_count() or 1
+PREFIXO_VARIANTE = "var"
+ARQUIVO_DELINEAMENTO = "delineamento.csv"
+
+# Modelo base e cache de hotstarts carregados uma vez por processo do pool
+_modelo_base = None
+_cache_hotstart = None
+
+
+def grade_parametros(grade):
+    """Produto cartesiano de {parâmetro: lista de valores} → lista de dicionários"""
+    nomes = list(grade)
+    return [dict(zip(nomes, valores)) for valores in itertools.product(*(grade[n] for n in nomes))]
+
+
+def hipercubo_latino(espaco, n_amostras, semente=None):
+    """
+    Amostragem por hipercubo latino.
+    espaco: {parâmetro: (mínimo, máximo)} para contínuos ou lista de opções para categóricos
+    """
+    gerador = np.random.default_rng(semente)
+    colunas = {}
+    for nome, dominio in espaco.items():
+        # Um valor em cada um dos n estratos, em ordem aleatória
+        u = (gerador.permutation(n_amostras) + gerador.random(n_amostras)) / n_amostras
+        if isinstance(dominio, tuple):
+            minimo, maximo = dominio
+            colunas[nome] = minimo + u * (maximo - minimo)
+        else:
+            opcoes = list(dominio)
+            colunas[nome] = [opcoes[i] for i in np.minimum((u * len(opcoes)).astype(int), len(opcoes) - 1)]
+    return [{nome: _valor_python(colunas[nome][i]) for nome in espaco} for i in range(n_amostras)]
+
+
+def _valor_python(valor):
+    return valor.item() if isinstance(valor, np.generic) else valor
+
+
+def nome_variante(indice, prefixo=PREFIXO_VARIANTE):
+    """Identificador da variante (também usado como partição do dataset)"""
+    return f"{prefixo}{indice:05d}"
+
+
+def _iniciar_worker(caminho_base, pasta_hotstart=None, max_hotstarts=MAX_ARQUIVOS):
+    """Carrega o modelo base (e abre o cache de hotstarts) uma única vez em cada processo do pool"""
+    global _modelo_base, _cache_hotstart
+    _modelo_base = ModeloBase(caminho_base)
+    _cache_hotstart = CacheHotstart(pasta_hotstart, max_hotstarts) if pasta_hotstart else None
+
+
+def _hotstart_variante(pasta, identificador, caminho_inp, parametros, antecedentes):
+    """Hotstart da variante: do cache ou de uma simulação de aquecimento gravada na pasta temporária"""
+    chave = chave_hotstart(ler_modelo_inp(caminho_inp), antecedentes)
+
+    def aquecer(caminho_hsf):
+        # Mesmos parâmetros do solo da variante; chuva antecedente no período de aquecimento, com a série
+        # escalada pelo fator antecedente (fator 0 ou ausente sem série: série zerada, aquecimento seco)
+        caminho = os.path.join(pasta, f"{identificador}_aquecimento.inp")
+        solo = {k: v for k, v in parametros.items() if k in ('imperv', 'cn', 'fator_declividade')}
+        serie = antecedentes.get('serie_antecedente')
+        _modelo_base.gravar_variante(caminho, serie=serie,
+                                     fator_chuva=antecedentes.get('fator_antecedente', 1.0 if serie else 0.0),
+                                     duracao_simulacao=antecedentes.get('aquecimento_min'), **solo)
+        gerar_hotstart(caminho, caminho_hsf)
+
+    return _cache_hotstart.obter_ou_gerar(chave, aquecer, antecedentes)
+
+
+def simular_variante(identificador, parametros, pasta_temporaria=None, estatisticas_evento=True, em_memoria=False):
+    """
+    Simula uma variante em pasta temporária e devolve (identificador, df, erro, medições).
+    estatisticas_evento: acumula TPIC, TSOB, TTRA, VINU e IPRO por nó a cada passo
+    em_memoria: extrai as estatísticas do motor sem gravar o .rpt nem as séries do .out
+    """
+    pasta = tempfile.mkdtemp(prefix=f"{identificador}_", dir=pasta_temporaria)
+    df = erro = None
+    try:
+        with medir_cenario(identificador) as medicao:
+            caminho_inp = os.path.join(pasta, f"{identificador}.inp")
+            caminho_rpt = os.path.join(pasta, f"{identificador}.rpt")
+            caminho_out = os.path.join(pasta, f"{identificador}.out")
+            antecedentes = {k: v for k, v in parametros.items() if k in PARAMETROS_HOTSTART and pd.notna(v)}
+            parametros = {k: v for k, v in parametros.items() if k in PARAMETROS_VARIANTE}
+            with etapa('variante_inp'):
+                _modelo_base.gravar_variante(caminho_inp, sem_series=em_memoria, **parametros)
+
+            hotstart = None
+            if antecedentes:
+                if _cache_hotstart is None:
+                    raise ValueError("Parâmetros antecedentes exigem uma pasta de hotstarts")
+                with etapa('hotstart') as medida:
+                    hotstart, reaproveitado = _hotstart_variante(pasta, identificador, caminho_inp,
+                                                                 parametros, antecedentes)
+                    medida.linhas = int(reaproveitado)
+
+            eventos = estatisticas = acumulador = None
+            relatorio = RELATORIO_NULO if em_memoria else caminho_rpt
+            with etapa('simulacao') as medida, Simulation(caminho_inp, relatorio, caminho_out) as sim:
+                if hotstart:
+                    sim.use_hotstart(hotstart)
+                if estatisticas_evento:
+                    nos = list(Nodes(sim))
+                    acumulador = EstatisticasEvento.do_modelo(ler_modelo_inp(caminho_inp), [n.nodeid for n in nos],
+                                                              sim.start_time)
+                if acumulador is None and not hotstart and not em_memoria:
+                    sim.execute()
+                else:
+                    # As estatísticas do motor só existem enquanto a simulação está aberta
+                    for _ in sim:
+                        if acumulador is not None:
+                            acumulador.registrar_nos(sim.current_time, nos)
+                if acumulador is not None:
+                    eventos = acumulador.tabela()
+                    medida.linhas = acumulador.n_passos
+                if em_memoria:
+                    estatisticas = EstatisticasSimulacao(sim, ler_modelo_inp(caminho_inp))
+
+            df = extrator.extrair_cenario(identificador, caminho_inp, None if em_memoria else caminho_rpt,
+                                          eventos, estatisticas)
+    except Exception:
+        erro = traceback.format_exc()
+    finally:
+        # Os índices em cache apontam para arquivos que deixam de existir
+        limpar_cache_relatorios()
+        limpar_cache_modelos()
+        shutil.rmtree(pasta, ignore_errors=True)
+    return identificador, df, erro, medicao.registros()
+
+
+def preparar_varredura(delineamento, pasta_saida, prefixo=PREFIXO_VARIANTE):
+    """
+    Valida e registra o delineamento em <pasta_saida>; retorna (variantes, pendentes), listas de
+    (identificador, parâmetros), sem as variantes já presentes no dataset com os mesmos parâmetros.
+    As partições de variantes que não estão mais no delineamento são apagadas
+    """
+    for parametros in delineamento:
+        desconhecidos = set(parametros) - set(PARAMETROS_VARIANTE) - set(PARAMETROS_HOTSTART)
+        if desconhecidos:
+            raise ValueError(f"Parâmetros desconhecidos: {', '.join(sorted(desconhecidos))}")
+    os.makedirs(pasta_saida, exist_ok=True)
+
+    # 1. Registrar o delineamento (identificador + parâmetros de cada variante)
+    variantes = [(nome_variante(i, prefixo), parametros) for i, parametros in enumerate(delineamento, start=1)]
+    tabela = pd.DataFrame([dict(VARIANTE=identificador, **parametros) for identificador, parametros in variantes])
+    caminho_delineamento = os.path.join(pasta_saida, ARQUIVO_DELINEAMENTO)
+    anterior = set()
+    if os.path.exists(caminho_delineamento):
+        with open(caminho_delineamento, 'r', encoding='utf-8') as f:
+            anterior = set(f.read().splitlines())
+    texto = tabela.to_csv(index=False)
+    with open(caminho_delineamento, 'w', encoding='utf-8', newline='') as f:
+        f.write(texto)
+
+    # 2. Partições de uma execução anterior com delineamento maior
+    pasta_dataset = os.path.join(pasta_saida, PASTA_DATASET)
+    identificadores = {identificador for identificador, _ in variantes}
+    obsoletas = [cenario for cenario in cenarios_no_dataset(pasta_dataset) if cenario not in identificadores]
+    for cenario in obsoletas:
+        remover_cenario(pasta_dataset, cenario)
+    if obsoletas:
+        print(f"🗑️ {len(obsoletas)} partição(ões) fora do delineamento removida(s): {', '.join(obsoletas)}")
+
+    # 3. Variantes já presentes no dataset, com os mesmos parâmetros, não são simuladas de novo
+    inalteradas = {linha.split(',', 1)[0] for linha in texto.splitlines()[1:] if linha in anterior}
+    concluidas = set(cenarios_no_dataset(pasta_dataset)) & inalteradas
+    pendentes = [(identificador, parametros) for identificador, parametros in variantes
+                 if identificador not in concluidas]
+    return variantes, pendentes
+
+
+def usa_hotstart(delineamento):
+    """Indica se alguma variante tem parâmetros de estado antecedente"""
+    return any(nome in PARAMETROS_HOTSTART for parametros in delineamento for nome in parametros)
+
+
+def abrir_registro(pasta_saida, variantes, pendentes):
+    """
+    Registro de tarefas da varredura: inclui as variantes do delineamento (apagando as que saíram
+    dele), devolve a pendentes as interrompidas em uma execução anterior e marca como integradas as
+    que já estão no dataset
+    """
+    registro = RegistroTarefas(os.path.join(pasta_saida, ARQUIVO_TAREFAS))
+    identificadores = {identificador for identificador, _ in variantes}
+    registro.remover([tarefa for tarefa in registro.estados() if tarefa not in identificadores])
+    registro.registrar(variantes)
+    registro.retomar()
+    estados = registro.estados()
+    a_executar = {identificador for identificador, _ in pendentes}
+    for identificador, _ in variantes:
+        if identificador not in a_executar and estados.get(identificador) != INTEGRADO:
+            registro.integrado(identificador)
+    return registro
+
+
+def executar_varredura(caminho_base, delineamento, pasta_saida, n_processos=N_PROCESSOS,
+                       prefixo=PREFIXO_VARIANTE, pasta_temporaria=None, arquivo_log=ARQUIVO_LOG, resumo=False,
+                       pasta_hotstart=None, max_hotstarts=MAX_ARQUIVOS, estatisticas_evento=True, em_memoria=False):
+    """
+    Simula e extrai todas as variantes do delineamento; retorna os erros por variante.
+    pasta_hotstart: cache de hotstarts (padrão: <pasta_saida>/hotstart)
+    estatisticas_evento: acumula as estatísticas de evento por nó durante a simulação
+    em_memoria: extrai as estatísticas do motor, sem .rpt nem séries no .out
+    """
+    # 1-2. Delineamento registrado e variantes pendentes
+    variantes, pendentes = preparar_varredura(delineamento, pasta_saida, prefixo)
+    pasta_dataset = os.path.join(pasta_saida, PASTA_DATASET)
+    pasta_hotstart = (pasta_hotstart or os.path.join(pasta_saida, PASTA_HOTSTART)) if usa_hotstart(delineamento) \
+        else None
+    n_processos = max(1, min(n_processos, len(pendentes)))
+
+    print(f"\n{'=' * 50}")
+    print(f"Varredura: {len(pendentes)} variante(s) a simular com {n_processos} processo(s) "
+          f"({len(variantes) - len(pendentes)} já no dataset)")
+    print(f"{'=' * 50}")
+
+    # 3. Simular em paralelo e gravar cada partição assim que a variante termina; o registro de
+    # tarefas guarda o estado de cada variante, de modo que um lote interrompido continua de onde parou
+    erros = {}
+    log = LogExecucao(os.path.join(pasta_saida, arquivo_log), n_processos=n_processos,
+                      variantes=len(pendentes)) if arquivo_log else None
+    registro = abrir_registro(pasta_saida, variantes, pendentes)
+    fila = deque(pendentes)
+    em_execucao = {}  # futuro → identificador
+    concluidas = 0
+    interrompida = False
+
+    def registrar_resultado(futuro):
+        nonlocal concluidas
+        identificador, df, erro, medicoes = futuro.result()
+        concluidas += 1
+        if log:
+            log.gravar(medicoes)
+        if erro is None:
+            registro.extraido(identificador)
+            with etapa('gravacao_particao') as medida:
+                arquivo = gravar_cenario(df, identificador, pasta_dataset)
+                medida.linhas = len(df)
+            registro.integrado(identificador, {'particao': os.path.relpath(arquivo, pasta_saida)})
+            print(f"✅ [{concluidas}/{len(pendentes)}] {identificador}: {len(df)} registros")
+        else:
+            erros[identificador] = erro
+            registro.falhou(identificador, erro)
+            print(f"❌ [{concluidas}/{len(pendentes)}] Falha na variante {identificador}:\n{erro}")
+
+    pool = ProcessPoolExecutor(max_workers=n_processos, initializer=_iniciar_worker,
+                               initargs=(caminho_base, pasta_hotstart, max_hotstarts))
+    try:
+        with medir_cenario('lote') as lote:
+            try:
+                while fila or em_execucao:
+                    # Uma variante por processo, sem fila no pool: um Ctrl-C (que também chega aos processos
+                    # do pool e interrompe as simulações em andamento) não deixa variantes por começar
+                    while fila and len(em_execucao) < n_processos:
+                        identificador, parametros = fila.popleft()
+                        registro.iniciar([identificador])
+                        futuro = pool.submit(simular_variante, identificador, parametros, pasta_temporaria,
+                                             estatisticas_evento, em_memoria)
+                        em_execucao[futuro] = identificador
+                    prontos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
+                    for futuro in prontos:
+                        del em_execucao[futuro]
+                        registrar_resultado(futuro)
+            except KeyboardInterrupt:
+                interrompida = True
+                print(f"\n⏸️ Interrompida: encerrando {len(em_execucao)} variante(s) em andamento")
+                pool.shutdown(wait=True, cancel_futures=True)
+                # Variantes que terminaram durante a espera não são perdidas
+                for futuro in em_execucao:
+                    if not futuro.cancelled() and futuro.exception() is None:
+                        registrar_resultado(futuro)
+                registro.retomar()
+
+            # Auditoria consolidada das variantes do dataset
+            if os.path.isdir(pasta_dataset) and not interrompida:
+                with etapa('auditoria') as medida:
+                    relatorio = auditar_dataset(pasta_dataset)
+                    gravar_auditoria(relatorio, os.path.join(pasta_saida, ARQUIVO_AUDITORIA))
+                    medida.linhas = len(relatorio)
+    finally:
+        pool.shutdown()
+        registro.fechar()
+
+    print(f"\nResumo: {concluidas - len(erros)} variante(s) simulada(s), {len(erros)} com erro")
+    print(f"📦 Dataset: {pasta_dataset}")
+    if log:
+        log.gravar(lote.registros())
+        log.fechar(simuladas=concluidas - len(erros), com_erro=len(erros), interrompida=interrompida)
+        print(f"🧾 Log de execução: {log.caminho}")
+        if resumo:
+            imprimir_resumo(log.caminho, log.execucao)
+    if interrompida:
+        print(f"⏸️ {len(pendentes) - concluidas} variante(s) pendente(s): execute de novo para continuar")
+        raise KeyboardInterrupt
+    return erros
+
+
+def argumentos_delineamento(parser):
+    """Acrescenta ao parser as opções que definem o delineamento (valores, hipercubo latino)"""
+    parser.add_argument("--series", nargs="+", help="séries de [TIMESERIES] a usar")
+    parser.add_argument("--fator-chuva", nargs="+", type=float, help="fatores aplicados aos valores da série de chuva")
+    parser.add_argument("--imperv", nargs="+", type=float, help="valores de %%Imperv")
+    parser.add_argument("--cn", nargs="+", type=float, help="valores de CN")
+    parser.add_argument("--fator-declividade", nargs="+", type=float,
+                        help="fatores aplicados à declividade (%%Slope) de cada sub-bacia")
+    parser.add_argument("--serie-antecedente", nargs="+", help="séries de chuva antecedente (aquecimento)")
+    parser.add_argument("--fator-antecedente", nargs="+", type=float,
+                        help="fatores de escala da chuva antecedente (sem série: da série base; 0 = seco)")
+    parser.add_argument("--aquecimento-min", nargs="+", type=float, help="durações do aquecimento (min)")
+    parser.add_argument("--lhs", type=int, default=0,
+                        help="nº de amostras por hipercubo latino (intervalo mín–máx de cada parâmetro numérico; "
+                             "séries e parâmetros antecedentes entre os valores dados)")
+    parser.add_argument("--semente", type=int, default=None, help="semente do hipercubo latino")
+
+
+def delineamento_dos_argumentos(args):
+    """
+    Delineamento (grade ou hipercubo latino) a partir das opções de argumentos_delineamento.
+    No hipercubo, séries e parâmetros antecedentes são sorteados entre os valores dados: cada
+    combinação antecedente gera um hotstart, e valores contínuos dariam uma chave por variante
+    """
+    valores = {'serie': args.series, 'fator_chuva': args.fator_chuva, 'imperv': args.imperv, 'cn': args.cn,
+               'fator_declividade': args.fator_declividade, 'serie_antecedente': args.serie_antecedente,
+               'fator_antecedente': args.fator_antecedente, 'aquecimento_min': args.aquecimento_min}
+    valores = {nome: lista for nome, lista in valores.items() if lista}
+    if args.lhs:
+        categoricos = {nome for nome in valores if nome.startswith('serie') or nome in PARAMETROS_HOTSTART}
+        espaco = {nome: lista if nome in categoricos else (min(lista), max(lista))
+                  for nome, lista in valores.items()}
+        return hipercubo_latino(espaco, args.lhs, args.semente)
+    return grade_parametros(valores)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de chuva, impermeabilização e CN a partir de um .inp base")
+    parser.add_argument("base", help=".inp base")
+    parser.add_argument("saida", help="pasta de saída (delineamento e dataset particionado)")
+    argumentos_delineamento(parser)
+    parser.add_argument("--max-hotstarts", type=int, default=MAX_ARQUIVOS,
+                        help="nº máximo de hotstarts mantidos no cache (os menos usados são removidos)")
+    parser.add_argument("--processos", type=int, default=N_PROCESSOS, help="número de processos do pool")
+    parser.add_argument("--sem-eventos", action="store_true",
+                        help="simula com sim.execute(), sem as estatísticas de evento por nó (TPIC, TSOB, ...)")
+    parser.add_argument("--em-memoria", action="store_true",
+                        help="extrai as estatísticas direto do pyswmm, sem gravar o .rpt nem as séries do .out")
+    parser.add_argument("--resumo", action="store_true",
+                        help="imprime a tabela de tempos por etapa e as variantes mais lentas ao final")
+    args = parser.parse_args()
+
+    try:
+        executar_varredura(args.base, delineamento_dos_argumentos(args), args.saida, n_processos=args.processos,
+                           resumo=args.resumo, max_hotstarts=args.max_hotstarts,
+                           estatisticas_evento=not args.sem_eventos, em_memoria=args.em_memoria)
+    except KeyboardInterrupt:
+        sys.exit(130)
@@ -0,0 +1,124 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from swmm_rainfall import resumir_pluviometros
+
+## Estatísticas de evento por nó acumuladas durante a simulação (pyswmm)
+#
+# A cada passo de roteamento são atualizados, para todos os nós, o pico de
+# profundidade e o seu instante, o tempo acima de 0,7·ALTC (sobrecarga) e de
+# 1,0·ALTC (transbordamento), o volume extravasado e a integral profundidade ×
+# tempo. A memória é constante por nó (alguns vetores float64), de modo que
+# nenhuma série temporal é guardada. Os limiares são os mesmos da classe CLBO.
+
+# Variáveis de evento acrescentadas ao registro de cada nó
+COLUNAS_EVENTO = ['TPIC', 'TSOB', 'TTRA', 'VINU', 'IPRO']
+
+UNIDADES_EVENTO = {
+    'TPIC': 'min',   # início da chuva → pico de profundidade
+    'TSOB': 'min',   # tempo com profundidade ≥ 0,7·ALTC
+    'TTRA': 'min',   # tempo com profundidade ≥ 1,0·ALTC
+    'VINU': 'm³',    # volume extravasado (flooding)
+    'IPRO': 'm·min', # integral da profundidade no tempo
+}
+
+LIMIAR_SOBRECARGA = 0.7
+LIMIAR_TRANSBORDAMENTO = 1.0
+
+# Conversão das unidades de vazão do modelo (FLOW_UNITS) para m³/s
+FATOR_VAZAO_M3S = {
+    'CMS': 1.0,
+    'LPS': 1e-3,
+    'MLD': 1e3 / 86400,
+    'CFS': 0.028316846592,
+    'GPM': 6.30901964e-5,
+    'MGD': 0.0438126364,
+}
+
+
+def inicio_chuva(modelo, inicio_simulacao):
+    """Instante do primeiro intervalo com chuva entre os pluviômetros (início da simulação se não houver)"""
+    inicios = [resumo.inicio_min for resumo in resumir_pluviometros(modelo).values() if resumo.lamina_mm > 0]
+    return inicio_simulacao + timedelta(minutes=min(inicios)) if inicios else inicio_simulacao
+
+
+class EstatisticasEvento:
+    """Acumuladores por nó atualizados passo a passo, sem guardar as séries"""
+
+    def __init__(self, ids_nos, altc, instante_chuva, unidade_vazao='CMS'):
+        self.ids = list(ids_nos)
+        n_nos = len(self.ids)
+        self.altc = np.asarray(altc, dtype=np.float64)
+        self.instante_chuva = np.datetime64(instante_chuva, 'ms')
+        self.fator_vazao = FATOR_VAZAO_M3S[unidade_vazao.upper()]
+
+        self.pico = np.zeros(n_nos)
+        self.instante_pico = np.full(n_nos, self.instante_chuva)
+        self.segundos_sobrecarga = np.zeros(n_nos)
+        self.segundos_transbordamento = np.zeros(n_nos)
+        self.volume_inundado = np.zeros(n_nos)      # m³
+        self.integral_profundidade = np.zeros(n_nos)  # m·s
+        self.n_passos = 0
+
+        self._tempo_anterior = None
+        self._profundidade_anterior = np.zeros(n_nos)
+        self._inundacao_anterior = np.zeros(n_nos)
+
+        # Limiares absolutos; nós sem ALTC > 0 nunca os atingem
+        valida = self.altc > 0
+        self._limite_sobrecarga = np.where(valida, LIMIAR_SOBRECARGA * self.altc, np.inf)
+        self._limite_transbordamento = np.where(valida, LIMIAR_TRANSBORDAMENTO * self.altc, np.inf)
+
+    @classmethod
+    def do_modelo(cls, modelo, ids_nos, inicio_simulacao):
+        """Acumuladores com ALTC de [JUNCTIONS], FLOW_UNITS e início da chuva de um ModeloSWMM"""
+        junctions = modelo.tabela('JUNCTIONS')
+        altc_por_no = dict(zip(junctions.ids, junctions.coluna('MaxDepth')))
+        altc = [altc_por_no.get(no, np.nan) for no in ids_nos]
+        return cls(ids_nos, altc, inicio_chuva(modelo, inicio_simulacao), modelo.opcao('FLOW_UNITS', 'CMS'))
+
+    def registrar(self, tempo, profundidades, inundacao=None):
+        """Atualiza os acumuladores com os valores de todos os nós (na ordem de ids_nos) no passo atual"""
+        tempo = np.datetime64(tempo, 'ms')
+        profundidades = np.asarray(profundidades, dtype=np.float64)
+        inundacao = self._inundacao_anterior if inundacao is None else np.asarray(inundacao, dtype=np.float64)
+
+        if self._tempo_anterior is not None:
+            dt = (tempo - self._tempo_anterior) / np.timedelta64(1, 's')
+            # Trapézios para as integrais; o estado no fim do passo vale para todo o passo
+            self.integral_profundidade += 0.5 * (profundidades + self._profundidade_anterior) * dt
+            self.volume_inundado += 0.5 * (inundacao + self._inundacao_anterior) * dt * self.fator_vazao
+            self.segundos_sobrecarga += dt * (profundidades >= self._limite_sobrecarga)
+            self.segundos_transbordamento += dt * (profundidades >= self._limite_transbordamento)
+
+        maior = profundidades > self.pico
+        self.pico[maior] = profundidades[maior]
+        self.instante_pico[maior] = tempo
+
+        self._tempo_anterior = tempo
+        self._profundidade_anterior = profundidades
+        self._inundacao_anterior = inundacao
+        self.n_passos += 1
+
+    def registrar_nos(self, tempo, nos):
+        """Lê depth e flooding dos objetos pyswmm.Nodes (na ordem de ids_nos) e registra o passo"""
+        n_nos = len(self.ids)
+        self.registrar(tempo,
+                       np.fromiter((no.depth for no in nos), dtype=np.float64, count=n_nos),
+                       np.fromiter((no.flooding for no in nos), dtype=np.float64, count=n_nos))
+
+    def tabela(self):
+        """DataFrame indexado pelo nó com PMAX, INSTANTE_PICO e as variáveis de COLUNAS_EVENTO"""
+        tpic = (self.instante_pico - self.instante_chuva) / np.timedelta64(1, 'm')
+        return pd.DataFrame({
+            'PMAX': self.pico,
+            'INSTANTE_PICO': self.instante_pico,
+            # Nós sempre secos não têm pico
+            'TPIC': np.where(self.pico > 0, tpic, np.nan),
+            'TSOB': self.segundos_sobrecarga / 60.0,
+            'TTRA': self.segundos_transbordamento / 60.0,
+            'VINU': self.volume_inundado,
+            'IPRO': self.integral_profundidade / 60.0,
+        }, index=pd.Index(self.ids, name='NO'))
@@ -0,0 +1,193 @@
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+## Figuras das séries de profundidade geradas em segundo plano
+#
+# As séries são reduzidas antes de plotar: LTTB (Largest-Triangle-Three-Buckets)
+# escolhe, em cada intervalo, o ponto que forma o maior triângulo com os
+# vizinhos e preserva picos e inflexões; mín/máx por intervalo guarda os dois
+# extremos de cada intervalo. As figuras são desenhadas por um pool de
+# processos com o backend Agg (sem janela), usando a API orientada a objetos do
+# matplotlib, de modo que o laço das simulações nunca espera pelos gráficos.
+
+# Pontos mantidos por curva (uma figura de 12 pol. não distingue mais que isso)
+PONTOS_POR_CURVA = 1000
+
+# Processos dedicados às figuras
+N_PROCESSOS_FIGURAS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+TAMANHO_FONTE = 20
+CORES_NOS = ['red', 'blue', 'green', 'orange', 'purple']
+
+
+def _eixo_numerico(x):
+    """Converte instantes datetime64 em números (ns) para o cálculo das áreas"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def lttb(x, y, n_pontos=PONTOS_POR_CURVA):
+    """Índices dos pontos escolhidos pelo LTTB (primeiro e último sempre mantidos)"""
+    n = len(y)
+    if n_pontos >= n or n_pontos < 3:
+        return np.arange(n)
+    x = _eixo_numerico(x)
+    y = np.asarray(y, dtype=np.float64)
+
+    # n_pontos - 2 intervalos sobre os pontos internos [1, n - 1)
+    limites = np.linspace(1, n - 1, n_pontos - 1).astype(np.int64)
+    indices = np.empty(n_pontos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(n_pontos - 2):
+        inicio, fim = limites[i], limites[i + 1]
+        prox_inicio = fim
+        prox_fim = limites[i + 2] if i + 2 < len(limites) else n
+        x_medio = x[prox_inicio:prox_fim].mean()
+        y_medio = y[prox_inicio:prox_fim].mean()
+
+        # Área (×2) do triângulo ponto anterior – candidato – média do próximo intervalo
+        areas = np.abs((x[anterior] - x_medio) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (y_medio - y[anterior]))
+        anterior = inicio + int(np.argmax(areas))
+        indices[i + 1] = anterior
+    return indices
+
+
+def minmax_por_intervalo(y, n_pontos=PONTOS_POR_CURVA):
+    """Índices do mínimo e do máximo de cada intervalo, em ordem temporal"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    n_intervalos = n_pontos // 2
+    if n_pontos >= n or n_intervalos < 1:
+        return np.arange(n)
+
+    # Intervalos de mesmo tamanho; o último é completado repetindo o último ponto
+    tamanho = -(-n // n_intervalos)
+    posicoes = np.minimum(np.arange(n_intervalos * tamanho), n - 1).reshape(n_intervalos, tamanho)
+    blocos = y[posicoes]
+    minimos = posicoes[np.arange(n_intervalos), np.argmin(blocos, axis=1)]
+    maximos = posicoes[np.arange(n_intervalos), np.argmax(blocos, axis=1)]
+    return np.unique(np.concatenate(([0, n - 1], minimos, maximos)))
+
+
+def decimar(x, y, n_pontos=PONTOS_POR_CURVA, metodo='lttb'):
+    """Série (x, y) reduzida a cerca de n_pontos preservando a forma"""
+    if metodo == 'lttb':
+        indices = lttb(x, y, n_pontos)
+    elif metodo == 'minmax':
+        indices = minmax_por_intervalo(y, n_pontos)
+    else:
+        raise ValueError(f"Método de decimação desconhecido: {metodo}")
+    return np.asarray(x)[indices], np.asarray(y)[indices]
+
+
+def _iniciar_worker_figuras():
+    """Backend sem janela e fonte padrão em cada processo de figuras"""
+    import matplotlib
+    matplotlib.use('Agg')
+    matplotlib.rcParams.update({'font.size': TAMANHO_FONTE})
+
+
+def _eixo_tempo(figura):
+    import matplotlib.dates as mdates
+    eixo = figura.subplots()
+    eixo.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    eixo.grid(True)
+    return eixo
+
+
+def figura_nos_cenario(caminho_pdf, nome_cenario, curvas):
+    """PDF com as profundidades dos nós selecionados; curvas = [(nó, pico, tempo, profundidade)]"""
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(12, 6))
+    eixo = _eixo_tempo(figura)
+    eixo.plot([], [], color='none', label=f"Scenario {nome_cenario[-2:]}")
+    for i, (no, pico, tempo, profundidade) in enumerate(curvas):
+        eixo.plot(tempo, profundidade, label=f"Node {no} (Peak: {pico:.2f} m)", color=CORES_NOS[i % len(CORES_NOS)])
+    eixo.set_xlabel("Time [hh:mm]")
+    eixo.set_ylabel("Depth [m]")
+    eixo.legend()
+    figura.tight_layout()
+    figura.savefig(caminho_pdf)
+    return caminho_pdf
+
+
+def figura_curvas_maximas(caminho_pdf, curvas):
+    """PDF com a curva de profundidade máxima de cada cenário; curvas = [(cenário, tempo, curva)]"""
+    from matplotlib.figure import Figure
+
+    figura = Figure(figsize=(12, 6))
+    eixo = _eixo_tempo(figura)
+    for nome_cenario, tempo, curva in curvas:
+        eixo.plot(tempo, curva, label=f"Scenario {nome_cenario[-2:]}")
+    eixo.set_xlabel("Time [hh:mm]")
+    eixo.set_ylabel("Maximum Depth [m]")
+    eixo.set_title("Maximum Depth Curves – All Scenarios")
+    # Com centenas de cenários a legenda cobriria o gráfico
+    if len(curvas) <= 20:
+        eixo.legend(title="All Scenarios")
+    figura.tight_layout()
+    figura.savefig(caminho_pdf)
+    return caminho_pdf
+
+
+def _desenhar(funcao, caminho_pdf, args):
+    try:
+        return funcao(caminho_pdf, *args), None
+    except Exception:
+        return caminho_pdf, traceback.format_exc()
+
+
+class PoolFiguras:
+    """Pool de processos Agg para as figuras; n_processos=0 desenha no próprio processo"""
+
+    def __init__(self, n_processos=N_PROCESSOS_FIGURAS):
+        self.n_processos = n_processos
+        self._pool = None
+        if n_processos > 0:
+            self._pool = ProcessPoolExecutor(max_workers=n_processos, initializer=_iniciar_worker_figuras)
+        else:
+            _iniciar_worker_figuras()
+        self._pendentes = []
+        self.erros = {}
+
+    def enviar(self, funcao, caminho_pdf, *args):
+        """Agenda uma figura (funcao(caminho_pdf, *args)) e retorna imediatamente"""
+        if self._pool is None:
+            self._coletar(_desenhar(funcao, caminho_pdf, args))
+        else:
+            self._pendentes.append(self._pool.submit(_desenhar, funcao, caminho_pdf, args))
+
+    def _coletar(self, resultado):
+        caminho_pdf, erro = resultado
+        if erro is None:
+            print(f"🖼️ Figura gerada: {caminho_pdf}")
+        else:
+            self.erros[caminho_pdf] = erro
+            print(f"❌ Falha na figura {caminho_pdf}:\n{erro}")
+
+    def aguardar(self):
+        """Espera as figuras agendadas; retorna os erros por arquivo"""
+        for futuro in self._pendentes:
+            self._coletar(futuro.result())
+        self._pendentes = []
+        return self.erros
+
+    def fechar(self):
+        self.aguardar()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
@@ -0,0 +1,479 @@
+import argparse
+import hashlib
+import io
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from swmm_inp_model import ler_modelo_inp
+
+## Geometria das sub-bacias e dos nós com índice espacial
+#
+# [Polygons] é lido de uma vez para arrays planos x/y com deslocamentos por
+# sub-bacia (os vértices da sub-bacia i ficam em inicio[i]:inicio[i + 1]) e a
+# área (fórmula do laço), o centroide e o perímetro de todos os polígonos são
+# calculados juntos com np.add.reduceat. As caixas envolventes dos polígonos e
+# os pontos de [COORDINATES] são indexados por uma R-tree empacotada por STR
+# (Sort-Tile-Recursive) guardada em arrays; as consultas de janela e de nó mais
+# próximo percorrem a árvore nível a nível para todas as consultas de uma vez.
+# O mapa de inundação desenha todos os polígonos em uma única PolyCollection
+# colorida pela classe CLBO. As coordenadas são tomadas em metros (sistema
+# projetado, como nos cenários).
+
+# Atributos de geometria acrescentados aos registros do extrator
+COLUNAS_GEOMETRIA = ['XCEN', 'YCEN', 'PERI', 'APOL']
+
+UNIDADES_GEOMETRIA = {
+    'XCEN': 'm',     # centroide do polígono (sub-bacias) ou coordenada do nó (junções)
+    'YCEN': 'm',
+    'PERI': 'm',     # perímetro do polígono
+    'APOL': 'ha',    # área do polígono
+}
+
+# Filhos por nó da R-tree
+CAPACIDADE_NO = 16
+
+MAX_GEOMETRIAS_CACHE = 16
+
+# Cores das classes CLBO no mapa (sub-bacias sem classe em cinza)
+CORES_CLASSES = OrderedDict([
+    ('Normal', '#2ca02c'),
+    ('Sobrecarga', '#ff7f0e'),
+    ('Transbordamento', '#d62728'),
+])
+COR_SEM_CLASSE = '#d9d9d9'
+
+# Acima deste número de polígonos o mapa é rasterizado (PDF leve) e sem contornos
+MAX_POLIGONOS_VETORIAIS = 5000
+
+# Cache impressão digital da geometria → GeometriaModelo
+_cache_geometrias = OrderedDict()
+
+
+def _bloco_geometria(modelo, secao):
+    """Bytes de uma seção de geometria do .inp (vazio se ausente)"""
+    intervalo = modelo.posicoes_geometria.get(secao)
+    if intervalo is None:
+        return b''
+    inicio, fim = intervalo
+    with open(modelo.caminho, 'rb') as f:
+        f.seek(inicio)
+        return f.read(fim - inicio)
+
+
+def _ler_pontos(bloco):
+    """Tabela Name, X, Y de um bloco de geometria, lida pelo leitor C do pandas"""
+    if not bloco.strip():
+        return pd.DataFrame({'Name': pd.Series(dtype=object), 'X': pd.Series(dtype=float),
+                             'Y': pd.Series(dtype=float)})
+    pontos = pd.read_csv(io.BytesIO(bloco), sep=r'\s+', comment=';', header=None, usecols=[0, 1, 2],
+                         names=['Name', 'X', 'Y'], dtype={'Name': str, 'X': np.float64, 'Y': np.float64},
+                         skip_blank_lines=True, engine='c')
+    return pontos.dropna()
+
+
+def _intersecta(a, b):
+    """Caixas (xmin, ymin, xmax, ymax) de a que se sobrepõem às de b, linha a linha"""
+    return (a[:, 0] <= b[:, 2]) & (b[:, 0] <= a[:, 2]) & (a[:, 1] <= b[:, 3]) & (b[:, 1] <= a[:, 3])
+
+
+def _distancias_caixa(caixas, x, y):
+    """
+    Quadrados da menor distância de cada ponto à caixa correspondente e da distância MINMAXDIST
+    (Roussopoulos): como toda face de uma caixa da árvore toca algum item, há com certeza um item
+    a até essa distância.
+    """
+    dx_min = np.maximum(np.maximum(caixas[:, 0] - x, x - caixas[:, 2]), 0.0)
+    dy_min = np.maximum(np.maximum(caixas[:, 1] - y, y - caixas[:, 3]), 0.0)
+    # Face mais próxima e mais distante em cada eixo
+    esquerda = 2.0 * x <= caixas[:, 0] + caixas[:, 2]
+    abaixo = 2.0 * y <= caixas[:, 1] + caixas[:, 3]
+    x_perto = np.where(esquerda, caixas[:, 0], caixas[:, 2]) - x
+    x_longe = np.where(esquerda, caixas[:, 2], caixas[:, 0]) - x
+    y_perto = np.where(abaixo, caixas[:, 1], caixas[:, 3]) - y
+    y_longe = np.where(abaixo, caixas[:, 3], caixas[:, 1]) - y
+    minmax = np.minimum(x_perto ** 2 + y_longe ** 2, y_perto ** 2 + x_longe ** 2)
+    return dx_min ** 2 + dy_min ** 2, minmax
+
+
+def _primeiro_minimo(grupos, valores):
+    """Posição do menor valor de cada grupo (grupos em ordem crescente e contíguos)"""
+    inicio = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1]])
+    minimos = np.minimum.reduceat(valores, inicio)
+    posicoes = np.flatnonzero(valores == np.repeat(minimos, np.diff(np.r_[inicio, len(valores)])))
+    return posicoes[np.r_[True, grupos[posicoes][1:] != grupos[posicoes][:-1]]]
+
+
+class IndiceEspacial:
+    """
+    R-tree empacotada por STR sobre caixas (xmin, ymin, xmax, ymax); pontos são caixas degeneradas.
+    Cada nível guarda as caixas dos seus nós e a ordem dos filhos no nível de baixo: os filhos do
+    nó j são filhos[j·M:(j + 1)·M], de modo que a árvore inteira cabe em poucos arrays.
+    """
+
+    def __init__(self, caixas, capacidade=CAPACIDADE_NO):
+        self.caixas = np.asarray(caixas, dtype=np.float64).reshape(-1, 4)
+        self.capacidade = capacidade
+        self.niveis = []
+
+        caixas_nivel = self.caixas
+        while len(caixas_nivel) > 0:
+            filhos = self._ordem_str(caixas_nivel, capacidade)
+            ordenadas = caixas_nivel[filhos]
+            grupos = np.arange(0, len(filhos), capacidade)
+            caixas_nivel = np.column_stack([
+                np.minimum.reduceat(ordenadas[:, 0], grupos),
+                np.minimum.reduceat(ordenadas[:, 1], grupos),
+                np.maximum.reduceat(ordenadas[:, 2], grupos),
+                np.maximum.reduceat(ordenadas[:, 3], grupos),
+            ])
+            self.niveis.append((caixas_nivel, filhos))
+            if len(caixas_nivel) == 1:
+                break
+        # Da raiz às folhas
+        self.niveis.reverse()
+
+    def __len__(self):
+        return len(self.caixas)
+
+    @staticmethod
+    def _ordem_str(caixas, capacidade):
+        """Ordem Sort-Tile-Recursive: faixas verticais por x central, ordenadas por y dentro da faixa"""
+        n = len(caixas)
+        n_folhas = -(-n // capacidade)
+        n_faixas = int(np.ceil(np.sqrt(n_folhas)))
+        cx = caixas[:, 0] + caixas[:, 2]
+        cy = caixas[:, 1] + caixas[:, 3]
+        por_x = np.argsort(cx, kind='stable')
+        faixa = np.arange(n) // (n_faixas * capacidade)
+        return por_x[np.lexsort((cy[por_x], faixa))]
+
+    def _expandir(self, consultas, nos, filhos):
+        """Substitui cada par (consulta, nó) pelos pares (consulta, filho)"""
+        inicio = nos * self.capacidade
+        quantidade = np.minimum(inicio + self.capacidade, len(filhos)) - inicio
+        deslocamento = np.arange(quantidade.sum()) - np.repeat(np.cumsum(quantidade) - quantidade, quantidade)
+        return np.repeat(consultas, quantidade), filhos[np.repeat(inicio, quantidade) + deslocamento]
+
+    def consultar_janelas(self, janelas):
+        """
+        Pares (janela, item) das caixas que se sobrepõem a cada janela (xmin, ymin, xmax, ymax).
+        Retorna dois arrays de índices, ordenados por janela.
+        """
+        janelas = np.asarray(janelas, dtype=np.float64).reshape(-1, 4)
+        consultas = np.arange(len(janelas))
+        nos = np.zeros(len(janelas), dtype=np.int64)
+        if len(self.caixas) == 0:
+            return consultas[:0], nos[:0]
+
+        for caixas_nivel, filhos in self.niveis:
+            dentro = _intersecta(caixas_nivel[nos], janelas[consultas])
+            consultas, nos = self._expandir(consultas[dentro], nos[dentro], filhos)
+        dentro = _intersecta(self.caixas[nos], janelas[consultas])
+        consultas, nos = consultas[dentro], nos[dentro]
+        ordem = np.lexsort((nos, consultas))
+        return consultas[ordem], nos[ordem]
+
+    def na_janela(self, xmin, ymin, xmax, ymax):
+        """Índices (crescentes) dos itens que se sobrepõem a uma janela"""
+        return self.consultar_janelas([(xmin, ymin, xmax, ymax)])[1]
+
+    def mais_proximos(self, x, y):
+        """
+        Item mais próximo de cada ponto (x, y) e a distância até a sua caixa (exata para pontos).
+        O limite de cada consulta começa na distância ao item alcançado descendo sempre pelo filho
+        mais próximo e diminui, a cada nível, até a menor MINMAXDIST dos nós candidatos; os nós
+        mais distantes que o limite são descartados.
+        """
+        x = np.atleast_1d(np.asarray(x, dtype=np.float64))
+        y = np.atleast_1d(np.asarray(y, dtype=np.float64))
+        if len(self.caixas) == 0:
+            return np.full(len(x), -1, dtype=np.int64), np.full(len(x), np.inf)
+
+        # Limite inicial: item alcançado descendo sempre pelo filho mais próximo
+        todas = np.arange(len(x))
+        nos = np.zeros(len(x), dtype=np.int64)
+        caixas_abaixo = [caixas_nivel for caixas_nivel, _ in self.niveis[1:]] + [self.caixas]
+        for (_, filhos), caixas in zip(self.niveis, caixas_abaixo):
+            consultas, candidatos = self._expandir(todas, nos, filhos)
+            menor, _ = _distancias_caixa(caixas[candidatos], x[consultas], y[consultas])
+            escolhidos = _primeiro_minimo(consultas, menor)
+            nos = candidatos[escolhidos]
+        limite = menor[escolhidos]
+
+        consultas = todas
+        nos = np.zeros(len(x), dtype=np.int64)
+        for caixas_nivel, filhos in self.niveis:
+            menor, minmax = _distancias_caixa(caixas_nivel[nos], x[consultas], y[consultas])
+            # Os pares ficam agrupados por consulta, em ordem crescente
+            inicio = np.flatnonzero(np.r_[True, consultas[1:] != consultas[:-1]])
+            limite[consultas[inicio]] = np.minimum(limite[consultas[inicio]], np.minimum.reduceat(minmax, inicio))
+            validos = menor <= limite[consultas]
+            consultas, nos = self._expandir(consultas[validos], nos[validos], filhos)
+
+        menor, _ = _distancias_caixa(self.caixas[nos], x[consultas], y[consultas])
+        escolhidos = _primeiro_minimo(consultas, menor)
+        return nos[escolhidos], np.sqrt(menor[escolhidos])
+
+
+class GeometriaSubBacias:
+    """Polígonos das sub-bacias em arrays planos x/y, com área, centroide, perímetro e caixas"""
+
+    def __init__(self, ids, x, y, inicio):
+        self.ids = list(ids)
+        self.posicao = {id_: i for i, id_ in enumerate(self.ids)}
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.inicio = np.asarray(inicio, dtype=np.int64)
+
+        primeiros = self.inicio[:-1]
+        n_vertices = np.diff(self.inicio)
+        if len(primeiros) == 0:
+            vazio = np.zeros(0)
+            self.area = self.perimetro = self.centroide_x = self.centroide_y = vazio
+            self.caixas = np.zeros((0, 4))
+            return
+
+        # Vértice seguinte de cada vértice, fechando cada anel no seu primeiro vértice
+        seguinte = np.arange(1, len(self.x) + 1)
+        seguinte[self.inicio[1:] - 1] = primeiros
+
+        # Coordenadas relativas ao primeiro vértice do polígono (evita cancelamento em UTM)
+        x0 = np.repeat(self.x[primeiros], n_vertices)
+        y0 = np.repeat(self.y[primeiros], n_vertices)
+        xr, yr = self.x - x0, self.y - y0
+        xs, ys = xr[seguinte], yr[seguinte]
+
+        cruz = xr * ys - xs * yr
+        dobro_area = np.add.reduceat(cruz, primeiros)
+        self.area = np.abs(dobro_area) / 2.0
+        self.perimetro = np.add.reduceat(np.hypot(xs - xr, ys - yr), primeiros)
+
+        # Polígonos degenerados (área nula) ficam com a média dos vértices
+        media_x = np.add.reduceat(xr, primeiros) / n_vertices
+        media_y = np.add.reduceat(yr, primeiros) / n_vertices
+        com_area = dobro_area != 0
+        divisor = np.where(com_area, 3.0 * dobro_area, 1.0)
+        cx = np.where(com_area, np.add.reduceat((xr + xs) * cruz, primeiros) / divisor, media_x)
+        cy = np.where(com_area, np.add.reduceat((yr + ys) * cruz, primeiros) / divisor, media_y)
+        self.centroide_x = cx + self.x[primeiros]
+        self.centroide_y = cy + self.y[primeiros]
+
+        self.caixas = np.column_stack([
+            np.minimum.reduceat(self.x, primeiros),
+            np.minimum.reduceat(self.y, primeiros),
+            np.maximum.reduceat(self.x, primeiros),
+            np.maximum.reduceat(self.y, primeiros),
+        ])
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def de_pontos(cls, pontos):
+        """Agrupa os vértices (Name, X, Y) por sub-bacia, na ordem da primeira aparição"""
+        codigos, ids = pd.factorize(pontos['Name'].to_numpy())
+        ordem = np.argsort(codigos, kind='stable')
+        inicio = np.concatenate([[0], np.cumsum(np.bincount(codigos, minlength=len(ids)))])
+        return cls(ids, pontos['X'].to_numpy()[ordem], pontos['Y'].to_numpy()[ordem], inicio)
+
+    def vertices(self, indices=None):
+        """Lista de arrays (n, 2) com os vértices de cada polígono (todos ou os indicados)"""
+        xy = np.column_stack([self.x, self.y])
+        if indices is None:
+            return np.split(xy, self.inicio[1:-1])
+        return [xy[self.inicio[i]:self.inicio[i + 1]] for i in indices]
+
+
+class GeometriaModelo:
+    """Polígonos das sub-bacias e coordenadas dos nós de um modelo, com os índices espaciais"""
+
+    def __init__(self, poligonos, coordenadas):
+        self.sub_bacias = GeometriaSubBacias.de_pontos(poligonos)
+        coordenadas = coordenadas.drop_duplicates('Name')
+        self.ids_nos = coordenadas['Name'].tolist()
+        self.x_nos = coordenadas['X'].to_numpy()
+        self.y_nos = coordenadas['Y'].to_numpy()
+        self.indice_sub_bacias = IndiceEspacial(self.sub_bacias.caixas)
+        self.indice_nos = IndiceEspacial(np.column_stack([self.x_nos, self.y_nos, self.x_nos, self.y_nos]))
+
+    def sub_bacias_na_janela(self, xmin, ymin, xmax, ymax):
+        """Sub-bacias cuja caixa envolvente se sobrepõe à janela"""
+        return [self.sub_bacias.ids[i] for i in self.indice_sub_bacias.na_janela(xmin, ymin, xmax, ymax)]
+
+    def nos_mais_proximos(self, x, y):
+        """Nó mais próximo de cada ponto e a distância (m)"""
+        indices, distancias = self.indice_nos.mais_proximos(x, y)
+        return [self.ids_nos[i] if i >= 0 else None for i in indices], distancias
+
+    def extensao(self):
+        """Caixa (xmin, ymin, xmax, ymax) de todos os polígonos e nós"""
+        caixas = np.vstack([self.sub_bacias.caixas, self.indice_nos.caixas])
+        if len(caixas) == 0:
+            return None
+        return caixas[:, 0].min(), caixas[:, 1].min(), caixas[:, 2].max(), caixas[:, 3].max()
+
+    def atributos(self):
+        """
+        DataFrame indexado pelo nome com XCEN, YCEN, PERI e APOL: centroide, perímetro e área dos
+        polígonos das sub-bacias e a coordenada dos nós (sem perímetro nem área)
+        """
+        poligonos = pd.DataFrame({
+            'XCEN': self.sub_bacias.centroide_x,
+            'YCEN': self.sub_bacias.centroide_y,
+            'PERI': self.sub_bacias.perimetro,
+            'APOL': self.sub_bacias.area / 1e4,
+        }, index=self.sub_bacias.ids)
+        nos = pd.DataFrame({'XCEN': self.x_nos, 'YCEN': self.y_nos, 'PERI': np.nan, 'APOL': np.nan},
+                           index=self.ids_nos)
+        nos = nos[~nos.index.isin(poligonos.index)]
+        tabela = pd.concat([poligonos, nos]) if len(nos) else poligonos
+        tabela.index.name = 'NOME'
+        return tabela[COLUNAS_GEOMETRIA]
+
+
+def geometria_modelo(modelo):
+    """GeometriaModelo do modelo, reaproveitada enquanto [Polygons] e [COORDINATES] não mudarem"""
+    blocos = [_bloco_geometria(modelo, secao) for secao in ('POLYGONS', 'COORDINATES')]
+    chave = hashlib.sha1(blocos[0] + b'|' + blocos[1]).hexdigest()
+    geometria = _cache_geometrias.get(chave)
+    if geometria is not None:
+        _cache_geometrias.move_to_end(chave)
+        return geometria
+
+    geometria = GeometriaModelo(*[_ler_pontos(bloco) for bloco in blocos])
+    _cache_geometrias[chave] = geometria
+    while len(_cache_geometrias) > MAX_GEOMETRIAS_CACHE:
+        _cache_geometrias.popitem(last=False)
+    return geometria
+
+
+def atributos_geometria(modelo):
+    """Atributos de geometria (COLUNAS_GEOMETRIA) por sub-bacia e por nó"""
+    return geometria_modelo(modelo).atributos()
+
+
+def limpar_cache_geometrias():
+    """Esvazia o cache de geometrias"""
+    _cache_geometrias.clear()
+
+
+def figura_mapa_inundacao(caminho_figura, geometria, classes, janela=None, titulo=None):
+    """
+    Mapa das sub-bacias coloridas pela classe CLBO; classes = {sub-bacia: classe}.
+    janela (xmin, ymin, xmax, ymax) limita o desenho às sub-bacias que a cruzam (consulta no índice).
+    A assinatura segue a de swmm_figures, para envio ao PoolFiguras.
+    """
+    from matplotlib.collections import PolyCollection
+    from matplotlib.figure import Figure
+    from matplotlib.patches import Patch
+
+    sub_bacias = geometria.sub_bacias
+    if janela is None:
+        indices = np.arange(len(sub_bacias))
+        janela = geometria.extensao()
+    else:
+        indices = geometria.indice_sub_bacias.na_janela(*janela)
+
+    # Cor de cada polígono por código da classe (sem laço sobre os polígonos)
+    paleta = np.array(list(CORES_CLASSES.values()) + [COR_SEM_CLASSE], dtype=object)
+    codigos = pd.Categorical(pd.Series(classes).reindex([sub_bacias.ids[i] for i in indices]),
+                             categories=list(CORES_CLASSES)).codes
+    cores = paleta[np.where(codigos < 0, len(CORES_CLASSES), codigos)]
+
+    muitos = len(indices) > MAX_POLIGONOS_VETORIAIS
+    colecao = PolyCollection(sub_bacias.vertices(indices), facecolors=list(cores),
+                             edgecolors='none' if muitos else '#555555', linewidths=0.3, rasterized=muitos)
+
+    figura = Figure(figsize=(10, 10))
+    eixo = figura.subplots()
+    eixo.add_collection(colecao)
+    if janela is not None and not muitos:
+        visiveis = geometria.indice_nos.na_janela(*janela)
+        eixo.plot(geometria.x_nos[visiveis], geometria.y_nos[visiveis], 'k.', markersize=2)
+    if janela is not None:
+        eixo.set_xlim(janela[0], janela[2])
+        eixo.set_ylim(janela[1], janela[3])
+    eixo.set_aspect('equal')
+    eixo.ticklabel_format(useOffset=False, style='plain')
+    eixo.set_xlabel("X [m]")
+    eixo.set_ylabel("Y [m]")
+    if titulo:
+        eixo.set_title(titulo)
+    legenda = [Patch(facecolor=cor, label=classe) for classe, cor in CORES_CLASSES.items()]
+    legenda.append(Patch(facecolor=COR_SEM_CLASSE, label="Sem classe"))
+    eixo.legend(handles=legenda, loc='upper center', bbox_to_anchor=(0.5, -0.1), ncol=2, fontsize='small')
+    figura.tight_layout()
+    figura.savefig(caminho_figura, dpi=150)
+    return caminho_figura
+
+
+def classes_dataset(pasta_dataset, cenario):
+    """{NOME: CLBO} dos registros de um cenário do dataset particionado"""
+    from scenarios_dataset import ler_dataset
+    registros = ler_dataset(pasta_dataset, colunas=['NOME', 'CLBO'], cenarios=[cenario])
+    registros = registros.dropna(subset=['CLBO'])
+    return dict(zip(registros['NOME'], registros['CLBO'].astype(str)))
+
+
+def mapas_inundacao(caminho_inp, pasta_dataset, cenarios, pasta_saida, janela=None, formato='png',
+                    n_processos=None):
+    """
+    Um mapa de inundação por cenário, todos sobre a mesma geometria (lida e indexada uma vez)
+    e desenhados em paralelo pelo pool de figuras. Retorna os erros por arquivo.
+    """
+    from swmm_figures import N_PROCESSOS_FIGURAS, PoolFiguras
+
+    geometria = geometria_modelo(ler_modelo_inp(caminho_inp))
+    print(f"🗺️ {len(geometria.sub_bacias)} polígonos e {len(geometria.ids_nos)} nós indexados")
+    os.makedirs(pasta_saida, exist_ok=True)
+
+    n_processos = N_PROCESSOS_FIGURAS if n_processos is None else n_processos
+    with PoolFiguras(min(n_processos, len(cenarios))) as pool:
+        for cenario in cenarios:
+            classes = classes_dataset(pasta_dataset, cenario)
+            caminho = os.path.join(pasta_saida, f"mapa_inundacao_{cenario}.{formato}")
+            pool.enviar(figura_mapa_inundacao, caminho, geometria, classes, janela, f"Scenario {cenario}")
+        return pool.aguardar()
+
+
+if __name__ == "__main__":
+    from scenarios_dataset import PASTA_DATASET, cenarios_no_dataset
+
+    parser = argparse.ArgumentParser(description="Geometria, índice espacial e mapas de inundação de um .inp")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    mapa = sub.add_parser("mapa", help="mapas das classes CLBO por sub-bacia")
+    mapa.add_argument("inp", help=".inp com [Polygons] e [COORDINATES]")
+    mapa.add_argument("--dataset", default=PASTA_DATASET, help="pasta do dataset particionado")
+    mapa.add_argument("--cenarios", nargs="+", help="códigos dos cenários (padrão: todos do dataset)")
+    mapa.add_argument("--saida", default="mapas_inundacao", help="pasta dos mapas")
+    mapa.add_argument("--janela", nargs=4, type=float, metavar=("XMIN", "YMIN", "XMAX", "YMAX"),
+                      help="desenha apenas a janela indicada")
+    mapa.add_argument("--formato", default="png", help="png, pdf, svg, ...")
+    mapa.add_argument("--processos", type=int, help="processos de desenho")
+
+    consulta = sub.add_parser("consultar", help="sub-bacias em uma janela e nós mais próximos de pontos")
+    consulta.add_argument("inp", help=".inp com [Polygons] e [COORDINATES]")
+    consulta.add_argument("--janela", nargs=4, type=float, metavar=("XMIN", "YMIN", "XMAX", "YMAX"))
+    consulta.add_argument("--ponto", nargs=2, type=float, action="append", metavar=("X", "Y"), default=[])
+
+    args = parser.parse_args()
+
+    if args.comando == "mapa":
+        cenarios = args.cenarios or cenarios_no_dataset(args.dataset)
+        erros = mapas_inundacao(args.inp, args.dataset, cenarios, args.saida, args.janela, args.formato,
+                                args.processos)
+        raise SystemExit(1 if erros else 0)
+
+    geometria = geometria_modelo(ler_modelo_inp(args.inp))
+    if args.janela:
+        ids = geometria.sub_bacias_na_janela(*args.janela)
+        print(f"🔎 {len(ids)} sub-bacia(s) na janela: {' '.join(ids)}")
+    if args.ponto:
+        pontos = np.array(args.ponto)
+        nos, distancias = geometria.nos_mais_proximos(pontos[:, 0], pontos[:, 1])
+        for (x, y), no, distancia in zip(pontos, nos, distancias):
+            print(f"📍 ({x:.3f}, {y:.3f}) → {no} a {distancia:.2f} m")
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import time
+
+from pyswmm import Simulation
+
+## Cache de arquivos hotstart do SWMM
+#
+# O estado inicial de uma variante (umidade do solo, armazenamento nas
+# sub-bacias e na rede) é obtido por uma simulação de aquecimento: o modelo da
+# variante com a chuva antecedente (ou sem chuva) durante o período de
+# aquecimento, gravando o hotstart no final. O arquivo fica em cache pela
+# impressão digital das seções que determinam esse estado (rede, sub-bacias,
+# infiltração e opções de cálculo) e pelos parâmetros antecedentes. Cada
+# entrada é um arquivo <chave>.hsf com um .json ao lado; o uso atualiza o mtime
+# e a limpeza remove os menos usados recentemente (LRU) acima dos limites de
+# quantidade e de tamanho. Não há manifesto compartilhado, de modo que vários
+# processos do pool podem usar a mesma pasta. Quem gera uma chave ausente a
+# reserva com <chave>.lock (criação exclusiva, O_CREAT|O_EXCL); os demais
+# processos que precisam da mesma chave esperam o hotstart em vez de repetir o
+# aquecimento. Uma trava de processo que já terminou (ou mais velha que
+# MAX_ESPERA_S) é considerada abandonada e removida.
+
+PASTA_HOTSTART = "hotstart"
+MAX_ARQUIVOS = 200
+MAX_MB = 2048
+
+# Espera por um hotstart sendo gerado por outro processo
+INTERVALO_ESPERA_S = 0.2
+MAX_ESPERA_S = 6 * 3600
+
+# Parâmetros do estado antecedente aceitos pela varredura
+PARAMETROS_HOTSTART = ('serie_antecedente', 'fator_antecedente', 'aquecimento_min')
+
+# Seções do .inp que influenciam o estado ao fim do aquecimento
+SECOES_ESTADO = (
+    'RAINGAGES', 'SUBCATCHMENTS', 'SUBAREAS', 'INFILTRATION', 'AQUIFERS', 'GROUNDWATER', 'LID_USAGE',
+    'JUNCTIONS', 'OUTFALLS', 'STORAGE', 'DIVIDERS', 'CONDUITS', 'XSECTIONS', 'LOSSES',
+    'DWF', 'INFLOWS', 'STREETS', 'INLETS', 'INLET_USAGE',
+)
+OPCOES_ESTADO = (
+    'FLOW_UNITS', 'INFILTRATION', 'FLOW_ROUTING', 'LINK_OFFSETS', 'MIN_SLOPE', 'ALLOW_PONDING',
+    'DRY_DAYS', 'WET_STEP', 'DRY_STEP', 'ROUTING_STEP', 'VARIABLE_STEP', 'INERTIAL_DAMPING',
+)
+
+
+def chave_hotstart(modelo, parametros_antecedentes):
+    """Impressão digital (sha1) do estado antecedente de um ModeloSWMM"""
+    h = hashlib.sha1()
+    for secao in SECOES_ESTADO:
+        # Série e fator (SCF) dos pluviômetros são os do evento, não os do aquecimento
+        for partes in modelo.secoes.get(secao, []):
+            h.update(' '.join(partes[:3] if secao == 'RAINGAGES' else partes).encode('utf-8'))
+            h.update(b'\n')
+        h.update(b'|')
+    for opcao in OPCOES_ESTADO:
+        h.update(f"{opcao}={modelo.opcao(opcao, '')};".encode('utf-8'))
+    h.update(json.dumps(parametros_antecedentes, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+def gerar_hotstart(caminho_inp, caminho_hsf):
+    """Executa a simulação de aquecimento e grava o estado final em caminho_hsf"""
+    base = os.path.splitext(caminho_inp)[0]
+    with Simulation(caminho_inp, base + ".rpt", base + ".out") as sim:
+        for _ in sim:
+            pass
+        sim.save_hotstart(caminho_hsf)
+    return caminho_hsf
+
+
+class CacheHotstart:
+    """Pasta de hotstarts indexados pela chave do estado antecedente, com limpeza LRU"""
+
+    def __init__(self, pasta=PASTA_HOTSTART, max_arquivos=MAX_ARQUIVOS, max_mb=MAX_MB):
+        self.pasta = pasta
+        self.max_arquivos = max_arquivos
+        self.max_bytes = max_mb * 2 ** 20
+        os.makedirs(pasta, exist_ok=True)
+
+    def caminho(self, chave):
+        return os.path.join(self.pasta, f"{chave}.hsf")
+
+    def obter(self, chave):
+        """Caminho do hotstart em cache (None se ausente); marca o arquivo como usado"""
+        caminho = self.caminho(chave)
+        try:
+            os.utime(caminho)
+        except OSError:
+            return None
+        return caminho
+
+    def registrar(self, chave, caminho_gerado, parametros=None):
+        """Move um hotstart recém-gerado para o cache e aplica os limites"""
+        destino = self.caminho(chave)
+        os.replace(caminho_gerado, destino)
+        with open(os.path.join(self.pasta, f"{chave}.json"), 'w', encoding='utf-8') as f:
+            json.dump({'parametros': parametros, 'criado': time.strftime('%Y-%m-%dT%H:%M:%S')}, f)
+        self.limpar()
+        return destino
+
+    def _trava(self, chave):
+        return os.path.join(self.pasta, f"{chave}.lock")
+
+    def _travar(self, chave):
+        """Cria a trava da chave de forma atômica; False se outro processo já a criou"""
+        try:
+            descritor = os.open(self._trava(chave), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(descritor, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def _destravar(self, chave):
+        try:
+            os.remove(self._trava(chave))
+        except OSError:
+            pass
+
+    def _trava_abandonada(self, chave):
+        """Trava de um processo que já terminou ou mais velha que MAX_ESPERA_S"""
+        caminho = self._trava(chave)
+        try:
+            idade = time.time() - os.path.getmtime(caminho)
+            with open(caminho, 'r', encoding='utf-8') as f:
+                pid = int(f.read() or 0)
+        except (OSError, ValueError):
+            return False
+        if idade > MAX_ESPERA_S:
+            return True
+        if pid and os.name == 'posix':
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+        return False
+
+    def obter_ou_gerar(self, chave, gerar, parametros=None):
+        """
+        Retorna (caminho, reaproveitado). Se ausente, gerar(caminho_hsf) produz o
+        hotstart em um caminho temporário, que é então registrado no cache; enquanto
+        outro processo gera a mesma chave, espera por ele.
+        """
+        while True:
+            caminho = self.obter(chave)
+            if caminho is not None:
+                return caminho, True
+            if self._travar(chave):
+                break
+            if self._trava_abandonada(chave):
+                self._destravar(chave)
+            else:
+                time.sleep(INTERVALO_ESPERA_S)
+
+        temporario = os.path.join(self.pasta, f"{chave}.{os.getpid()}.novo.hsf")
+        try:
+            # Gerado por outro processo entre a consulta e a trava
+            caminho = self.obter(chave)
+            if caminho is not None:
+                return caminho, True
+            gerar(temporario)
+            return self.registrar(chave, temporario, parametros), False
+        finally:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            self._destravar(chave)
+
+    def entradas(self):
+        """Lista (mtime, bytes, chave) das entradas, da mais antiga para a mais recente"""
+        entradas = []
+        for nome in os.listdir(self.pasta):
+            if not nome.endswith('.hsf') or nome.count('.') > 1:
+                continue
+            try:
+                info = os.stat(os.path.join(self.pasta, nome))
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, nome[:-4]))
+        return sorted(entradas)
+
+    def limpar(self):
+        """Remove as entradas menos usadas recentemente até respeitar os limites; retorna as removidas"""
+        entradas = self.entradas()
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        removidas = []
+        for _, tamanho, chave in entradas:
+            if len(entradas) - len(removidas) <= self.max_arquivos and total <= self.max_bytes:
+                break
+            try:
+                os.remove(self.caminho(chave))
+            except OSError:
+                continue  # em uso por outro processo (Windows)
+            if os.path.exists(os.path.join(self.pasta, f"{chave}.json")):
+                os.remove(os.path.join(self.pasta, f"{chave}.json"))
+            total -= tamanho
+            removidas.append(chave)
+        return removidas
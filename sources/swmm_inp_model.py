@@ -0,0 +1,259 @@
+import os
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+## Modelo SWMM (.inp) lido em uma única passada
+#
+# Todas as seções são tokenizadas de uma vez e guardadas como tabelas com
+# colunas em arrays (float64 para campos numéricos, object para textos).
+# As seções de geometria ([COORDINATES], [VERTICES], [Polygons], ...) não são
+# tokenizadas na leitura: apenas a posição no arquivo é registrada e o
+# conteúdo é lido sob demanda por ModeloSWMM.geometria().
+
+# Quantidade máxima de modelos mantidos em memória
+MAX_MODELOS_CACHE = 32
+
+SECOES_GEOMETRIA = {'COORDINATES', 'VERTICES', 'POLYGONS', 'SYMBOLS', 'LABELS', 'MAP', 'BACKDROP'}
+
+# Esquema tipado das seções usadas pelos extratores (nome da coluna, tipo)
+ESQUEMAS = {
+    'SUBCATCHMENTS': [('Name', str), ('RainGage', str), ('Outlet', str), ('Area', float),
+                      ('Imperv', float), ('Width', float), ('Slope', float), ('CurbLen', float)],
+    'JUNCTIONS': [('Name', str), ('Elevation', float), ('MaxDepth', float), ('InitDepth', float),
+                  ('SurDepth', float), ('Aponded', float)],
+    'OUTFALLS': [('Name', str), ('Elevation', float), ('Type', str)],
+    'CONDUITS': [('Name', str), ('FromNode', str), ('ToNode', str), ('Length', float),
+                 ('Roughness', float), ('InOffset', float), ('OutOffset', float),
+                 ('InitFlow', float), ('MaxFlow', float)],
+    'XSECTIONS': [('Link', str), ('Shape', str), ('Geom1', float), ('Geom2', float),
+                  ('Geom3', float), ('Geom4', float), ('Barrels', float)],
+    'INFILTRATION': [('Subcatchment', str), ('Param1', float), ('Param2', float), ('Param3', float),
+                     ('Param4', float), ('Param5', float)],
+    'RAINGAGES': [('Name', str), ('Format', str), ('Interval', str), ('SCF', float),
+                  ('Source', str), ('SourceName', str)],
+}
+
+ESQUEMA_GEOMETRIA = [('Name', str), ('X', float), ('Y', float)]
+
+_cache_modelos = OrderedDict()
+
+
+def _converter_float(valor):
+    """Converte um token para float (NaN se não for numérico)"""
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def converter_hora_em_horas(valor):
+    """Converte 'h:mm[:ss]' ou horas decimais para horas (float)"""
+    if ':' not in valor:
+        return float(valor)
+    partes = [float(p) for p in valor.split(':')]
+    while len(partes) < 3:
+        partes.append(0.0)
+    h, m, s = partes[:3]
+    return h + m / 60.0 + s / 3600.0
+
+
+class TabelaInp:
+    """Seção do .inp guardada em linhas de tokens e colunas tipadas"""
+
+    def __init__(self, nome, linhas, esquema=None):
+        self.nome = nome
+        self.linhas = linhas
+        self.ids = [partes[0] for partes in linhas]
+        self.posicao = {id_: i for i, id_ in enumerate(self.ids)}
+        self.colunas = OrderedDict()
+
+        for j, (coluna, tipo) in enumerate(esquema or []):
+            valores = [partes[j] if j < len(partes) else None for partes in linhas]
+            if tipo is float:
+                self.colunas[coluna] = np.array([_converter_float(v) for v in valores], dtype=np.float64)
+            else:
+                self.colunas[coluna] = np.array(valores, dtype=object)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self.posicao
+
+    def coluna(self, nome):
+        """Retorna a coluna tipada pelo nome do esquema"""
+        return self.colunas[nome]
+
+    def registro(self, id_):
+        """Retorna os tokens da linha de um ID (None se não existir)"""
+        i = self.posicao.get(id_)
+        return self.linhas[i] if i is not None else None
+
+    def como_dict(self):
+        """Retorna um OrderedDict ID → tokens (a última ocorrência prevalece)"""
+        return OrderedDict((partes[0], partes) for partes in self.linhas)
+
+
+class SerieTemporal:
+    """
+    Série da seção [TIMESERIES] com tempos em horas desde o início da simulação
+    (START_DATE/START_TIME para registros com data, como no SWMM)
+    """
+
+    def __init__(self, nome, tempos_horas, valores):
+        self.nome = nome
+        self.tempos_horas = np.asarray(tempos_horas, dtype=np.float64)
+        self.valores = np.asarray(valores, dtype=np.float64)
+
+    def __len__(self):
+        return len(self.valores)
+
+
+class ModeloSWMM:
+    """Conteúdo de um .inp: seções tipadas, opções e séries temporais"""
+
+    def __init__(self, caminho_inp):
+        self.caminho = caminho_inp
+        self.secoes = OrderedDict()          # nome → lista de tokens por linha
+        self.posicoes_geometria = {}         # nome → (byte inicial, byte final)
+        self._tabelas = {}
+        self._geometrias = {}
+
+        secao = None
+        inicio_geometria = None
+        posicao = 0
+        with open(caminho_inp, 'rb') as f:
+            for bruta in f:
+                inicio_linha = posicao
+                posicao += len(bruta)
+                texto = bruta.strip()
+
+                # Cabeçalho de seção
+                if texto.startswith(b'[') and texto.endswith(b']'):
+                    if secao in SECOES_GEOMETRIA:
+                        self.posicoes_geometria[secao] = (inicio_geometria, inicio_linha)
+                    secao = texto[1:-1].decode('utf-8', errors='ignore').strip().upper()
+                    if secao in SECOES_GEOMETRIA:
+                        inicio_geometria = posicao
+                    else:
+                        self.secoes.setdefault(secao, [])
+                    continue
+
+                # Geometria: apenas a posição é registrada
+                if secao is None or secao in SECOES_GEOMETRIA:
+                    continue
+
+                linha = bruta.decode('utf-8', errors='ignore').split(';', 1)[0].strip()
+                if linha:
+                    self.secoes[secao].append(linha.split())
+
+        if secao in SECOES_GEOMETRIA:
+            self.posicoes_geometria[secao] = (inicio_geometria, posicao)
+
+        self.opcoes = OrderedDict(
+            (partes[0].upper(), ' '.join(partes[1:])) for partes in self.secoes.get('OPTIONS', [])
+        )
+        self.series = self._ler_series(self.secoes.get('TIMESERIES', []), self._inicio_simulacao())
+
+    def _inicio_simulacao(self):
+        """START_DATE/START_TIME como datetime (None se a data estiver ausente ou inválida)"""
+        try:
+            data = datetime.strptime(self.opcao('START_DATE', ''), '%m/%d/%Y')
+            return data + timedelta(hours=converter_hora_em_horas(self.opcao('START_TIME', '0:00')))
+        except ValueError:
+            return None
+
+    @staticmethod
+    def _ler_series(linhas, inicio=None):
+        """
+        Agrupa as linhas de [TIMESERIES] por nome da série. Os registros com data contam a partir
+        de inicio (START da simulação); sem ele, a partir da data do primeiro registro da série
+        """
+        agrupadas = OrderedDict()
+        for partes in linhas:
+            if len(partes) < 3 or partes[1].upper() == 'FILE':
+                continue
+            agrupadas.setdefault(partes[0], []).append(partes[1:])
+
+        series = OrderedDict()
+        for nome, registros in agrupadas.items():
+            tempos = []
+            valores = []
+            data_inicial = None
+            for registro in registros:
+                try:
+                    if len(registro) >= 3:
+                        data = datetime.strptime(registro[0], '%m/%d/%Y')
+                        data_inicial = data_inicial or inicio or data
+                        horas = (data - data_inicial).total_seconds() / 3600.0
+                        horas += converter_hora_em_horas(registro[1])
+                        valor = float(registro[2])
+                    else:
+                        horas = converter_hora_em_horas(registro[0])
+                        valor = float(registro[1])
+                except ValueError:
+                    continue
+                tempos.append(horas)
+                valores.append(valor)
+            series[nome] = SerieTemporal(nome, tempos, valores)
+        return series
+
+    def tabela(self, secao):
+        """Retorna a TabelaInp de uma seção (tabela vazia se ausente)"""
+        nome = secao.upper()
+        if nome in SECOES_GEOMETRIA:
+            return self.geometria(nome)
+        if nome not in self._tabelas:
+            self._tabelas[nome] = TabelaInp(nome, self.secoes.get(nome, []), ESQUEMAS.get(nome))
+        return self._tabelas[nome]
+
+    def geometria(self, secao):
+        """Lê sob demanda uma seção de geometria como tabela Name, X, Y"""
+        nome = secao.upper()
+        if nome in self._geometrias:
+            return self._geometrias[nome]
+
+        linhas = []
+        intervalo = self.posicoes_geometria.get(nome)
+        if intervalo is not None:
+            inicio, fim = intervalo
+            with open(self.caminho, 'rb') as f:
+                f.seek(inicio)
+                bloco = f.read(fim - inicio).decode('utf-8', errors='ignore')
+            for linha in bloco.splitlines():
+                linha = linha.split(';', 1)[0].strip()
+                if linha:
+                    linhas.append(linha.split())
+
+        tabela = TabelaInp(nome, linhas, ESQUEMA_GEOMETRIA if nome not in ('MAP', 'BACKDROP') else None)
+        self._geometrias[nome] = tabela
+        return tabela
+
+    def opcao(self, chave, padrao=None):
+        """Retorna o valor textual de uma opção de [OPTIONS]"""
+        return self.opcoes.get(chave.upper(), padrao)
+
+
+def ler_modelo_inp(caminho_inp):
+    """Retorna o ModeloSWMM do .inp, reaproveitando a leitura enquanto o arquivo não mudar"""
+    caminho = os.path.abspath(caminho_inp)
+    info = os.stat(caminho)
+    chave = (caminho, info.st_mtime_ns, info.st_size)
+
+    modelo = _cache_modelos.get(chave)
+    if modelo is not None:
+        _cache_modelos.move_to_end(chave)
+        return modelo
+
+    modelo = ModeloSWMM(caminho)
+    _cache_modelos[chave] = modelo
+    while len(_cache_modelos) > MAX_MODELOS_CACHE:
+        _cache_modelos.popitem(last=False)
+    return modelo
+
+
+def limpar_cache_modelos():
+    """Descarta todos os modelos mantidos em memória"""
+    _cache_modelos.clear()
@@ -0,0 +1,203 @@
+import re
+from datetime import datetime, timedelta
+
+from swmm_inp_model import ler_modelo_inp
+from swmm_rainfall import resumir_serie
+
+## Variantes de um .inp geradas por alteração do texto em memória
+#
+# O .inp base é lido uma única vez; as linhas de dados de cada seção ficam
+# indexadas. Uma variante troca apenas os campos pedidos (série de chuva,
+# fator de escala, %Imperv, CN, declividade, fim da simulação) e devolve o texto completo,
+# preservando comentários, alinhamento e as seções de geometria. O fator de
+# chuva gera uma cópia escalada da série em [TIMESERIES] para a qual os
+# pluviômetros passam a apontar: o SCF do pluviômetro só corrige a neve no SWMM.
+
+# Margem entre o fim da chuva e o fim da simulação (a da maioria dos cenários
+# originais; cenario_04 simula 30 min além da chuva e cenario_06/11 terminam
+# 10 min antes do fim da série TS6)
+MARGEM_SIMULACAO_MIN = 20
+
+# Parâmetros aceitos por ModeloBase.variante
+PARAMETROS_VARIANTE = ('serie', 'fator_chuva', 'imperv', 'cn', 'fator_declividade', 'duracao_simulacao')
+
+_SEPARADOR = re.compile(r'(\s+)')
+
+
+def substituir_campo(linha, posicao, valor):
+    """Troca o campo de índice `posicao` de uma linha de dados mantendo os espaçamentos"""
+    corpo, fim = (linha[:-2], linha[-2:]) if linha.endswith('\r\n') else \
+        (linha[:-1], linha[-1:]) if linha.endswith('\n') else (linha, '')
+    corpo, comentario = (corpo.split(';', 1) + [None])[:2]
+    partes = _SEPARADOR.split(corpo)
+    inicio = 1 if partes and partes[0] == '' else 0
+
+    indice = inicio + 2 * posicao
+    if indice >= len(partes):
+        raise ValueError(f"Linha sem o campo {posicao}: {linha.strip()}")
+    antigo = partes[indice]
+    novo = str(valor)
+    partes[indice] = novo
+
+    # Compensa a diferença de largura no espaço seguinte, se houver
+    if indice + 1 < len(partes) and partes[indice + 1]:
+        folga = len(partes[indice + 1]) - (len(novo) - len(antigo))
+        partes[indice + 1] = ' ' * max(1, folga)
+
+    corpo = ''.join(partes)
+    if comentario is not None:
+        corpo += ';' + comentario
+    return corpo + fim
+
+
+def formatar_numero(valor):
+    """Formata um número sem zeros supérfluos (87.5, 85, 0.015)"""
+    return f"{float(valor):.6g}"
+
+
+class ModeloBase:
+    """Texto do .inp base com as linhas de dados indexadas por seção"""
+
+    def __init__(self, caminho_inp):
+        self.caminho = caminho_inp
+        self.modelo = ler_modelo_inp(caminho_inp)
+        with open(caminho_inp, 'r', encoding='utf-8', errors='ignore', newline='') as f:
+            self.linhas = f.read().splitlines(keepends=True)
+
+        # Linhas de dados (sem comentários e vazias) por seção
+        self.linhas_secao = {}
+        secao = None
+        for i, linha in enumerate(self.linhas):
+            texto = linha.strip()
+            if texto.startswith('[') and texto.endswith(']'):
+                secao = texto[1:-1].strip().upper()
+                self.linhas_secao.setdefault(secao, [])
+            elif secao is not None and texto.split(';', 1)[0].strip():
+                self.linhas_secao[secao].append(i)
+
+        self._indice_opcoes = {
+            self.linhas[i].split()[0].upper(): i for i in self.linhas_secao.get('OPTIONS', [])
+        }
+
+    def resumo_chuva(self, serie):
+        """ResumoChuva da série segundo o formato e o intervalo do primeiro pluviômetro"""
+        if serie not in self.modelo.series:
+            raise KeyError(f"Série temporal inexistente no modelo base: {serie}")
+        pluviometros = self.modelo.tabela('RAINGAGES').linhas
+        formato, intervalo = pluviometros[0][1:3] if pluviometros else ('INTENSITY', '1:00')
+        return resumir_serie(self.modelo.series[serie], formato, intervalo)
+
+    def _trocar_coluna(self, linhas, secao, posicao, valor):
+        for i in self.linhas_secao.get(secao, []):
+            linhas[i] = substituir_campo(linhas[i], posicao, valor)
+
+    def _trocar_opcao(self, linhas, chave, valor):
+        i = self._indice_opcoes.get(chave)
+        if i is None:
+            raise KeyError(f"Opção ausente em [OPTIONS]: {chave}")
+        linhas[i] = substituir_campo(linhas[i], 1, valor)
+
+    def _definir_opcao(self, linhas, chave, valor):
+        """Troca uma opção de [OPTIONS] ou a acrescenta após a última linha da seção"""
+        if chave.upper() in self._indice_opcoes:
+            self._trocar_opcao(linhas, chave.upper(), valor)
+            return
+        ultima = self.linhas_secao['OPTIONS'][-1]
+        fim = linhas[ultima][len(linhas[ultima].rstrip('\r\n')):] or '\n'
+        linhas[ultima] += f"{chave.upper():<20} {valor}{fim}"
+
+    def _inicio_simulacao(self):
+        data = self.modelo.opcao('START_DATE', '01/01/2000')
+        hora = self.modelo.opcao('START_TIME', '00:00:00')
+        h, m, s = (list(map(int, hora.split(':'))) + [0, 0])[:3]
+        return datetime.strptime(data, '%m/%d/%Y') + timedelta(hours=h, minutes=m, seconds=s)
+
+    def _escalar_chuva(self, linhas, serie, fator):
+        """Aponta os pluviômetros para cópias da sua série com os valores multiplicados pelo fator"""
+        nomes = {}
+        for i in self.linhas_secao.get('RAINGAGES', []):
+            partes = self.linhas[i].split(';', 1)[0].split()
+            if len(partes) < 6 or partes[4].upper() != 'TIMESERIES':
+                raise ValueError(f"Fator de chuva exige pluviômetros com fonte TIMESERIES: {self.linhas[i].strip()}")
+            original = serie if serie is not None else partes[5]
+            nomes.setdefault(original, f"{original}_x{formatar_numero(fator)}")
+            linhas[i] = substituir_campo(linhas[i], 5, nomes[original])
+
+        copias = []
+        for i in self.linhas_secao.get('TIMESERIES', []):
+            partes = self.linhas[i].split(';', 1)[0].split()
+            if partes[0] not in nomes or len(partes) < 3 or partes[1].upper() == 'FILE':
+                continue
+            valor = len(partes) - 1  # "[data] hora valor"
+            copia = substituir_campo(self.linhas[i], 0, nomes[partes[0]])
+            copias.append(substituir_campo(copia, valor, formatar_numero(float(partes[valor]) * float(fator))))
+        if not copias:
+            raise ValueError(f"Série(s) {', '.join(nomes)} sem valores em [TIMESERIES] para escalar")
+        ultima = self.linhas_secao['TIMESERIES'][-1]
+        fim = linhas[ultima][len(linhas[ultima].rstrip('\r\n')):] or '\n'
+        linhas[ultima] += ''.join(c if c.endswith(('\n', '\r')) else c + fim for c in copias)
+
+    def _sem_series(self, linhas):
+        """[REPORT] sem séries de sub-bacias, nós e trechos: o .out guarda apenas as variáveis do sistema"""
+        for i in self.linhas_secao.get('REPORT', []):
+            chave = self.linhas[i].split()[0].upper()
+            if chave in ('SUBCATCHMENTS', 'NODES', 'LINKS'):
+                fim = linhas[i][len(linhas[i].rstrip('\r\n')):]
+                linhas[i] = f"{chave:<20} NONE{fim}"
+
+    def variante(self, serie=None, fator_chuva=None, imperv=None, cn=None, fator_declividade=None,
+                 duracao_simulacao=None, opcoes=None, sem_series=False):
+        """
+        Retorna o texto do .inp com os campos alterados:
+        serie: série de [TIMESERIES] usada pelos pluviômetros (ajusta o fim da simulação)
+        fator_chuva: fator aplicado aos valores da série dos pluviômetros (cópia escalada; 0 = sem chuva)
+        imperv: %Imperv de todas as sub-bacias
+        cn: Curve Number de todas as sub-bacias (INFILTRATION CURVE_NUMBER)
+        fator_declividade: multiplica a %Slope de cada sub-bacia (preserva as diferenças entre elas)
+        duracao_simulacao: duração da simulação em minutos (padrão: fim da chuva + MARGEM_SIMULACAO_MIN)
+        opcoes: dicionário de opções de [OPTIONS] (ex.: {'ROUTING_STEP': 1.0, 'THREADS': 4})
+        sem_series: não grava séries de objetos no .out (extração direta do motor)
+        """
+        linhas = list(self.linhas)
+
+        if serie is not None:
+            fim_chuva = self.resumo_chuva(serie).fim_min  # também valida a série
+            self._trocar_coluna(linhas, 'RAINGAGES', 5, serie)
+            if duracao_simulacao is None:
+                duracao_simulacao = fim_chuva + MARGEM_SIMULACAO_MIN
+
+        if fator_chuva is not None and float(fator_chuva) != 1.0:
+            self._escalar_chuva(linhas, serie, fator_chuva)
+
+        if imperv is not None:
+            self._trocar_coluna(linhas, 'SUBCATCHMENTS', 4, formatar_numero(imperv))
+
+        if cn is not None:
+            metodo = (self.modelo.opcao('INFILTRATION') or '').upper()
+            if metodo != 'CURVE_NUMBER':
+                raise ValueError(f"CN só pode ser alterado com INFILTRATION CURVE_NUMBER (modelo usa {metodo})")
+            self._trocar_coluna(linhas, 'INFILTRATION', 1, formatar_numero(cn))
+
+        if fator_declividade is not None:
+            for i in self.linhas_secao.get('SUBCATCHMENTS', []):
+                declividade = float(self.linhas[i].split()[6])
+                linhas[i] = substituir_campo(linhas[i], 6, formatar_numero(declividade * float(fator_declividade)))
+
+        if duracao_simulacao is not None:
+            fim = self._inicio_simulacao() + timedelta(minutes=float(duracao_simulacao))
+            self._trocar_opcao(linhas, 'END_DATE', fim.strftime('%m/%d/%Y'))
+            self._trocar_opcao(linhas, 'END_TIME', fim.strftime('%H:%M:%S'))
+
+        for chave, valor in (opcoes or {}).items():
+            self._definir_opcao(linhas, chave, valor if isinstance(valor, str) else formatar_numero(valor))
+
+        if sem_series:
+            self._sem_series(linhas)
+
+        return ''.join(linhas)
+
+    def gravar_variante(self, caminho_saida, **parametros):
+        """Grava a variante em disco (necessário apenas para executar o SWMM)"""
+        with open(caminho_saida, 'w', encoding='utf-8', newline='') as f:
+            f.write(self.variante(**parametros))
+        return caminho_saida
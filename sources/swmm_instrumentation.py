@@ -0,0 +1,254 @@
+import argparse
+import json
+import os
+import platform
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+## Instrumentação das etapas do pipeline e log de execução em JSON-lines
+#
+# Cada cenário é medido dentro de medir_cenario(); cada etapa dentro de
+# etapa(nome). Para cada etapa são guardados o tempo de parede, o tempo de
+# CPU, a memória residente (RSS) atual e o pico de RSS do processo, o número
+# de linhas produzidas e os descartes (linhas ou campos ignorados sem erro)
+# contados com contar_descarte(). Fora de medir_cenario() as etapas e os
+# descartes não são registrados, de modo que as funções instrumentadas
+# continuam utilizáveis isoladamente. As medições são devolvidas pelos
+# processos do pool como listas de dicionários e gravadas pelo processo
+# principal em um único arquivo .jsonl (uma linha por etapa e por cenário).
+
+ARQUIVO_LOG = "execucao_log.jsonl"
+
+# Medição do cenário em andamento neste processo
+_medicao_ativa = None
+
+
+def memoria_processo():
+    """(RSS atual, pico de RSS) do processo em MB; None quando não disponível"""
+    atual = pico = None
+    if psutil is not None:
+        info = psutil.Process().memory_info()
+        atual = info.rss / 2 ** 20
+        pico = getattr(info, 'peak_wset', None)
+        pico = pico / 2 ** 20 if pico else None
+    elif os.path.exists('/proc/self/statm'):
+        with open('/proc/self/statm') as f:
+            atual = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    if pico is None and resource is not None:
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        pico = maximo / 2 ** 20 if platform.system() == 'Darwin' else maximo / 2 ** 10
+    if atual is not None and pico is not None:
+        pico = max(pico, atual)
+    return atual, pico
+
+
+class MedicaoEtapa:
+    """Tempos, memória, linhas e descartes de uma etapa"""
+
+    def __init__(self, nome):
+        self.nome = nome
+        self.linhas = None
+        self.descartes = Counter()
+        self.parede_s = self.cpu_s = 0.0
+        self.rss_mb = self.rss_pico_mb = None
+        self.erro = None
+
+    def como_dict(self):
+        return {
+            'etapa': self.nome,
+            'parede_s': round(self.parede_s, 6),
+            'cpu_s': round(self.cpu_s, 6),
+            'rss_mb': None if self.rss_mb is None else round(self.rss_mb, 1),
+            'rss_pico_mb': None if self.rss_pico_mb is None else round(self.rss_pico_mb, 1),
+            'linhas': self.linhas,
+            'descartes': dict(self.descartes),
+            'erro': self.erro,
+        }
+
+
+class MedicaoCenario:
+    """Etapas medidas de um cenário, na ordem de execução"""
+
+    def __init__(self, cenario):
+        self.cenario = cenario
+        self.etapas = []
+        self._pilha = []
+        self.inicio = datetime.now().isoformat(timespec='seconds')
+        self.parede_s = self.cpu_s = 0.0
+        self.erro = None
+
+    @property
+    def descartes(self):
+        total = Counter()
+        for medida in self.etapas:
+            total.update(medida.descartes)
+        return total
+
+    def registros(self):
+        """Linhas do log: uma por etapa e uma de totais do cenário"""
+        base = {'tipo': 'etapa', 'cenario': self.cenario, 'pid': os.getpid()}
+        linhas = [dict(base, **medida.como_dict()) for medida in self.etapas]
+        rss_mb, rss_pico_mb = memoria_processo()
+        linhas.append({
+            'tipo': 'cenario', 'cenario': self.cenario, 'pid': os.getpid(), 'inicio': self.inicio,
+            'parede_s': round(self.parede_s, 6), 'cpu_s': round(self.cpu_s, 6),
+            'rss_pico_mb': None if rss_pico_mb is None else round(rss_pico_mb, 1),
+            'descartes': dict(self.descartes), 'erro': self.erro,
+        })
+        return linhas
+
+
+@contextmanager
+def medir_cenario(cenario):
+    """Ativa a medição das etapas de um cenário neste processo"""
+    global _medicao_ativa
+    anterior = _medicao_ativa
+    medicao = _medicao_ativa = MedicaoCenario(cenario)
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield medicao
+    except Exception as e:
+        medicao.erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        medicao.parede_s = time.perf_counter() - inicio
+        medicao.cpu_s = time.process_time() - inicio_cpu
+        _medicao_ativa = anterior
+
+
+@contextmanager
+def etapa(nome):
+    """Mede uma etapa do cenário ativo; o objeto devolvido recebe o número de linhas"""
+    medida = MedicaoEtapa(nome)
+    medicao = _medicao_ativa
+    if medicao is not None:
+        medicao.etapas.append(medida)
+        medicao._pilha.append(medida)
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield medida
+    except Exception as e:
+        medida.erro = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        medida.parede_s = time.perf_counter() - inicio
+        medida.cpu_s = time.process_time() - inicio_cpu
+        if medicao is not None:
+            medida.rss_mb, medida.rss_pico_mb = memoria_processo()
+            medicao._pilha.pop()
+
+
+def contar_descarte(motivo, quantidade=1):
+    """Soma linhas ou campos ignorados na etapa em andamento (sem efeito fora de medir_cenario)"""
+    if quantidade and _medicao_ativa is not None and _medicao_ativa._pilha:
+        _medicao_ativa._pilha[-1].descartes[motivo] += int(quantidade)
+
+
+class LogExecucao:
+    """Arquivo JSON-lines de uma execução em lote, gravado pelo processo principal"""
+
+    def __init__(self, caminho, **contexto):
+        self.caminho = caminho
+        self.execucao = datetime.now().strftime('%Y%m%dT%H%M%S') + f"-{os.getpid()}"
+        pasta = os.path.dirname(os.path.abspath(caminho))
+        os.makedirs(pasta, exist_ok=True)
+        self._arquivo = open(caminho, 'a', encoding='utf-8')
+        self._inicio = time.perf_counter()
+        self.gravar([{'tipo': 'inicio', 'inicio': datetime.now().isoformat(timespec='seconds'),
+                      'python': platform.python_version(), 'nucleos': os.cpu_count(), **contexto}])
+
+    def gravar(self, registros):
+        """Acrescenta registros ao log (cada um identificado pela execução)"""
+        for registro in registros:
+            self._arquivo.write(json.dumps({'execucao': self.execucao, **registro}, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+
+    def fechar(self, **totais):
+        if self._arquivo.closed:
+            return
+        self.gravar([{'tipo': 'fim', 'parede_s': round(time.perf_counter() - self._inicio, 3), **totais}])
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+
+def ler_log(caminho, execucao=None):
+    """DataFrame com os registros de etapa do log (por padrão, da última execução)"""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        registros = [json.loads(linha) for linha in f if linha.strip()]
+    if execucao is None:
+        execucoes = [r['execucao'] for r in registros if r.get('tipo') == 'inicio']
+        execucao = execucoes[-1] if execucoes else None
+    return pd.DataFrame([r for r in registros if r.get('execucao') == execucao and r.get('tipo') == 'etapa'])
+
+
+def resumo_etapas(etapas):
+    """Tabela por etapa: tempos total, mediano e máximo, cenário mais lento, CPU e descartes"""
+    if etapas.empty:
+        return pd.DataFrame()
+    etapas = etapas.assign(n_descartes=etapas['descartes'].map(lambda d: sum(d.values()) if d else 0))
+    grupos = etapas.groupby('etapa', sort=False)
+    mais_lento = etapas.loc[grupos['parede_s'].idxmax(), ['etapa', 'cenario']].set_index('etapa')['cenario']
+    return pd.DataFrame({
+        'cenarios': grupos.size(),
+        'parede_total_s': grupos['parede_s'].sum(),
+        'parede_mediana_s': grupos['parede_s'].median(),
+        'parede_max_s': grupos['parede_s'].max(),
+        'cenario_mais_lento': mais_lento,
+        'cpu_total_s': grupos['cpu_s'].sum(),
+        'rss_pico_mb': grupos['rss_pico_mb'].max(),
+        'linhas': grupos['linhas'].sum(min_count=1),
+        'descartes': grupos['n_descartes'].sum(),
+    })
+
+
+def imprimir_resumo(caminho, execucao=None, n_cenarios=10):
+    """Imprime o resumo por etapa e os cenários mais lentos de uma execução"""
+    etapas = ler_log(caminho, execucao)
+    if etapas.empty:
+        print(f"Nenhuma etapa registrada em {caminho}")
+        return
+    with pd.option_context('display.width', 200, 'display.max_columns', 20, 'display.float_format', '{:.3f}'.format):
+        print(f"\n⏱️ Etapas ({etapas['execucao'].iloc[0]}):")
+        print(resumo_etapas(etapas).to_string())
+
+        por_cenario = etapas.pivot_table(index='cenario', columns='etapa', values='parede_s', aggfunc='sum', sort=False)
+        por_cenario['TOTAL'] = por_cenario.sum(axis=1)
+        print(f"\n🐢 {n_cenarios} cenário(s) mais lento(s):")
+        print(por_cenario.nlargest(n_cenarios, 'TOTAL').to_string())
+
+        descartes = Counter()
+        for d in etapas['descartes']:
+            descartes.update(d or {})
+        if descartes:
+            print("\n🚮 Descartes:")
+            for motivo, quantidade in descartes.most_common():
+                print(f"  {motivo:<50} {quantidade:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumo de um log de execução (.jsonl)")
+    parser.add_argument("log", nargs="?", default=ARQUIVO_LOG, help="arquivo .jsonl do log")
+    parser.add_argument("--execucao", default=None, help="identificador da execução (padrão: a última)")
+    parser.add_argument("--cenarios", type=int, default=10, help="nº de cenários mais lentos listados")
+    args = parser.parse_args()
+
+    imprimir_resumo(args.log, args.execucao, args.cenarios)
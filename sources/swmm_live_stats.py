@@ -0,0 +1,99 @@
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from pyswmm import Links, Nodes, Subcatchments, SystemStats
+
+from swmm_event_stats import FATOR_VAZAO_M3S
+from swmm_report_index import COLUNAS_TRECHO
+
+## Estatísticas lidas diretamente do motor ao fim de uma simulação pyswmm
+#
+# Em vez de gravar o .rpt em texto e relê-lo, os resumos de nós, sub-bacias e
+# condutos são obtidos dos objetos de estatística do pyswmm (Node.statistics,
+# Subcatchment.statistics, Link.conduit_statistics e SystemStats) antes de a
+# simulação ser fechada, com os mesmos significados e unidades das tabelas do
+# .rpt lidas por scenarios_data_extractor. O relatório pode então ir para o
+# dispositivo nulo e o .out ficar reduzido às variáveis do sistema.
+#
+# O motor não expõe a divisão do escoamento em áreas impermeáveis e
+# permeáveis, a vazão a seção plena nem as frações por regime de escoamento:
+# VSUP, VSTO, PSUP, PINF, QREL e FSUP ficam vazios neste modo.
+
+# Destino do relatório quando ele não é necessário
+RELATORIO_NULO = os.devnull
+
+# Unidades de vazão do sistema internacional (volumes em m³, profundidades em m e mm)
+UNIDADES_SI = ('CMS', 'LPS', 'MLD')
+
+PES3_M3 = 0.028316846592
+PE_M = 0.3048
+ACRE_M2 = 4046.8564224
+HECTARE_M2 = 1e4
+POLEGADA_MM = 25.4
+
+
+class EstatisticasSimulacao:
+    """Resumos por nó, sub-bacia e conduto equivalentes aos do .rpt, obtidos da simulação aberta"""
+
+    def __init__(self, sim, modelo):
+        unidade = modelo.opcao('FLOW_UNITS', 'CMS').upper()
+        si = unidade in UNIDADES_SI
+        fator_volume = 1.0 if si else PES3_M3
+        fator_vazao = FATOR_VAZAO_M3S.get(unidade, np.nan)
+
+        # Nós (Node Depth Summary e Node Inflow Summary): PMAX, VAZT e VTOT
+        self.profundidade_maxima = OrderedDict()
+        self.vazao_maxima = OrderedDict()
+        self.volume_afluente = OrderedDict()
+        for no in Nodes(sim):
+            estatisticas = no.statistics
+            self.profundidade_maxima[no.nodeid] = estatisticas['max_depth'] * (1.0 if si else PE_M)
+            self.vazao_maxima[no.nodeid] = estatisticas['peak_total_inflow']       # unidade de vazão do modelo
+            # VTOT do extrator é a 7ª coluna de Node Inflow Summary: volume de entrada lateral (10^6 L)
+            self.volume_afluente[no.nodeid] = estatisticas['lateral_infow_vol'] * fator_volume / 1000.0
+
+        # Sub-bacias (Subcatchment Runoff Summary): lâminas em mm a partir dos volumes do motor
+        linhas = {}
+        for sub_bacia in Subcatchments(sim):
+            estatisticas = sub_bacia.statistics
+            area_m2 = sub_bacia.area * (HECTARE_M2 if si else ACRE_M2)
+            para_mm = 1000.0 * fator_volume / area_m2 if area_m2 > 0 else np.nan
+            linhas[sub_bacia.subcatchmentid] = {
+                'VINI': estatisticas['precipitation'] * (1.0 if si else POLEGADA_MM),
+                'VEVA': estatisticas['runon'] * para_mm,
+                'VRET': estatisticas['evaporation'] * para_mm,
+                'VINF': estatisticas['infiltration'] * para_mm,
+                'VSUP': np.nan,
+                'VSTO': np.nan,
+                'VGER': estatisticas['runoff'] * para_mm,
+                'ERRO': estatisticas['runoff'] * fator_volume / 1000.0,
+                'PSUP': np.nan,
+                'PINF': np.nan,
+            }
+        self.resumo_escoamento = pd.DataFrame.from_dict(linhas, orient='index')
+
+        # Condutos (Link Flow Summary e Conduit Surcharge Summary)
+        altura_plena = dict(zip(modelo.tabela('XSECTIONS').ids, modelo.tabela('XSECTIONS').coluna('Geom1')))
+        linhas = {}
+        for trecho in Links(sim):
+            if not trecho.is_conduit():
+                continue
+            estatisticas = trecho.conduit_statistics
+            altura = altura_plena.get(trecho.linkid, np.nan)
+            linhas[trecho.linkid] = {
+                'QMAX': estatisticas['peak_flow'] * fator_vazao,
+                'VMAX': estatisticas['peak_velocity'] * (1.0 if si else PE_M),
+                'QREL': np.nan,
+                'YREL': estatisticas['peak_depth'] / altura if altura > 0 else np.nan,
+                'HSOB': estatisticas['time_surcharged'],
+                'HCAP': estatisticas['time_capacity_limited'],
+                'FSUP': np.nan,
+            }
+        self.resumo_trechos = pd.DataFrame.from_dict(linhas, orient='index', columns=COLUNAS_TRECHO)
+
+        # Blocos de continuidade
+        sistema = SystemStats(sim)
+        self.erro_escoamento = sistema.runoff_stats['routing_error']
+        self.erro_roteamento = sistema.routing_stats['routing_error']
@@ -0,0 +1,164 @@
+import mmap
+from datetime import datetime, timedelta
+
+import numpy as np
+
+## Leitura direta do arquivo binário de resultados (.out) do SWMM 5
+#
+# O arquivo é mapeado em memória e os resultados ficam expostos como uma
+# matriz float32 (períodos × palavras por período) sem cópia. As consultas por
+# objeto, variável e intervalo de períodos copiam apenas os valores pedidos.
+#
+# Estrutura do arquivo:
+#   cabeçalho   : magic, versão, unidade de vazão, nº sub-bacias, nós, trechos, poluentes
+#   IDs         : (comprimento, texto) de cada objeto
+#   propriedades: áreas, tipo/cota/profundidade dos nós, dados dos trechos
+#   variáveis   : códigos das variáveis reportadas por tipo de objeto
+#   resultados  : por período, data (double) + valores float32
+#   rodapé      : posições das seções, nº de períodos, código de erro, magic
+
+NUMERO_MAGICO = 516114522  # bytes iniciais 'ZH\xc3\x1e'
+
+# Índices das variáveis reportadas (antes das variáveis de poluentes)
+VARIAVEIS_SUB_BACIA = {'rainfall': 0, 'snow_depth': 1, 'evaporation': 2, 'infiltration': 3,
+                       'runoff': 4, 'gw_outflow': 5, 'gw_elevation': 6, 'soil_moisture': 7}
+VARIAVEIS_NO = {'depth': 0, 'head': 1, 'volume': 2, 'lateral_inflow': 3,
+                'total_inflow': 4, 'flooding': 5}
+VARIAVEIS_TRECHO = {'flow': 0, 'depth': 1, 'velocity': 2, 'volume': 3, 'capacity': 4}
+
+UNIDADES_VAZAO = ['CFS', 'GPM', 'MGD', 'CMS', 'LPS', 'MLD']
+
+# Origem das datas do SWMM (dias decimais desde 30/12/1899)
+_ORIGEM_DATAS = datetime(1899, 12, 30)
+
+
+class ArquivoSaida:
+    """Arquivo .out mapeado em memória com acesso por objeto, variável e período"""
+
+    def __init__(self, caminho_out):
+        self.caminho = caminho_out
+        self._arquivo = open(caminho_out, 'rb')
+        self._mmap = mmap.mmap(self._arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # 1. Cabeçalho e rodapé
+        cabecalho = self._inteiros(0, 7)
+        rodape = self._inteiros(len(self._mmap) - 24, 6)
+        if cabecalho[0] != NUMERO_MAGICO or rodape[5] != NUMERO_MAGICO:
+            raise ValueError(f"Arquivo .out inválido: {caminho_out}")
+        if rodape[4] != 0:
+            raise ValueError(f"Simulação terminou com erro {rodape[4]}: {caminho_out}")
+
+        self.versao = int(cabecalho[1])
+        self.unidade_vazao = UNIDADES_VAZAO[cabecalho[2]] if cabecalho[2] < len(UNIDADES_VAZAO) else None
+        self.n_sub_bacias, self.n_nos, self.n_trechos, self.n_poluentes = (int(v) for v in cabecalho[3:7])
+        pos_ids, pos_propriedades, pos_resultados = (int(v) for v in rodape[:3])
+        self.n_periodos = int(rodape[3])
+
+        # 2. IDs dos objetos
+        posicao = pos_ids
+        self.ids_sub_bacias, posicao = self._ler_ids(posicao, self.n_sub_bacias)
+        self.ids_nos, posicao = self._ler_ids(posicao, self.n_nos)
+        self.ids_trechos, posicao = self._ler_ids(posicao, self.n_trechos)
+        self.ids_poluentes, posicao = self._ler_ids(posicao, self.n_poluentes)
+
+        # 3. Propriedades de entrada (pulando códigos e valores)
+        posicao = pos_propriedades
+        for n_objetos in (self.n_sub_bacias, self.n_nos, self.n_trechos):
+            n_propriedades = int(self._inteiros(posicao, 1)[0])
+            posicao += 4 * (1 + n_propriedades + n_objetos * n_propriedades)
+
+        # 4. Quantidade de variáveis reportadas por tipo de objeto
+        self.n_variaveis = []
+        for _ in range(4):  # sub-bacias, nós, trechos, sistema
+            n = int(self._inteiros(posicao, 1)[0])
+            self.n_variaveis.append(n)
+            posicao += 4 * (1 + n)
+        self.data_inicial = self._data(np.frombuffer(self._mmap, dtype='<f8', count=1, offset=posicao)[0])
+        self.passo_relatorio = int(self._inteiros(posicao + 8, 1)[0])
+
+        # 5. Resultados: matriz (períodos × palavras) sem cópia
+        nsv, nnv, nlv, nsis = self.n_variaveis
+        self._palavras_periodo = 2 + self.n_sub_bacias * nsv + self.n_nos * nnv + self.n_trechos * nlv + nsis
+        self._inicio_nos = 2 + self.n_sub_bacias * nsv
+        self._inicio_trechos = self._inicio_nos + self.n_nos * nnv
+        self._inicio_sistema = self._inicio_trechos + self.n_trechos * nlv
+        self._pos_resultados = pos_resultados
+        self._resultados = np.frombuffer(
+            self._mmap, dtype='<f4', count=self.n_periodos * self._palavras_periodo, offset=pos_resultados
+        ).reshape(self.n_periodos, self._palavras_periodo)
+
+        self._posicao_sub_bacias = {id_: i for i, id_ in enumerate(self.ids_sub_bacias)}
+        self._posicao_nos = {id_: i for i, id_ in enumerate(self.ids_nos)}
+        self._posicao_trechos = {id_: i for i, id_ in enumerate(self.ids_trechos)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.fechar()
+
+    def fechar(self):
+        """Libera o mapeamento e fecha o arquivo"""
+        self._resultados = None
+        if self._mmap is not None:
+            self._mmap.close()
+            self._arquivo.close()
+            self._mmap = None
+
+    def _inteiros(self, posicao, quantidade):
+        return np.frombuffer(self._mmap, dtype='<i4', count=quantidade, offset=posicao)
+
+    def _ler_ids(self, posicao, quantidade):
+        ids = []
+        for _ in range(quantidade):
+            comprimento = int(self._inteiros(posicao, 1)[0])
+            ids.append(self._mmap[posicao + 4:posicao + 4 + comprimento].decode('utf-8', errors='ignore'))
+            posicao += 4 + comprimento
+        return ids, posicao
+
+    @staticmethod
+    def _data(dias):
+        return _ORIGEM_DATAS + timedelta(days=float(dias))
+
+    @staticmethod
+    def _indices(objetos, posicoes):
+        """Converte IDs (ou índices) em um array de índices; None seleciona todos"""
+        if objetos is None:
+            return np.arange(len(posicoes))
+        if isinstance(objetos, (str, int, np.integer)):
+            objetos = [objetos]
+        return np.array([posicoes[o] if isinstance(o, str) else int(o) for o in objetos], dtype=np.int64)
+
+    def _serie(self, inicio, n_variaveis, indices, variavel, periodos):
+        colunas = inicio + indices * n_variaveis + variavel
+        return np.array(self._resultados[periodos][:, colunas], dtype=np.float32)
+
+    def tempos(self, periodos=slice(None)):
+        """Instantes dos períodos reportados (datetime64[s]), lidos do próprio arquivo"""
+        dias = np.ndarray(shape=(self.n_periodos,), dtype='<f8', buffer=self._mmap,
+                          offset=self._pos_resultados, strides=(4 * self._palavras_periodo,))[periodos]
+        segundos = np.round(dias * 86400.0).astype(np.int64)
+        return np.datetime64(_ORIGEM_DATAS, 's') + segundos.astype('timedelta64[s]')
+
+    def serie_nos(self, variavel='depth', nos=None, periodos=slice(None)):
+        """Matriz (períodos × nós) de uma variável dos nós"""
+        indices = self._indices(nos, self._posicao_nos)
+        return self._serie(self._inicio_nos, self.n_variaveis[1], indices, VARIAVEIS_NO[variavel], periodos)
+
+    def serie_sub_bacias(self, variavel='runoff', sub_bacias=None, periodos=slice(None)):
+        """Matriz (períodos × sub-bacias) de uma variável das sub-bacias"""
+        indices = self._indices(sub_bacias, self._posicao_sub_bacias)
+        return self._serie(2, self.n_variaveis[0], indices, VARIAVEIS_SUB_BACIA[variavel], periodos)
+
+    def serie_trechos(self, variavel='flow', trechos=None, periodos=slice(None)):
+        """Matriz (períodos × trechos) de uma variável dos trechos"""
+        indices = self._indices(trechos, self._posicao_trechos)
+        return self._serie(self._inicio_trechos, self.n_variaveis[2], indices, VARIAVEIS_TRECHO[variavel], periodos)
+
+    def serie_sistema(self, indice_variavel, periodos=slice(None)):
+        """Série de uma variável do sistema pelo índice"""
+        return np.array(self._resultados[periodos, self._inicio_sistema + indice_variavel], dtype=np.float32)
+
+    def picos_nos(self, variavel='depth', periodos=slice(None)):
+        """Máximo de uma variável por nó ao longo dos períodos"""
+        return self.serie_nos(variavel, periodos=periodos).max(axis=0)
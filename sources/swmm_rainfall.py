@@ -0,0 +1,126 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from swmm_inp_model import converter_hora_em_horas
+
+## Resumo das chuvas do modelo a partir de [RAINGAGES] e [TIMESERIES]
+#
+# Para cada pluviômetro alimentado por série temporal, os valores da série são
+# convertidos em lâminas por intervalo conforme o formato do pluviômetro
+# (INTENSITY em mm/h, VOLUME em mm por intervalo, CUMULATIVE em mm acumulados),
+# usando o intervalo de registro declarado. O SCF do pluviômetro não entra: no
+# SWMM ele corrige apenas a neve (o fator de chuva das variantes escala a
+# própria série, ver swmm_inp_patch). Os resumos ficam em cache pelo conteúdo da série, de modo que milhares de
+# cenários com a mesma chuva calculam cada série uma única vez. A lâmina de um
+# cenário é a que cai dentro da janela simulada (START → END de [OPTIONS]): os
+# intervalos que passam do fim contam apenas pela parte simulada, como no
+# "Total Precipitation" do .rpt.
+
+MAX_RESUMOS_CACHE = 256
+
+# Cache (formato, intervalo, tempos, valores) → ResumoChuva
+_cache_resumos = OrderedDict()
+
+
+class ResumoChuva:
+    """Lâmina, duração, intensidade de pico e forma do hietograma de uma chuva"""
+
+    def __init__(self, serie, inicios_min, laminas_mm, intervalo_min):
+        self.serie = serie
+        self.intervalo_min = intervalo_min
+        self.inicios_min = inicios_min                  # início de cada intervalo (min)
+        self.laminas_mm = laminas_mm                    # lâmina de cada intervalo (mm)
+        self.intensidades_mmh = laminas_mm * 60.0 / intervalo_min if intervalo_min > 0 else laminas_mm * 0
+
+        self.lamina_mm = float(laminas_mm.sum())
+        com_chuva = np.flatnonzero(laminas_mm > 0)
+        if len(com_chuva):
+            self.inicio_min = float(inicios_min[com_chuva[0]])
+            self.fim_min = float(inicios_min[com_chuva[-1]] + intervalo_min)
+            pico = int(np.argmax(self.intensidades_mmh))
+            self.intensidade_pico_mmh = float(self.intensidades_mmh[pico])
+            self.instante_pico_min = float(inicios_min[pico])
+        else:
+            self.inicio_min = self.fim_min = self.instante_pico_min = 0.0
+            self.intensidade_pico_mmh = 0.0
+        self.duracao_min = self.fim_min - self.inicio_min
+
+    def recortar(self, inicio_min, fim_min):
+        """ResumoChuva apenas da parte da chuva entre inicio_min e fim_min (intervalos parciais proporcionais)"""
+        if self.intervalo_min <= 0:
+            return self
+        fins = self.inicios_min + self.intervalo_min
+        sobreposicao = np.minimum(fins, fim_min) - np.maximum(self.inicios_min, inicio_min)
+        fracao = np.clip(sobreposicao / self.intervalo_min, 0.0, 1.0)
+        if np.all(fracao == 1.0):
+            return self
+        return ResumoChuva(self.serie, self.inicios_min, self.laminas_mm * fracao, self.intervalo_min)
+
+    @property
+    def fracao_pico(self):
+        """Posição do pico na chuva (0 = início, 1 = fim)"""
+        if self.duracao_min <= 0:
+            return 0.0
+        return (self.instante_pico_min - self.inicio_min + self.intervalo_min / 2.0) / self.duracao_min
+
+    def hietograma_adimensional(self, n_pontos=11):
+        """Curva de massa adimensional (fração da lâmina × fração da duração) em n pontos"""
+        fracoes = np.linspace(0.0, 1.0, n_pontos)
+        if self.lamina_mm <= 0 or self.duracao_min <= 0:
+            return fracoes, np.zeros(n_pontos)
+        tempos = np.concatenate(([self.inicio_min], self.inicios_min + self.intervalo_min))
+        acumulado = np.concatenate(([0.0], np.cumsum(self.laminas_mm))) / self.lamina_mm
+        return fracoes, np.interp(self.inicio_min + fracoes * self.duracao_min, tempos, acumulado)
+
+
+def resumir_serie(serie, formato='INTENSITY', intervalo='1:00'):
+    """ResumoChuva de uma SerieTemporal segundo o formato e o intervalo do pluviômetro"""
+    formato = formato.upper()
+    intervalo_min = converter_hora_em_horas(str(intervalo)) * 60.0
+    chave = (formato, intervalo_min, serie.tempos_horas.tobytes(), serie.valores.tobytes())
+
+    resumo = _cache_resumos.get(chave)
+    if resumo is not None:
+        _cache_resumos.move_to_end(chave)
+        return resumo
+
+    # Cada registro vale do seu instante até o instante seguinte
+    inicios = serie.tempos_horas * 60.0
+    valores = serie.valores
+    if formato == 'VOLUME':
+        laminas = valores.copy()
+    elif formato == 'CUMULATIVE':
+        laminas = np.diff(np.concatenate(([0.0], valores)))
+    else:
+        laminas = valores * intervalo_min / 60.0
+    laminas = np.clip(laminas, 0.0, None)
+
+    resumo = ResumoChuva(serie.nome, inicios, laminas, intervalo_min)
+    _cache_resumos[chave] = resumo
+    while len(_cache_resumos) > MAX_RESUMOS_CACHE:
+        _cache_resumos.popitem(last=False)
+    return resumo
+
+
+def resumir_pluviometros(modelo, janela_min=None):
+    """
+    Dicionário pluviômetro → ResumoChuva (apenas pluviômetros com fonte TIMESERIES).
+    janela_min: (início, fim) em minutos desde START; a chuva fora dela é descartada
+    """
+    resumos = OrderedDict()
+    for partes in modelo.tabela('RAINGAGES').linhas:
+        if len(partes) < 6 or partes[4].upper() != 'TIMESERIES':
+            continue
+        nome, formato, intervalo, _, _, nome_serie = partes[:6]
+        serie = modelo.series.get(nome_serie)
+        if serie is None:
+            raise KeyError(f"Pluviômetro {nome}: série {nome_serie} ausente em [TIMESERIES]")
+        resumo = resumir_serie(serie, formato, intervalo)
+        resumos[nome] = resumo.recortar(*janela_min) if janela_min is not None else resumo
+    return resumos
+
+
+def limpar_cache_resumos():
+    """Esvazia o cache de resumos de chuva"""
+    _cache_resumos.clear()
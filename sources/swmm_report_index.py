@@ -0,0 +1,254 @@
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+## Índice de leitura única do relatório (.rpt) do SWMM
+#
+# O arquivo é tokenizado uma única vez e cada tabela de resumo (Node Depth,
+# Node Inflow, Subcatchment Runoff, Storage Volume, ...) fica disponível como
+# colunas indexadas pelo ID do objeto. Os blocos de continuidade ficam
+# guardados como texto e podem ser consultados por rótulo.
+
+# Quantidade máxima de relatórios mantidos em memória
+MAX_RELATORIOS_CACHE = 32
+
+# Variáveis por conduto (Link Flow, Conduit Surcharge e Flow Classification Summary)
+COLUNAS_TRECHO = ['QMAX', 'VMAX', 'QREL', 'YREL', 'HSOB', 'HCAP', 'FSUP']
+
+UNIDADES_TRECHO = {
+    'QMAX': 'm³/s',  # vazão máxima
+    'VMAX': 'm/s',   # velocidade máxima
+    'QREL': '-',     # vazão máxima / vazão a seção plena
+    'YREL': '-',     # profundidade máxima / diâmetro
+    'HSOB': 'h',     # horas com as duas extremidades afogadas
+    'HCAP': 'h',     # horas com a capacidade limitando a vazão
+    'FSUP': '-',     # fração do tempo em regime supercrítico
+}
+
+# Erros de continuidade do cenário (blocos Runoff Quantity e Flow Routing Continuity)
+COLUNAS_CONTINUIDADE = ['ECES', 'ECRO']
+
+UNIDADES_CONTINUIDADE = {
+    'ECES': '%',     # erro de continuidade do escoamento superficial
+    'ECRO': '%',     # erro de continuidade do roteamento hidráulico
+}
+
+_cache_relatorios = OrderedDict()
+
+
+def _linha_banner(linha):
+    """Indica se a linha é uma moldura de asteriscos de título de seção"""
+    return linha.lstrip().startswith('*****')
+
+
+def _linha_separadora(linha):
+    """Indica se a linha é composta apenas por traços"""
+    texto = linha.strip()
+    return bool(texto) and set(texto) == {'-'}
+
+
+def _converter_float(valor):
+    """Converte um token do relatório para float (NaN se não for numérico)"""
+    if valor is None:
+        return np.nan
+    try:
+        return float(valor)
+    except ValueError:
+        return np.nan
+
+
+class TabelaRelatorio:
+    """Tabela de resumo do .rpt armazenada em colunas indexadas pelo ID"""
+
+    def __init__(self, titulo, cabecalho, linhas):
+        self.titulo = titulo
+        self.cabecalho = cabecalho
+        self.ids = [partes[0] for partes in linhas]
+        self.posicao = {id_: i for i, id_ in enumerate(self.ids)}
+
+        # Transposição das linhas em colunas (linhas curtas recebem None)
+        n_colunas = max((len(partes) for partes in linhas), default=0)
+        self.colunas = [
+            [partes[j].replace('*', '') if j < len(partes) else None for partes in linhas]
+            for j in range(n_colunas)
+        ]
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self.posicao
+
+    def coluna(self, indice):
+        """Retorna a coluna como lista de textos, na ordem do relatório"""
+        if indice >= len(self.colunas):
+            return [None] * len(self.ids)
+        return self.colunas[indice]
+
+    def coluna_float(self, indice):
+        """Retorna a coluna como array float64 (NaN para valores ausentes)"""
+        return np.array([_converter_float(v) for v in self.coluna(indice)], dtype=np.float64)
+
+    def valor(self, id_, indice):
+        """Retorna o texto da coluna para um ID (None se não existir)"""
+        i = self.posicao.get(id_)
+        if i is None or indice >= len(self.colunas):
+            return None
+        return self.colunas[indice][i]
+
+    def como_dict(self, indice):
+        """Retorna um OrderedDict ID → texto da coluna"""
+        return OrderedDict(
+            (id_, valor) for id_, valor in zip(self.ids, self.coluna(indice)) if valor is not None
+        )
+
+
+class IndiceRelatorio:
+    """Conteúdo de um .rpt separado em seções, lido em uma única passada"""
+
+    def __init__(self, caminho_rpt):
+        self.caminho = caminho_rpt
+        self.secoes = OrderedDict()   # título → linhas brutas da seção
+        self.tabelas = OrderedDict()  # título → TabelaRelatorio
+
+        with open(caminho_rpt, 'r', encoding='utf-8', errors='ignore') as f:
+            linhas = f.read().splitlines()
+
+        # 1. Localizar os títulos emoldurados por asteriscos
+        inicios = []
+        i = 0
+        while i + 2 < len(linhas):
+            if _linha_banner(linhas[i]) and _linha_banner(linhas[i + 2]):
+                titulo = re.split(r'\s{2,}', linhas[i + 1].strip())[0]
+                inicios.append((titulo, i + 3))
+                i += 3
+                continue
+            i += 1
+
+        # 2. Recortar o corpo de cada seção até o próximo título
+        for k, (titulo, inicio) in enumerate(inicios):
+            fim = inicios[k + 1][1] - 3 if k + 1 < len(inicios) else len(linhas)
+            corpo = linhas[inicio:fim]
+            self.secoes[titulo] = corpo
+
+            tabela = self._extrair_tabela(titulo, corpo)
+            if tabela is not None:
+                self.tabelas[titulo] = tabela
+
+    @staticmethod
+    def _extrair_tabela(titulo, corpo):
+        """Extrai as linhas de dados entre o cabeçalho tracejado e a primeira linha em branco"""
+        separadores = [i for i, linha in enumerate(corpo) if _linha_separadora(linha)]
+        if len(separadores) < 2:
+            return None
+
+        cabecalho = [linha.strip() for linha in corpo[separadores[0] + 1:separadores[1]]]
+        linhas = []
+        for linha in corpo[separadores[1] + 1:]:
+            linha = linha.strip()
+            if not linha:
+                break
+            if linha.startswith(';'):
+                continue
+            linhas.append(linha.split())
+        return TabelaRelatorio(titulo, cabecalho, linhas)
+
+    def _resolver_titulo(self, secao, candidatos):
+        """Encontra o título correspondente (igualdade ou trecho, sem diferenciar maiúsculas)"""
+        alvo = secao.strip().upper()
+        for titulo in candidatos:
+            if titulo.upper() == alvo:
+                return titulo
+        for titulo in candidatos:
+            if alvo in titulo.upper():
+                return titulo
+        return None
+
+    def tabela(self, secao):
+        """Retorna a TabelaRelatorio da seção (None se ausente)"""
+        titulo = self._resolver_titulo(secao, self.tabelas)
+        return self.tabelas.get(titulo) if titulo else None
+
+    def texto(self, secao):
+        """Retorna as linhas brutas de uma seção (lista vazia se ausente)"""
+        titulo = self._resolver_titulo(secao, self.secoes)
+        return self.secoes.get(titulo, []) if titulo else []
+
+    def continuidade(self, secao):
+        """Lê um bloco de continuidade como dicionário rótulo → lista de valores"""
+        valores = OrderedDict()
+        for linha in self.texto(secao):
+            if '....' not in linha:
+                continue
+            rotulo, _, resto = linha.partition('..')
+            numeros = [_converter_float(v) for v in resto.split() if not set(v) <= {'.'}]
+            valores[rotulo.strip()] = numeros
+        return valores
+
+    def erro_continuidade(self, secao):
+        """Erro de continuidade (%) de um bloco ('Runoff Quantity', 'Flow Routing'); NaN se ausente"""
+        for rotulo, numeros in self.continuidade(secao).items():
+            if rotulo.upper().startswith('CONTINUITY ERROR') and numeros:
+                return numeros[0]
+        return np.nan
+
+    def erros_continuidade(self):
+        """Dicionário COLUNAS_CONTINUIDADE → erro (%) do escoamento e do roteamento"""
+        return {
+            'ECES': self.erro_continuidade('Runoff Quantity Continuity'),
+            'ECRO': self.erro_continuidade('Flow Routing Continuity'),
+        }
+
+    def resumo_trechos(self, fator_vazao=1.0):
+        """
+        DataFrame por conduto com COLUNAS_TRECHO; fator_vazao converte a vazão do relatório em m³/s.
+        O SWMM lista em Conduit Surcharge Summary apenas os condutos que encheram: os demais têm 0 h.
+        """
+        fluxo = self.tabela('Link Flow Summary')
+        if fluxo is None:
+            return pd.DataFrame(columns=COLUNAS_TRECHO, dtype=float)
+        resumo = pd.DataFrame({
+            'QMAX': fluxo.coluna_float(2) * fator_vazao,
+            'VMAX': fluxo.coluna_float(5),
+            'QREL': fluxo.coluna_float(6),
+            'YREL': fluxo.coluna_float(7),
+        }, index=fluxo.ids)
+        # Bombas, orifícios e vertedores têm outras colunas
+        resumo = resumo[[tipo == 'CONDUIT' for tipo in fluxo.coluna(1)]]
+
+        sobrecarga = self.tabela('Conduit Surcharge Summary')
+        for variavel, indice in (('HSOB', 1), ('HCAP', 5)):
+            horas = pd.Series(sobrecarga.coluna_float(indice), index=sobrecarga.ids) if sobrecarga is not None \
+                else pd.Series(dtype=float)
+            resumo[variavel] = resumo.index.map(horas).fillna(0.0)
+
+        classificacao = self.tabela('Flow Classification Summary')
+        resumo['FSUP'] = resumo.index.map(dict(zip(classificacao.ids, classificacao.coluna_float(6)))) \
+            if classificacao is not None else np.nan
+        return resumo[COLUNAS_TRECHO]
+
+
+def ler_relatorio(caminho_rpt):
+    """Retorna o índice do .rpt, reaproveitando a leitura enquanto o arquivo não mudar"""
+    caminho = os.path.abspath(caminho_rpt)
+    info = os.stat(caminho)
+    chave = (caminho, info.st_mtime_ns, info.st_size)
+
+    indice = _cache_relatorios.get(chave)
+    if indice is not None:
+        _cache_relatorios.move_to_end(chave)
+        return indice
+
+    indice = IndiceRelatorio(caminho)
+    _cache_relatorios[chave] = indice
+    while len(_cache_relatorios) > MAX_RELATORIOS_CACHE:
+        _cache_relatorios.popitem(last=False)
+    return indice
+
+
+def limpar_cache_relatorios():
+    """Descarta todos os relatórios mantidos em memória"""
+    _cache_relatorios.clear()
@@ -0,0 +1,135 @@
+import os
+
+import numpy as np
+
+## Captura das séries temporais dos nós durante a simulação (pyswmm)
+#
+# Os valores de cada passo são gravados diretamente em matrizes float32
+# (passos × nós), pré-alocadas e ampliadas em blocos, opcionalmente apoiadas
+# em arquivos mapeados em memória. Os picos por nó são atualizados a cada
+# passo, sem precisar percorrer as séries no final.
+
+# Atributos de pyswmm.Nodes que podem ser capturados
+VARIAVEIS_NOS = ('depth', 'total_inflow', 'flooding')
+
+# Quantidade mínima de passos acrescentada quando a capacidade se esgota
+BLOCO_PASSOS = 4096
+
+
+def estimar_passos(sim, passo_segundos):
+    """Estima o número de passos de roteamento de uma simulação pyswmm"""
+    duracao = (sim.end_time - sim.start_time).total_seconds()
+    return int(duracao / passo_segundos) + 1
+
+
+class CapturaSeries:
+    """Matrizes float32 (passos × nós) preenchidas passo a passo com picos incrementais"""
+
+    def __init__(self, ids_nos, variaveis=('depth',), passos_estimados=BLOCO_PASSOS,
+                 bloco=BLOCO_PASSOS, arquivo_mmap=None):
+        for var in variaveis:
+            if var not in VARIAVEIS_NOS:
+                raise ValueError(f"Variável não suportada: {var} (use {', '.join(VARIAVEIS_NOS)})")
+
+        self.ids = list(ids_nos)
+        self.posicao = {id_: j for j, id_ in enumerate(self.ids)}
+        self.variaveis = tuple(variaveis)
+        self.bloco = max(1, bloco)
+        self.arquivo_mmap = arquivo_mmap
+        self.n_passos = 0
+        self.capacidade = max(1, passos_estimados)
+
+        n_nos = len(self.ids)
+        self.tempos = np.empty(self.capacidade, dtype='datetime64[ms]')
+        self.matrizes = {var: self._alocar(var, self.capacidade) for var in self.variaveis}
+        self.picos = {var: np.full(n_nos, -np.inf, dtype=np.float32) for var in self.variaveis}
+        self.passo_pico = {var: np.zeros(n_nos, dtype=np.int64) for var in self.variaveis}
+
+    def _caminho_mmap(self, var):
+        return f"{self.arquivo_mmap}_{var}.f32"
+
+    def _alocar(self, var, capacidade):
+        """Cria a matriz de uma variável, em memória ou em arquivo mapeado"""
+        forma = (capacidade, len(self.ids))
+        if self.arquivo_mmap is None:
+            return np.empty(forma, dtype=np.float32)
+        return np.memmap(self._caminho_mmap(var), dtype=np.float32, mode='w+', shape=forma)
+
+    def _ampliar(self):
+        """Acrescenta um bloco de passos preservando os valores já gravados"""
+        nova = self.capacidade + max(self.bloco, self.capacidade // 2)
+        n_nos = len(self.ids)
+
+        for var, matriz in self.matrizes.items():
+            if self.arquivo_mmap is None:
+                ampliada = np.empty((nova, n_nos), dtype=np.float32)
+                ampliada[:self.n_passos] = matriz[:self.n_passos]
+            else:
+                matriz.flush()
+                del matriz
+                with open(self._caminho_mmap(var), 'r+b') as f:
+                    f.truncate(nova * n_nos * 4)
+                ampliada = np.memmap(self._caminho_mmap(var), dtype=np.float32, mode='r+', shape=(nova, n_nos))
+            self.matrizes[var] = ampliada
+
+        tempos = np.empty(nova, dtype='datetime64[ms]')
+        tempos[:self.n_passos] = self.tempos[:self.n_passos]
+        self.tempos = tempos
+        self.capacidade = nova
+
+    def registrar(self, tempo, nos):
+        """Grava os valores de todos os nós (na ordem de ids_nos) para o passo atual"""
+        if self.n_passos == self.capacidade:
+            self._ampliar()
+
+        k = self.n_passos
+        self.tempos[k] = np.datetime64(tempo, 'ms')
+        for var in self.variaveis:
+            linha = self.matrizes[var][k]
+            for j, no in enumerate(nos):
+                linha[j] = getattr(no, var)
+
+            # Picos incrementais
+            maior = linha > self.picos[var]
+            self.picos[var][maior] = linha[maior]
+            self.passo_pico[var][maior] = k
+        self.n_passos += 1
+
+    def serie(self, var='depth'):
+        """Matriz (passos × nós) com os passos já gravados"""
+        return self.matrizes[var][:self.n_passos]
+
+    def serie_no(self, id_no, var='depth'):
+        """Série de um único nó"""
+        return self.matrizes[var][:self.n_passos, self.posicao[id_no]]
+
+    def tempos_registrados(self):
+        """Instantes dos passos gravados (datetime64)"""
+        return self.tempos[:self.n_passos]
+
+    def picos_por_no(self, var='depth'):
+        """Dicionário nó → pico da variável"""
+        return {id_: float(v) for id_, v in zip(self.ids, self.picos[var])}
+
+    def instante_pico(self, var='depth'):
+        """Dicionário nó → instante do pico da variável"""
+        tempos = self.tempos_registrados()
+        return {id_: tempos[k] for id_, k in zip(self.ids, self.passo_pico[var])}
+
+    def finalizar(self):
+        """Grava em disco as matrizes mapeadas em memória"""
+        for matriz in self.matrizes.values():
+            if isinstance(matriz, np.memmap):
+                matriz.flush()
+
+    def remover_arquivos(self):
+        """Apaga os arquivos de apoio mapeados em memória"""
+        if self.arquivo_mmap is None:
+            return
+        for var in list(self.matrizes):
+            self.matrizes[var] = np.asarray(self.serie(var)).copy()
+            caminho = self._caminho_mmap(var)
+            if os.path.exists(caminho):
+                os.remove(caminho)
+        self.arquivo_mmap = None
+        self.capacidade = self.n_passos
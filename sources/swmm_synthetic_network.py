@@ -0,0 +1,228 @@
+import os
+
+import numpy as np
+
+## Redes SWMM sintéticas para testes de desempenho
+#
+# Gera um .inp válido com N sub-bacias ligadas a uma rede em árvore (duas
+# sub-bacias por nó, em média), com cotas decrescentes até os exutórios, e um
+# .rpt com as tabelas lidas pelo extrator (continuidade, Subcatchment Runoff,
+# Node Depth e Node Inflow) preenchidas com valores plausíveis. A mesma
+# semente produz sempre os mesmos arquivos.
+
+OPCOES = [
+    ("FLOW_UNITS", "LPS"), ("INFILTRATION", "CURVE_NUMBER"), ("FLOW_ROUTING", "DYNWAVE"),
+    ("LINK_OFFSETS", "ELEVATION"), ("MIN_SLOPE", "0"), ("ALLOW_PONDING", "YES"),
+    ("SKIP_STEADY_STATE", "NO"), ("START_DATE", "11/13/2024"), ("START_TIME", "00:00:00"),
+    ("REPORT_START_DATE", "11/13/2024"), ("REPORT_START_TIME", "00:01:00"),
+    ("END_DATE", "11/13/2024"), ("END_TIME", "01:25:00"), ("REPORT_STEP", "00:05:00"),
+    ("WET_STEP", "00:01:00"), ("DRY_STEP", "01:00:00"), ("ROUTING_STEP", "0.6"),
+    ("VARIABLE_STEP", "0.75"), ("MINIMUM_STEP", "0.5"), ("THREADS", "1"),
+]
+
+# Hietograma de 60 min em lâminas de 5 min (mm), como a série TS4 dos cenários
+HIETOGRAMA = [1.5, 1.8, 2.4, 3.4, 5.6, 13.9, 8.2, 4.2, 2.8, 2.0, 1.6, 1.3]
+
+SUB_BACIAS_POR_NO = 2
+NOS_POR_EXUTORIO = 50
+
+
+class RedeSintetica:
+    """Rede em árvore com sub-bacias, nós, exutórios e trechos gerados aleatoriamente"""
+
+    def __init__(self, n_sub_bacias, semente=0):
+        rng = np.random.default_rng(semente)
+        self.n_sub_bacias = n_sub_bacias
+        n_nos = max(2, n_sub_bacias // SUB_BACIAS_POR_NO)
+        n_exutorios = max(1, n_nos // NOS_POR_EXUTORIO)
+
+        self.ids_nos = [f"P{i + 1}" for i in range(n_nos)]
+        self.ids_exutorios = [f"E{i + 1}" for i in range(n_exutorios)]
+        self.ids_trechos = [f"G{i + 1}" for i in range(n_nos)]
+        self.ids_sub_bacias = [f"B{i + 1}" for i in range(n_sub_bacias)]
+
+        # Cada nó drena para um nó adiante (árvore); os últimos drenam para os exutórios
+        destino = np.arange(n_nos) + rng.integers(1, 4, n_nos)
+        self.destino_exutorio = destino >= n_nos
+        self.destino = np.where(self.destino_exutorio, np.arange(n_nos) % n_exutorios, destino)
+
+        self.comprimento = np.round(rng.uniform(7.0, 50.0, n_nos), 2)
+        self.diametro = rng.choice([0.4, 0.6, 0.8, 1.0], n_nos)
+        self.profundidade = np.round(rng.uniform(1.2, 2.0, n_nos), 2)
+
+        # Cotas de fundo: de jusante para montante, 0,5 a 2 % de declividade
+        declividade = rng.uniform(0.005, 0.02, n_nos)
+        self.cota_exutorio = np.round(1000.0 + rng.uniform(0, 2, n_exutorios), 3)
+        self.cota = np.zeros(n_nos)
+        for i in range(n_nos - 1, -1, -1):
+            base = self.cota_exutorio[self.destino[i]] if self.destino_exutorio[i] else self.cota[self.destino[i]]
+            self.cota[i] = base + declividade[i] * self.comprimento[i]
+        self.cota = np.round(self.cota, 3)
+
+        # Sub-bacias
+        self.saida = rng.integers(0, n_nos, n_sub_bacias)
+        self.area = np.round(rng.uniform(0.03, 0.07, n_sub_bacias), 4)
+        self.imperv = np.round(rng.uniform(75.0, 90.0, n_sub_bacias), 1)
+        self.largura = np.round(rng.uniform(15.0, 22.0, n_sub_bacias), 2)
+        self.declividade = np.round(rng.uniform(1.0, 10.0, n_sub_bacias), 2)
+        self.cn = rng.choice([85, 89, 98], n_sub_bacias)
+
+        # Coordenadas dos nós e polígonos quadrados das sub-bacias
+        lado = int(np.ceil(np.sqrt(n_nos)))
+        self.x = (np.arange(n_nos) % lado) * 100.0 + rng.uniform(0, 10, n_nos)
+        self.y = (np.arange(n_nos) // lado) * 100.0 + rng.uniform(0, 10, n_nos)
+        self.rng = rng
+
+    def _no_destino(self, i):
+        return self.ids_exutorios[self.destino[i]] if self.destino_exutorio[i] else self.ids_nos[self.destino[i]]
+
+    def texto_inp(self):
+        """Conteúdo do .inp"""
+        linhas = ["[TITLE]", f"Rede sintética com {self.n_sub_bacias} sub-bacias", "", "[OPTIONS]"]
+        linhas += [f"{chave:<20} {valor}" for chave, valor in OPCOES]
+        linhas += ["", "[RAINGAGES]", "PLUV1            VOLUME    0:05     1.0      TIMESERIES TS1", ""]
+
+        linhas.append("[SUBCATCHMENTS]")
+        linhas += [
+            f"{b:<16} PLUV1            {self.ids_nos[s]:<16} {a:<8} {imp:<8} {w:<8} {d:<8} 0"
+            for b, s, a, imp, w, d in zip(self.ids_sub_bacias, self.saida, self.area, self.imperv,
+                                         self.largura, self.declividade)
+        ]
+        linhas += ["", "[SUBAREAS]"]
+        linhas += [f"{b:<16} 0.0123     0.15       1.27       2.54       100        IMPERVIOUS 10"
+                   for b in self.ids_sub_bacias]
+        linhas += ["", "[INFILTRATION]"]
+        linhas += [f"{b:<16} {cn:<10} 0          7          7          0" for b, cn in zip(self.ids_sub_bacias, self.cn)]
+
+        linhas += ["", "[JUNCTIONS]"]
+        linhas += [f"{p:<16} {c:<10} {h:<10} 0          0          0"
+                   for p, c, h in zip(self.ids_nos, self.cota, self.profundidade)]
+        linhas += ["", "[OUTFALLS]"]
+        linhas += [f"{e:<16} {c:<10} FREE                        NO" for e, c in zip(self.ids_exutorios, self.cota_exutorio)]
+
+        linhas += ["", "[CONDUITS]"]
+        for i, g in enumerate(self.ids_trechos):
+            para = self._no_destino(i)
+            cota_para = self.cota_exutorio[self.destino[i]] if self.destino_exutorio[i] else self.cota[self.destino[i]]
+            linhas.append(f"{g:<16} {self.ids_nos[i]:<16} {para:<16} {self.comprimento[i]:<10} 0.013      "
+                          f"{self.cota[i]:<10} {cota_para:<10} 0.0        0.0")
+        linhas += ["", "[XSECTIONS]"]
+        linhas += [f"{g:<16} CIRCULAR     {d:<16} 0.0        0.0        0.0        1"
+                   for g, d in zip(self.ids_trechos, self.diametro)]
+
+        linhas += ["", "[TIMESERIES]"]
+        linhas += [f"TS1                         {(k + 1) * 5 // 60:02d}:{(k + 1) * 5 % 60:02d}:00   {v}"
+                   for k, v in enumerate(HIETOGRAMA)]
+        linhas += ["TS1                         1:05       0", "", "[REPORT]", "SUBCATCHMENTS ALL",
+                   "NODES ALL", "LINKS ALL", ""]
+
+        linhas.append("[COORDINATES]")
+        linhas += [f"{p:<16} {x:<18.3f} {y:<18.3f}" for p, x, y in zip(self.ids_nos, self.x, self.y)]
+        linhas += [f"{e:<16} {i * 100.0:<18.3f} {-100.0:<18.3f}" for i, e in enumerate(self.ids_exutorios)]
+        linhas += ["", "[Polygons]"]
+        for b, s in zip(self.ids_sub_bacias, self.saida):
+            x0, y0 = self.x[s] + self.rng.uniform(-40, 40), self.y[s] + self.rng.uniform(-40, 40)
+            linhas += [f"{b:<16} {x0 + dx:<18.3f} {y0 + dy:<18.3f}" for dx, dy in ((0, 0), (20, 0), (20, 20), (0, 20))]
+        linhas.append("")
+        return "\n".join(linhas)
+
+    def texto_rpt(self):
+        """Conteúdo de um .rpt com as tabelas usadas pelo extrator (valores fictícios)"""
+        rng = self.rng
+        chuva = float(sum(HIETOGRAMA))
+        n_nos = len(self.ids_nos)
+
+        linhas = ["  EPA STORM WATER MANAGEMENT MODEL - VERSION 5.2 (Build 5.2.4)", "",
+                  "  **************************        Volume         Depth",
+                  "  Runoff Quantity Continuity     hectare-m            mm",
+                  "  **************************     ---------       -------",
+                  f"  Total Precipitation ......     {chuva * self.area.sum() / 1000:9.3f}     {chuva:9.3f}",
+                  "  Continuity Error (%) .....        -0.500", "",
+                  "  **************************        Volume        Volume",
+                  "  Flow Routing Continuity        hectare-m      10^6 ltr",
+                  "  **************************     ---------     ---------",
+                  "  Continuity Error (%) .....        -0.020", ""]
+
+        # Subcatchment Runoff Summary
+        infil = np.round(rng.uniform(2.0, 3.0, self.n_sub_bacias), 2)
+        imperv = np.round((chuva - infil) * 0.98, 2)
+        perv = np.round(rng.uniform(0.0, 0.05, self.n_sub_bacias), 2)
+        linhas += ["  ***************************", "  Subcatchment Runoff Summary", "  ***************************", "",
+                   "  " + "-" * 126, "  Subcatchment  Precip  Runon  Evap  Infil  Imperv  Perv  Total  Total  Peak  Coeff",
+                   "  " + "-" * 126]
+        linhas += [
+            f"  {b:<25} {chuva:8.2f}       0.00       0.00 {i:10.2f} {r:10.2f} {p:10.2f} {r + p:10.2f} "
+            f"{(r + p) * a / 100:11.2f} {a * 400:8.2f}   {(r + p) / chuva:.3f}"
+            for b, a, i, r, p in zip(self.ids_sub_bacias, self.area, infil, imperv, perv)
+        ]
+        linhas.append("")
+
+        # Node Depth Summary
+        maxima = np.round(self.profundidade * rng.uniform(0.1, 1.2, n_nos), 2)
+        linhas += ["  ******************", "  Node Depth Summary", "  ******************", "",
+                   "  " + "-" * 81, "  Node  Type  Average  Maximum  HGL  Time  Reported", "  " + "-" * 81]
+        linhas += [
+            f"  {p:<20} JUNCTION {m * 0.2:8.2f} {m:8.2f} {c + m:8.2f}     0  00:{rng.integers(5, 59):02d} {m:11.2f}"
+            for p, m, c in zip(self.ids_nos, maxima, self.cota)
+        ]
+        linhas.append("")
+
+        # Node Inflow Summary
+        lateral = np.round(rng.uniform(20.0, 60.0, n_nos), 2)
+        total = np.round(lateral * rng.uniform(1.0, 5.0, n_nos), 2)
+        linhas += ["  *******************", "  Node Inflow Summary", "  *******************", "",
+                   "  " + "-" * 97, "  Node  Type  Lateral  Total  Time  LatVol  TotVol  Error", "  " + "-" * 97]
+        linhas += [
+            f"  {p:<20} JUNCTION {la:9.2f} {t:8.2f}     0  00:{rng.integers(5, 59):02d} {la * 3e-4:11.4f} "
+            f"{t * 3e-4:11.4f} {rng.uniform(-0.5, 0.5):11.3f}"
+            for p, la, t in zip(self.ids_nos, lateral, total)
+        ]
+        linhas.append("")
+
+        # Link Flow Summary
+        vazao = np.round(total * rng.uniform(0.8, 1.0, n_nos), 2)
+        relativa = np.round(rng.uniform(0.05, 1.3, n_nos), 2)
+        profundidade = np.round(np.minimum(1.0, relativa * rng.uniform(0.6, 1.0, n_nos)), 2)
+        linhas += ["  *****************", "  Link Flow Summary", "  *****************", "",
+                   "  " + "-" * 77, "  Link  Type  |Flow|  Time  |Veloc|  Full/Flow  Full/Depth", "  " + "-" * 77]
+        linhas += [
+            f"  {g:<20} CONDUIT {q:9.2f}     0  00:{rng.integers(5, 59):02d} {v:9.2f} {r:7.2f} {y:7.2f}"
+            for g, q, v, r, y in zip(self.ids_trechos, vazao, rng.uniform(0.5, 4.0, n_nos), relativa, profundidade)
+        ]
+        linhas.append("")
+
+        # Flow Classification Summary
+        supercritico = np.round(rng.uniform(0.0, 0.9, n_nos), 2)
+        linhas += ["  ***************************", "  Flow Classification Summary", "  ***************************", "",
+                   "  " + "-" * 85, "  Conduit  Length  Dry  UpDry  DnDry  SubCrit  SupCrit  UpCrit  DnCrit  Norm  Inlet",
+                   "  " + "-" * 85]
+        linhas += [
+            f"  {g:<20} 1.00   0.14  0.00  0.00  {0.86 - s:.2f}  {s:.2f}  0.00  0.00  0.50  0.00"
+            for g, s in zip(self.ids_trechos, supercritico)
+        ]
+        linhas.append("")
+
+        # Conduit Surcharge Summary (apenas os condutos que encheram)
+        cheios = np.flatnonzero(profundidade >= 1.0)
+        linhas += ["  *************************", "  Conduit Surcharge Summary", "  *************************", "",
+                   "  " + "-" * 76, "  Conduit  BothEnds  Upstream  Dnstream  AboveFull  CapacityLimited", "  " + "-" * 76]
+        linhas += [
+            f"  {self.ids_trechos[i]:<20} {h:9.2f} {h:9.2f} {h:9.2f} {h / 2:9.2f} {h / 2:9.2f}"
+            for i, h in zip(cheios, np.round(rng.uniform(0.01, 0.2, len(cheios)), 2))
+        ]
+        linhas.append("")
+        return "\n".join(linhas)
+
+
+def gerar_rede_sintetica(n_sub_bacias, pasta, semente=0, nome=None):
+    """Grava <nome>.inp e <nome>.rpt sintéticos na pasta; retorna os caminhos"""
+    nome = nome or f"sintetica_{n_sub_bacias}"
+    os.makedirs(pasta, exist_ok=True)
+    rede = RedeSintetica(n_sub_bacias, semente)
+    caminho_inp = os.path.join(pasta, f"{nome}.inp")
+    caminho_rpt = os.path.join(pasta, f"{nome}.rpt")
+    with open(caminho_inp, 'w', encoding='utf-8') as f:
+        f.write(rede.texto_inp())
+    with open(caminho_rpt, 'w', encoding='utf-8') as f:
+        f.write(rede.texto_rpt())
+    return caminho_inp, caminho_rpt
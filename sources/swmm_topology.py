@@ -0,0 +1,227 @@
+import hashlib
+import math
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+## Índice topológico da rede de drenagem
+#
+# Os nós ([JUNCTIONS], [OUTFALLS], [STORAGE], [DIVIDERS]) são renumerados em
+# ordem topológica e os trechos de [CONDUITS] ficam em adjacência CSR
+# (indptr/indices). O sucessor principal de cada nó é o destino do primeiro
+# trecho que sai dele, na ordem do .inp. Sobre essa árvore de jusante são
+# calculados, com operações vetoriais, os acumulados de montante e as
+# distâncias até o exutório. O índice é guardado em cache pelo conteúdo da
+# rede, já que todos os cenários de uma varredura compartilham a mesma rede.
+
+SECOES_NOS = ('JUNCTIONS', 'OUTFALLS', 'STORAGE', 'DIVIDERS')
+MAX_TOPOLOGIAS_CACHE = 16
+
+# Atributos de rede por nó (acrescentados aos registros do extrator)
+COLUNAS_REDE = ['AMON', 'AIMP', 'NENT', 'CEXU', 'DEXU']
+
+# Cache impressão digital da rede → TopologiaRede
+_cache_topologias = OrderedDict()
+
+
+class TopologiaRede:
+    """Rede em CSR com os nós numerados em ordem topológica e a árvore de sucessores principais"""
+
+    def __init__(self, ids_nos, cotas, origens, destinos, ids_trechos, comprimentos):
+        n = len(ids_nos)
+        origens = np.asarray(origens, dtype=np.int64)
+        destinos = np.asarray(destinos, dtype=np.int64)
+
+        # 1. Ordem topológica (Kahn por níveis)
+        ordem, self.nos_em_ciclo = self._ordem_topologica(n, origens, destinos)
+        posto = np.empty(n, dtype=np.int64)
+        posto[ordem] = np.arange(n)
+
+        self.ids = [ids_nos[i] for i in ordem]
+        self.posicao = {id_: i for i, id_ in enumerate(self.ids)}
+        self.cotas = np.asarray(cotas, dtype=np.float64)[ordem]
+
+        # 2. Adjacência CSR na nova numeração (trechos de cada nó na ordem do .inp)
+        origens, destinos = posto[origens], posto[destinos]
+        arranjo = np.lexsort((np.arange(len(origens)), origens))
+        self.indices = destinos[arranjo]
+        self.trechos = arranjo                               # índice do trecho em ids_trechos
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(origens, minlength=n))))
+        self.ids_trechos = list(ids_trechos)
+        self.comprimentos = np.asarray(comprimentos, dtype=np.float64)
+
+        # 3. Sucessor principal: primeiro trecho que sai do nó
+        tem_saida = self.indptr[1:] > self.indptr[:-1]
+        primeiro = self.indptr[:-1][tem_saida]
+        self.sucessor = np.full(n, -1, dtype=np.int64)
+        self.sucessor[tem_saida] = self.indices[primeiro]
+        self.trecho_principal = np.full(n, -1, dtype=np.int64)
+        self.trecho_principal[tem_saida] = self.trechos[primeiro]
+
+        # 4. Exutório, número de trechos e comprimento até o exutório
+        self.raiz, self.saltos, self.comprimento_exutorio = self._subir_ate_exutorio()
+        self.desnivel_exutorio = self.cotas - self.cotas[self.raiz]
+
+        # Nós agrupados pelo número de trechos até o exutório (para os acumulados)
+        ordem_saltos = np.argsort(-self.saltos, kind='stable')
+        limites = np.flatnonzero(np.diff(self.saltos[ordem_saltos])) + 1
+        self._niveis = [nivel for nivel in np.split(ordem_saltos, limites) if self.saltos[nivel[0]] > 0]
+
+    def __len__(self):
+        return len(self.ids)
+
+    @staticmethod
+    def _ordem_topologica(n, origens, destinos):
+        grau_entrada = np.bincount(destinos, minlength=n)
+        arranjo = np.argsort(origens, kind='stable')
+        destinos_ordenados = destinos[arranjo]
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(origens, minlength=n))))
+
+        ordem = []
+        fronteira = np.flatnonzero(grau_entrada == 0)
+        while len(fronteira):
+            ordem.append(fronteira)
+            inicios = indptr[fronteira]
+            contagens = indptr[fronteira + 1] - inicios
+            total = int(contagens.sum())
+            if total == 0:
+                break
+            # Trechos de saída de toda a fronteira de uma vez (sem laço por nó)
+            deslocamentos = np.repeat(inicios - (np.cumsum(contagens) - contagens), contagens)
+            saidas = destinos_ordenados[np.arange(total) + deslocamentos]
+            np.subtract.at(grau_entrada, saidas, 1)
+            alcancados = np.unique(saidas)
+            fronteira = alcancados[grau_entrada[alcancados] == 0]
+
+        ordem = np.concatenate(ordem) if ordem else np.empty(0, dtype=np.int64)
+        # Nós em ciclos (ou alcançáveis só por ciclos) ficam no fim, na ordem original
+        restantes = np.setdiff1d(np.arange(n), ordem)
+        if len(restantes):
+            print(f"Aviso: {len(restantes)} nó(s) em ciclos na rede; ordem topológica parcial")
+        return np.concatenate((ordem, restantes)).astype(np.int64), len(restantes)
+
+    def _subir_ate_exutorio(self):
+        """Salto de ponteiros sobre os sucessores principais: O(N log D)"""
+        n = len(self.ids)
+        indices = np.arange(n)
+        tem_sucessor = self.sucessor >= 0
+        proximo = np.where(tem_sucessor, self.sucessor, indices)
+        saltos = tem_sucessor.astype(np.int64)
+        comprimento = np.zeros(n)
+        comprimento[tem_sucessor] = self.comprimentos[self.trecho_principal[tem_sucessor]]
+
+        for _ in range(max(1, math.ceil(math.log2(max(n, 2)))) + 1):
+            seguinte = proximo[proximo]
+            if np.array_equal(seguinte, proximo):
+                break
+            comprimento = comprimento + comprimento[proximo]
+            saltos = saltos + saltos[proximo]
+            proximo = seguinte
+        return proximo, saltos, comprimento
+
+    def acumular_montante(self, valores):
+        """Soma cada valor por nó com os de todos os nós a montante (árvore de sucessores principais)"""
+        acumulado = np.array(valores, dtype=np.float64)
+        for nivel in self._niveis:
+            np.add.at(acumulado, self.sucessor[nivel], acumulado[nivel])
+        return acumulado
+
+    def por_no(self, ids, valores, padrao=0.0):
+        """Espalha valores associados a IDs de nós em um vetor na ordem topológica (soma repetidos)"""
+        vetor = np.full(len(self.ids), padrao, dtype=np.float64)
+        posicoes = np.array([self.posicao.get(id_, -1) for id_ in ids], dtype=np.int64)
+        validos = posicoes >= 0
+        np.add.at(vetor, posicoes[validos], np.asarray(valores, dtype=np.float64)[validos])
+        return vetor
+
+    def trecho_jusante(self, id_no):
+        """ID do trecho principal que sai do nó (None para exutórios)"""
+        i = self.posicao.get(id_no)
+        if i is None or self.trecho_principal[i] < 0:
+            return None
+        return self.ids_trechos[self.trecho_principal[i]]
+
+
+def _impressao_rede(modelo):
+    h = hashlib.sha1()
+    for secao in SECOES_NOS + ('CONDUITS',):
+        for partes in modelo.secoes.get(secao, []):
+            h.update(' '.join(partes[:4]).encode('utf-8'))
+            h.update(b'\n')
+        h.update(b'|')
+    return h.hexdigest()
+
+
+def topologia_modelo(modelo):
+    """TopologiaRede do modelo, reaproveitada enquanto nós e trechos não mudarem"""
+    chave = _impressao_rede(modelo)
+    topologia = _cache_topologias.get(chave)
+    if topologia is not None:
+        _cache_topologias.move_to_end(chave)
+        return topologia
+
+    # Nós declarados (com cota de fundo) e nós citados apenas pelos trechos
+    ids_nos = []
+    cotas = []
+    for secao in SECOES_NOS:
+        tabela = modelo.tabela(secao)
+        ids_nos.extend(tabela.ids)
+        cotas.extend(float(partes[1]) if len(partes) > 1 else np.nan for partes in tabela.linhas)
+    posicao = {id_: i for i, id_ in enumerate(ids_nos)}
+
+    conduits = modelo.tabela('CONDUITS')
+    origens = []
+    destinos = []
+    for de, para in zip(conduits.coluna('FromNode'), conduits.coluna('ToNode')):
+        for no in (de, para):
+            if no not in posicao:
+                posicao[no] = len(ids_nos)
+                ids_nos.append(no)
+                cotas.append(np.nan)
+        origens.append(posicao[de])
+        destinos.append(posicao[para])
+
+    comprimentos = np.nan_to_num(np.asarray(conduits.coluna('Length'), dtype=np.float64))
+    topologia = TopologiaRede(ids_nos, cotas, origens, destinos, conduits.ids, comprimentos)
+
+    _cache_topologias[chave] = topologia
+    while len(_cache_topologias) > MAX_TOPOLOGIAS_CACHE:
+        _cache_topologias.popitem(last=False)
+    return topologia
+
+
+def atributos_rede(modelo, topologia=None):
+    """
+    DataFrame indexado pelo nó com os atributos de rede:
+    AMON área contribuinte a montante, AIMP área impermeável a montante,
+    NENT entradas a montante (bocas de [INLET_USAGE] ou, sem elas, sub-bacias),
+    CEXU comprimento e DEXU desnível até o exutório pelo caminho principal
+    """
+    topologia = topologia or topologia_modelo(modelo)
+    sub_bacias = modelo.tabela('SUBCATCHMENTS')
+    saidas = sub_bacias.coluna('Outlet')
+    areas = np.nan_to_num(sub_bacias.coluna('Area'))
+    imperv = np.nan_to_num(sub_bacias.coluna('Imperv'))
+
+    area = topologia.por_no(saidas, areas)
+    area_impermeavel = topologia.por_no(saidas, areas * imperv / 100.0)
+
+    usos = modelo.secoes.get('INLET_USAGE', [])
+    if usos:
+        entradas = topologia.por_no([p[2] for p in usos], [float(p[3]) if len(p) > 3 else 1.0 for p in usos])
+    else:
+        entradas = topologia.por_no(saidas, np.ones(len(saidas)))
+
+    return pd.DataFrame({
+        'AMON': topologia.acumular_montante(area),
+        'AIMP': topologia.acumular_montante(area_impermeavel),
+        'NENT': topologia.acumular_montante(entradas),
+        'CEXU': topologia.comprimento_exutorio,
+        'DEXU': topologia.desnivel_exutorio,
+    }, index=pd.Index(topologia.ids, name='NO'))
+
+
+def limpar_cache_topologias():
+    """Esvazia o cache de topologias"""
+    _cache_topologias.clear()
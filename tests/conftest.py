@@ -0,0 +1,14 @@
+import os
+import sys
+
+## Configuração dos testes de regressão
+#
+# Os módulos ficam em sources/ e se importam pelo nome (como nos scripts), então
+# a pasta entra no sys.path; os cenários de simulation_files/ servem de dados.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PASTA_FONTES = os.path.join(RAIZ, 'sources')
+PASTA_SIMULACOES = os.path.join(RAIZ, 'simulation_files')
+
+if PASTA_FONTES not in sys.path:
+    sys.path.insert(0, PASTA_FONTES)
@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+from conftest import PASTA_SIMULACOES
+from scenarios_dataset import PASTA_DATASET, cenarios_no_dataset
+from scenarios_job_ledger import ARQUIVO_TAREFAS, RegistroTarefas
+from swmm_report_index import IndiceRelatorio
+
+varredura = pytest.importorskip('scenarios_sweep')
+
+## Regressão da varredura: aquecimento com o fator antecedente e partições fora do delineamento
+
+
+@pytest.fixture
+def base():
+    caminho = os.path.join(PASTA_SIMULACOES, 'cenario_01.inp')
+    if not os.path.exists(caminho):
+        pytest.skip("cenario_01.inp ausente")
+    return caminho
+
+
+def _precipitacao_aquecimento(base, tmp_path, antecedentes):
+    pasta = tmp_path / 'variante'
+    pasta.mkdir()
+    varredura._iniciar_worker(base, str(tmp_path / 'hotstart'))
+    caminho_inp = varredura._modelo_base.gravar_variante(str(pasta / 'v.inp'))
+    varredura._hotstart_variante(str(pasta), 'v', caminho_inp, {}, antecedentes)
+    relatorio = IndiceRelatorio(str(pasta / 'v_aquecimento.rpt'))
+    return relatorio.continuidade('Runoff Quantity Continuity')['Total Precipitation'][1]
+
+
+@pytest.mark.parametrize('fator, esperado', [(1.0, 13.9), (0.5, 6.95), (0.0, 0.0)])
+def test_fator_antecedente_escala_a_chuva_do_aquecimento(base, tmp_path, fator, esperado):
+    antecedentes = {'fator_antecedente': fator, 'aquecimento_min': 30.0}
+    assert _precipitacao_aquecimento(base, tmp_path, antecedentes) == pytest.approx(esperado, abs=0.01)
+
+
+def test_aquecimento_sem_fator_e_seco(base, tmp_path):
+    assert _precipitacao_aquecimento(base, tmp_path, {'aquecimento_min': 30.0}) == 0.0
+
+
+def test_delineamento_menor_remove_particoes_obsoletas(base, tmp_path):
+    saida = str(tmp_path / 'saida')
+    erros = varredura.executar_varredura(base, [{'fator_chuva': 1.0}, {'fator_chuva': 2.0}], saida, n_processos=1)
+    assert not erros
+    assert cenarios_no_dataset(os.path.join(saida, PASTA_DATASET)) == ['var00001', 'var00002']
+
+    erros = varredura.executar_varredura(base, [{'fator_chuva': 1.0}], saida, n_processos=1)
+    assert not erros
+    assert cenarios_no_dataset(os.path.join(saida, PASTA_DATASET)) == ['var00001']
+    with RegistroTarefas(os.path.join(saida, ARQUIVO_TAREFAS)) as registro:
+        assert list(registro.estados()) == ['var00001']
@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+import pytest
+
+from conftest import PASTA_SIMULACOES
+from swmm_geometry import IndiceEspacial, geometria_modelo
+from swmm_inp_model import ler_modelo_inp
+
+## Regressão do índice espacial: consultas da R-tree contra força bruta
+
+
+def _caixas_aleatorias(gerador, n, largura_max):
+    cantos = gerador.uniform(0.0, 1000.0, size=(n, 2))
+    tamanhos = gerador.uniform(0.0, largura_max, size=(n, 2))
+    return np.column_stack([cantos, cantos + tamanhos])
+
+
+def _janelas_forca_bruta(caixas, janelas):
+    return [np.flatnonzero((caixas[:, 0] <= j[2]) & (j[0] <= caixas[:, 2]) &
+                           (caixas[:, 1] <= j[3]) & (j[1] <= caixas[:, 3])) for j in janelas]
+
+
+def _distancias_forca_bruta(caixas, x, y):
+    """Matriz (pontos × caixas) das distâncias de cada ponto a cada caixa"""
+    dx = np.maximum(np.maximum(caixas[None, :, 0] - x[:, None], x[:, None] - caixas[None, :, 2]), 0.0)
+    dy = np.maximum(np.maximum(caixas[None, :, 1] - y[:, None], y[:, None] - caixas[None, :, 3]), 0.0)
+    return np.hypot(dx, dy)
+
+
+@pytest.mark.parametrize('n, capacidade, largura_max', [
+    (1, 16, 50.0), (17, 16, 50.0), (1000, 16, 50.0), (3000, 4, 20.0), (2000, 16, 0.0),
+])
+def test_janelas_iguais_a_forca_bruta(n, capacidade, largura_max):
+    gerador = np.random.default_rng(n)
+    caixas = _caixas_aleatorias(gerador, n, largura_max)
+    janelas = _caixas_aleatorias(gerador, 200, 150.0)
+    indice = IndiceEspacial(caixas, capacidade)
+
+    consultas, itens = indice.consultar_janelas(janelas)
+    esperado = _janelas_forca_bruta(caixas, janelas)
+    for i, itens_esperados in enumerate(esperado):
+        np.testing.assert_array_equal(itens[consultas == i], itens_esperados)
+    np.testing.assert_array_equal(indice.na_janela(*janelas[0]), esperado[0])
+
+
+@pytest.mark.parametrize('n, capacidade, largura_max', [
+    (1, 16, 50.0), (17, 16, 50.0), (1000, 16, 50.0), (3000, 4, 20.0), (2000, 16, 0.0),
+])
+def test_mais_proximos_iguais_a_forca_bruta(n, capacidade, largura_max):
+    gerador = np.random.default_rng(n + 1)
+    caixas = _caixas_aleatorias(gerador, n, largura_max)
+    # Pontos dentro e fora da extensão das caixas
+    x, y = gerador.uniform(-200.0, 1200.0, size=(2, 500))
+    indice = IndiceEspacial(caixas, capacidade)
+
+    itens, distancias = indice.mais_proximos(x, y)
+    todas = _distancias_forca_bruta(caixas, x, y)
+    np.testing.assert_allclose(distancias, todas.min(axis=1), rtol=1e-12, atol=1e-9)
+    # Em caso de empate basta que o item devolvido esteja à menor distância
+    np.testing.assert_allclose(todas[np.arange(len(x)), itens], todas.min(axis=1), rtol=1e-12, atol=1e-9)
+
+
+def test_indice_vazio():
+    indice = IndiceEspacial(np.zeros((0, 4)))
+    consultas, itens = indice.consultar_janelas([(0.0, 0.0, 1.0, 1.0)])
+    assert len(consultas) == len(itens) == 0
+    itens, distancias = indice.mais_proximos([0.0], [0.0])
+    assert itens.tolist() == [-1] and np.isinf(distancias).all()
+
+
+def test_consultas_em_cenario_real():
+    caminho = os.path.join(PASTA_SIMULACOES, 'cenario_01.inp')
+    if not os.path.exists(caminho):
+        pytest.skip("cenario_01.inp ausente")
+    geometria = geometria_modelo(ler_modelo_inp(caminho))
+    xmin, ymin, xmax, ymax = geometria.extensao()
+    cx, cy = (xmin + xmax) / 2, (ymin + ymax) / 2
+    janela = (xmin, ymin, cx, cy)
+
+    caixas = geometria.sub_bacias.caixas
+    esperado = [geometria.sub_bacias.ids[i] for i in _janelas_forca_bruta(caixas, [janela])[0]]
+    assert geometria.sub_bacias_na_janela(*janela) == esperado
+
+    gerador = np.random.default_rng(0)
+    x = gerador.uniform(xmin, xmax, 200)
+    y = gerador.uniform(ymin, ymax, 200)
+    _, distancias = geometria.nos_mais_proximos(x, y)
+    esperadas = np.hypot(geometria.x_nos[None, :] - x[:, None], geometria.y_nos[None, :] - y[:, None]).min(axis=1)
+    np.testing.assert_allclose(distancias, esperadas, rtol=1e-12)
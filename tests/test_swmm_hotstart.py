@@ -0,0 +1,48 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from swmm_hotstart import CacheHotstart
+
+## Regressão do cache de hotstarts: uma chave custa um único aquecimento
+
+
+class _Aquecimento:
+    """Gerador de hotstart lento que conta as execuções em um arquivo"""
+
+    def __init__(self, contador):
+        self.contador = contador
+
+    def __call__(self, caminho_hsf):
+        import time
+        with open(self.contador, 'a', encoding='utf-8') as f:
+            f.write(f"{os.getpid()}\n")
+        time.sleep(0.5)
+        with open(caminho_hsf, 'wb') as f:
+            f.write(b'hotstart')
+
+
+def _obter(pasta, contador):
+    caminho, reaproveitado = CacheHotstart(pasta).obter_ou_gerar('chave', _Aquecimento(contador))
+    with open(caminho, 'rb') as f:
+        return f.read(), reaproveitado
+
+
+def test_processos_concorrentes_geram_a_chave_uma_vez(tmp_path):
+    pasta, contador = str(tmp_path / 'hotstart'), str(tmp_path / 'execucoes.txt')
+    with ProcessPoolExecutor(max_workers=4) as pool:
+        resultados = list(pool.map(_obter, [pasta] * 4, [contador] * 4))
+
+    with open(contador, encoding='utf-8') as f:
+        assert len(f.read().splitlines()) == 1
+    assert all(conteudo == b'hotstart' for conteudo, _ in resultados)
+    assert sorted(reaproveitado for _, reaproveitado in resultados) == [False, True, True, True]
+    assert not os.path.exists(os.path.join(pasta, 'chave.lock'))
+
+
+def test_trava_abandonada_nao_bloqueia(tmp_path):
+    cache = CacheHotstart(str(tmp_path / 'hotstart'))
+    # Trava deixada por um processo que não existe mais
+    with open(os.path.join(cache.pasta, 'chave.lock'), 'w', encoding='utf-8') as f:
+        f.write('999999999')
+    caminho, reaproveitado = cache.obter_ou_gerar('chave', _Aquecimento(str(tmp_path / 'execucoes.txt')))
+    assert os.path.exists(caminho) and not reaproveitado
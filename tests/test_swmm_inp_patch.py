@@ -0,0 +1,79 @@
+import os
+
+import pytest
+
+from conftest import PASTA_SIMULACOES
+from scenarios_data_extractor import ler_duracao_chuva, ler_laminas_chuva
+from swmm_inp_model import ler_modelo_inp
+from swmm_inp_patch import ModeloBase
+from swmm_report_index import IndiceRelatorio
+
+pyswmm = pytest.importorskip('pyswmm')
+
+## Regressão das variantes: a chuva simulada pelo SWMM é a chuva registrada no dataset
+
+
+def _simular(caminho_inp):
+    with pyswmm.Simulation(caminho_inp) as simulacao:
+        simulacao.execute()
+    return IndiceRelatorio(os.path.splitext(caminho_inp)[0] + '.rpt')
+
+
+def _precipitacao_mm(relatorio):
+    """'Total Precipitation' (mm) do bloco de continuidade do escoamento"""
+    return relatorio.continuidade('Runoff Quantity Continuity')['Total Precipitation'][1]
+
+
+@pytest.fixture(scope='module')
+def base():
+    caminho = os.path.join(PASTA_SIMULACOES, 'cenario_01.inp')
+    if not os.path.exists(caminho):
+        pytest.skip("cenario_01.inp ausente")
+    return ModeloBase(caminho)
+
+
+@pytest.mark.parametrize('fator', [1.0, 2.0, 0.5, 0.0])
+def test_fator_chuva_escala_a_precipitacao_simulada(base, fator, tmp_path):
+    referencia = _precipitacao_mm(_simular(base.gravar_variante(str(tmp_path / 'base.inp'))))
+    caminho = base.gravar_variante(str(tmp_path / 'variante.inp'), fator_chuva=fator)
+
+    assert _precipitacao_mm(_simular(caminho)) == pytest.approx(referencia * fator, abs=0.01)
+    # VCHU lido do .inp da variante bate com o que o SWMM simulou
+    modelo = ler_modelo_inp(caminho)
+    laminas = ler_laminas_chuva(modelo, ler_duracao_chuva(modelo))
+    assert list(laminas.values()) == [pytest.approx(referencia * fator, abs=0.01)]
+
+
+def test_fator_chuva_com_troca_de_serie(base, tmp_path):
+    caminho = base.gravar_variante(str(tmp_path / 'variante.inp'), serie='TS4', fator_chuva=2.0)
+    modelo = ler_modelo_inp(caminho)
+    laminas = ler_laminas_chuva(modelo, ler_duracao_chuva(modelo))
+    assert _precipitacao_mm(_simular(caminho)) == pytest.approx(list(laminas.values())[0], abs=0.01)
+    assert 'TS4_x2' in modelo.series
+
+
+def test_scf_nao_altera_a_chuva(base, tmp_path):
+    # O SCF só corrige a neve: a lâmina registrada (VCHU) continua igual à simulada
+    texto = base.variante()
+    caminho = str(tmp_path / 'scf.inp')
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        f.write(texto.replace('1.0      TIMESERIES', '2.0      TIMESERIES', 1))
+    modelo = ler_modelo_inp(caminho)
+    assert modelo.tabela('RAINGAGES').linhas[0][3] == '2.0'
+    laminas = ler_laminas_chuva(modelo, ler_duracao_chuva(modelo))
+    assert _precipitacao_mm(_simular(caminho)) == pytest.approx(list(laminas.values())[0], abs=0.01)
+
+
+def test_serie_com_data_conta_a_partir_do_inicio(base, tmp_path):
+    # Registros datados antes, dentro e no fim da janela simulada (START 11/13/2024 00:00, END 00:30)
+    datada = ("TS1  11/12/2024  23:50  5.0\nTS1  11/13/2024  00:05  13.9\n"
+              "TS1  11/13/2024  00:15  0.0\nTS1  11/13/2024  00:25  4.0\n")
+    texto = base.variante()
+    original = next(linha for linha in texto.splitlines(keepends=True) if linha.split()[:1] == ['TS1'])
+    caminho = str(tmp_path / 'datada.inp')
+    with open(caminho, 'w', encoding='utf-8', newline='') as f:
+        f.write(texto.replace(original, datada))
+    modelo = ler_modelo_inp(caminho)
+    assert modelo.series['TS1'].tempos_horas[0] == pytest.approx(-1 / 6)
+    laminas = ler_laminas_chuva(modelo, ler_duracao_chuva(modelo))
+    assert _precipitacao_mm(_simular(caminho)) == pytest.approx(list(laminas.values())[0], abs=0.01)
@@ -0,0 +1,98 @@
+import os
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from conftest import PASTA_SIMULACOES
+from swmm_out_reader import VARIAVEIS_NO, VARIAVEIS_SUB_BACIA, VARIAVEIS_TRECHO, ArquivoSaida
+
+toolkit = pytest.importorskip('swmm.toolkit.output')
+from swmm.toolkit import shared_enum  # noqa: E402
+
+## Regressão do leitor do .out: ArquivoSaida contra o swmm.toolkit nos cenários gravados
+
+CENARIOS = ['cenario_01', 'cenario_07']
+
+
+@pytest.fixture(params=CENARIOS)
+def arquivos(request):
+    caminho = os.path.join(PASTA_SIMULACOES, f"{request.param}.out")
+    if not os.path.exists(caminho):
+        pytest.skip(f"{request.param}.out ausente")
+    referencia = toolkit.init()
+    toolkit.open(referencia, caminho)
+    with ArquivoSaida(caminho) as saida:
+        yield saida, referencia
+    toolkit.close(referencia)
+
+
+def _series(referencia, funcao, n_objetos, atributo, n_periodos):
+    """Matriz (períodos × objetos) lida pelo toolkit"""
+    return np.column_stack([funcao(referencia, i, atributo, 0, n_periodos - 1) for i in range(n_objetos)])
+
+
+def test_cabecalho_e_ids(arquivos):
+    saida, referencia = arquivos
+    n_sub_bacias, n_nos, n_trechos, _, n_poluentes = toolkit.get_proj_size(referencia)  # 4º: sistema
+    assert (saida.n_sub_bacias, saida.n_nos, saida.n_trechos, saida.n_poluentes) == \
+        (n_sub_bacias, n_nos, n_trechos, n_poluentes)
+    assert saida.n_periodos == toolkit.get_times(referencia, shared_enum.Time.NUM_PERIODS)
+    assert saida.passo_relatorio == toolkit.get_times(referencia, shared_enum.Time.REPORT_STEP)
+
+    for tipo, ids in [(shared_enum.ElementType.SUBCATCH, saida.ids_sub_bacias),
+                      (shared_enum.ElementType.NODE, saida.ids_nos),
+                      (shared_enum.ElementType.LINK, saida.ids_trechos)]:
+        assert ids == [toolkit.get_elem_name(referencia, tipo, i) for i in range(len(ids))]
+
+
+def test_tempos(arquivos):
+    saida, referencia = arquivos
+    inicio = saida._data(toolkit.get_start_date(referencia))
+    assert saida.data_inicial == inicio
+    passo = timedelta(seconds=saida.passo_relatorio)
+    esperados = np.array([inicio + (i + 1) * passo for i in range(saida.n_periodos)], dtype='datetime64[s]')
+    np.testing.assert_array_equal(saida.tempos(), esperados)
+    np.testing.assert_array_equal(saida.tempos(slice(2, 5)), esperados[2:5])
+
+
+@pytest.mark.parametrize('variavel', list(VARIAVEIS_NO))
+def test_series_nos(arquivos, variavel):
+    saida, referencia = arquivos
+    esperado = _series(referencia, toolkit.get_node_series, saida.n_nos,
+                       shared_enum.NodeAttribute(VARIAVEIS_NO[variavel]), saida.n_periodos)
+    np.testing.assert_array_equal(saida.serie_nos(variavel), esperado)
+    np.testing.assert_array_equal(saida.picos_nos(variavel), esperado.max(axis=0))
+
+
+@pytest.mark.parametrize('variavel', list(VARIAVEIS_SUB_BACIA))
+def test_series_sub_bacias(arquivos, variavel):
+    saida, referencia = arquivos
+    esperado = _series(referencia, toolkit.get_subcatch_series, saida.n_sub_bacias,
+                       shared_enum.SubcatchAttribute(VARIAVEIS_SUB_BACIA[variavel]), saida.n_periodos)
+    np.testing.assert_array_equal(saida.serie_sub_bacias(variavel), esperado)
+
+
+@pytest.mark.parametrize('variavel', list(VARIAVEIS_TRECHO))
+def test_series_trechos(arquivos, variavel):
+    saida, referencia = arquivos
+    esperado = _series(referencia, toolkit.get_link_series, saida.n_trechos,
+                       shared_enum.LinkAttribute(VARIAVEIS_TRECHO[variavel]), saida.n_periodos)
+    np.testing.assert_array_equal(saida.serie_trechos(variavel), esperado)
+
+
+def test_series_sistema(arquivos):
+    saida, referencia = arquivos
+    for atributo in shared_enum.SystemAttribute:
+        esperado = toolkit.get_system_series(referencia, atributo, 0, saida.n_periodos - 1)
+        np.testing.assert_array_equal(saida.serie_sistema(atributo.value), np.asarray(esperado, dtype=np.float32))
+
+
+def test_selecao_por_id_e_periodo(arquivos):
+    saida, referencia = arquivos
+    nos = [saida.ids_nos[-1], saida.ids_nos[0]]
+    periodos = slice(1, saida.n_periodos - 1)
+    completo = saida.serie_nos('depth')
+    np.testing.assert_array_equal(saida.serie_nos('depth', nos, periodos), completo[periodos][:, [-1, 0]])
+    np.testing.assert_array_equal(saida.serie_trechos('flow', saida.ids_trechos[3]),
+                                  saida.serie_trechos('flow')[:, [3]])